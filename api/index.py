@@ -4,30 +4,54 @@ A Flask application to manage student fee records using Google Sheets as databas
 """
 
 from flask import Flask, render_template, request, jsonify, send_file
-from werkzeug.utils import secure_filename
-import pandas as pd
 import os
+import sys
 from datetime import datetime
 from io import BytesIO
 import json
-import gspread
-from google.oauth2.service_account import Credentials
+
+# Make the shared fee_core package (project root) importable from api/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fee_core import profiling, timing
+from fee_core.datastore import DataStore
+from fee_core.export import write_table
+from fee_core.row_index import record_key
+from fee_core.quota import SheetsQuota
+from fee_core.storage import GoogleSheetsBackend, create_backend
 
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 # Configuration - Use environment variables for Vercel
 SPREADSHEET_ID = os.environ.get('SPREADSHEET_ID', '19F9qbeUSWyia-oWQbIWonJccytEUArW0ZrZ7kgmB0jc')
-
-# Google Sheets connection
+CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', '60'))
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'sheets')  # sheets, excel or sqlite
+SHEETS_READS_PER_MINUTE = int(os.environ.get('SHEETS_READS_PER_MINUTE', '60'))  # Google Sheets read quota per user
+SHEETS_WRITES_PER_MINUTE = int(os.environ.get('SHEETS_WRITES_PER_MINUTE', '60'))  # Google Sheets write quota per user
+EXCEL_DB_FILE = os.environ.get('EXCEL_DB_FILE', '/tmp/students.xlsx')  # Only /tmp is writable on Vercel
+SQLITE_DB_FILE = os.environ.get('SQLITE_DB_FILE', '/tmp/students.db')
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '1000'))  # Requests slower than this go in the slow request log
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '0') == '1'  # cProfile every request, keep the slow ones
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')  # X-Profile-Token value that profiles a request and reads the profiles
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/profiles')
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '20'))  # Most recent profiles kept on disk
+
+# Google Sheets connection - kept in module globals so warm invocations reuse them.
+# gspread and google-auth are imported on first use: most requests are served
+# from the record cache, and the imports cost hundreds of ms on a cold start.
+credentials = None
 gc = None
 sheet = None
 
 def get_google_credentials():
-    """Get Google credentials from environment variable"""
+    """Get Google credentials from environment variable (parsed once per instance)"""
+    global credentials
+    if credentials is not None:
+        return credentials
     creds_json = os.environ.get('GOOGLE_CREDENTIALS')
     if creds_json:
         try:
+            from google.oauth2.service_account import Credentials
             creds_dict = json.loads(creds_json)
             scopes = [
                 'https://www.googleapis.com/auth/spreadsheets',
@@ -44,11 +68,14 @@ def get_google_credentials():
 def get_google_sheet():
     """Connect to Google Sheet and return the worksheet"""
     global gc, sheet
+    if sheet is not None:
+        return sheet
     try:
+        import gspread
         if gc is None:
-            credentials = get_google_credentials()
-            if credentials:
-                gc = gspread.authorize(credentials)
+            creds = get_google_credentials()
+            if creds:
+                gc = gspread.authorize(creds)
                 print("Connected to Google Sheets via environment credentials")
             else:
                 # Fallback to local credentials file for development
@@ -58,117 +85,45 @@ def get_google_sheet():
                 except Exception as e:
                     print(f"Failed to load local credentials: {e}")
                     return None
-        if sheet is None:
-            spreadsheet = gc.open_by_key(SPREADSHEET_ID)
-            sheet = spreadsheet.sheet1
-            print(f"Opened spreadsheet with ID: {SPREADSHEET_ID}")
+        spreadsheet = gc.open_by_key(SPREADSHEET_ID)
+        sheet = spreadsheet.sheet1
+        print(f"Opened spreadsheet with ID: {SPREADSHEET_ID}")
         return sheet
     except Exception as e:
         print(f"Error connecting to Google Sheets: {e}")
         return None
 
 
-def read_sheet_data():
-    """Read student data from Google Sheet"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return []
-        
-        all_values = worksheet.get_all_values()
-        if len(all_values) <= 1:
-            return []
-        
-        headers = all_values[0]
-        records = []
-        for row in all_values[1:]:
-            record = {}
-            for i, header in enumerate(headers):
-                record[header] = row[i] if i < len(row) else ''
-            records.append(record)
-        
-        return records
-    except Exception as e:
-        print(f"Error reading data: {e}")
-        return []
+# Active storage backend, selected by STORAGE_BACKEND
+storage = create_backend(
+    STORAGE_BACKEND,
+    get_worksheet=get_google_sheet,
+    excel_file=EXCEL_DB_FILE,
+    sqlite_file=SQLITE_DB_FILE,
+    quota=SheetsQuota(reads_per_minute=SHEETS_READS_PER_MINUTE, writes_per_minute=SHEETS_WRITES_PER_MINUTE)
+)
 
+# Record cache + row index - survives between requests while the function instance stays warm
+store = DataStore(storage, ttl=CACHE_TTL_SECONDS)
 
-def save_sheet_data(records):
-    """Save student data to Google Sheet"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return False
-        
-        # Clear existing data
-        worksheet.clear()
-        
-        # Write headers
-        headers = ['Student ID', 'Student Name', 'Father Name', 'Mobile Number', 'Month', 'Fee Status', 'Receipt Number']
-        worksheet.append_row(headers)
-        
-        # Write data rows
-        for record in records:
-            row = [
-                str(record.get('Student ID', '')),
-                str(record.get('Student Name', '')),
-                str(record.get('Father Name', '')),
-                str(record.get('Mobile Number', '')),
-                str(record.get('Month', '')),
-                str(record.get('Fee Status', '')),
-                str(record.get('Receipt Number', ''))
-            ]
-            worksheet.append_row(row)
-        
-        # Apply conditional formatting
-        try:
-            apply_conditional_formatting(worksheet)
-        except:
-            pass
-        
-        return True
-    except Exception as e:
-        print(f"Error saving data: {e}")
-        return False
+# Per-request phase timings: Server-Timing headers + histograms on /api/metrics (per function instance)
+request_metrics = timing.RequestMetrics()
+timing.instrument(app, request_metrics)
 
+# Opt-in cProfile of requests + log of slow ones (per function instance), read back through /api/profiles
+request_profiler = profiling.RequestProfiler(PROFILE_DIR, keep=PROFILE_KEEP, slow_ms=SLOW_REQUEST_MS,
+                                             always=PROFILE_REQUESTS, token=PROFILE_TOKEN)
+profiling.instrument(app, request_profiler)
 
-def apply_conditional_formatting(worksheet):
-    """Apply conditional formatting for fee status"""
-    try:
-        from gspread_formatting import ConditionalFormatRule, BooleanRule, BooleanCondition, CellFormat, Color, GridRange, get_conditional_format_rules, set_conditional_format_rules
-        
-        # Clear existing rules
-        rules = get_conditional_format_rules(worksheet)
-        rules.clear()
-        
-        # Get the range for the entire data area
-        all_values = worksheet.get_all_values()
-        num_rows = len(all_values)
-        
-        if num_rows > 1:
-            # Green for "Paid"
-            paid_rule = ConditionalFormatRule(
-                ranges=[GridRange.from_a1_range(f'A2:G{num_rows}', worksheet)],
-                booleanRule=BooleanRule(
-                    condition=BooleanCondition('CUSTOM_FORMULA', [f'=$F2="Paid"']),
-                    format=CellFormat(backgroundColor=Color(0.85, 0.95, 0.85))
-                )
-            )
-            
-            # Red for "Not Paid"
-            not_paid_rule = ConditionalFormatRule(
-                ranges=[GridRange.from_a1_range(f'A2:G{num_rows}', worksheet)],
-                booleanRule=BooleanRule(
-                    condition=BooleanCondition('CUSTOM_FORMULA', [f'=$F2="Not Paid"']),
-                    format=CellFormat(backgroundColor=Color(1.0, 0.85, 0.85))
-                )
-            )
-            
-            rules.append(paid_rule)
-            rules.append(not_paid_rule)
-            set_conditional_format_rules(worksheet, rules)
-    except Exception as e:
-        print(f"Error applying formatting: {e}")
+
+def read_sheet_data():
+    """Read student data from the storage backend (served from cache when fresh)"""
+    return store.read_all()
+
+
+def save_sheet_data(records):
+    """Save student data to storage (one batched request incl. formatting)"""
+    return store.save_all(records)
 
 
 # ===================================
@@ -181,56 +136,97 @@ def index():
 
 
 @app.route('/api/students', methods=['GET'])
+@store.conditional_get
 def get_students():
-    """Get all student records with optional filtering"""
-    records = read_sheet_data()
-    
+    """Get student records with optional filtering and pagination.
+
+    ?page=&per_page= pages in sheet order; ?cursor= (empty for the first page)
+    pages by student then month using the opaque next_cursor of the last response.
+    Without either, every matching record is returned.
+    """
     # Apply filters
     search = request.args.get('search', '').lower().strip()
     month_filter = request.args.get('month', '').strip()
     status_filter = request.args.get('status', '').strip()
+    per_page = request.args.get('per_page', 50, type=int)
+    if not per_page or per_page < 1:
+        per_page = 50
     
-    filtered = records
+    def passes_filters(record):
+        if month_filter and record.get('Month', '') != month_filter:
+            return False
+        if status_filter and record.get('Fee Status', '').lower() != status_filter.lower():
+            return False
+        return True
     
-    if search:
-        filtered = [r for r in filtered if 
-            search in str(r.get('Student Name', '')).lower() or
-            search in str(r.get('Father Name', '')).lower() or
-            search in str(r.get('Student ID', '')).lower() or
-            search in str(r.get('Mobile Number', '')).lower() or
-            search in str(r.get('Receipt Number', '')).lower()]
+    if 'cursor' in request.args:
+        predicate = None
+        if search:
+            # Walk the sorted view keeping only search-index hits
+            allowed = {record_key(r.get('Student Name'), r.get('Father Name'), r.get('Month'))
+                       for r in store.search(search)}
+            predicate = lambda r: (record_key(r.get('Student Name'), r.get('Father Name'), r.get('Month')) in allowed
+                                   and passes_filters(r))
+        elif month_filter or status_filter:
+            predicate = passes_filters
+        
+        result = store.page_sorted(request.args.get('cursor') or None, per_page, predicate)
+        if result is None:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        records, next_cursor = result
+        return jsonify({
+            'success': True,
+            'data': records,
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        })
     
-    if month_filter:
-        filtered = [r for r in filtered if r.get('Month', '') == month_filter]
+    page = request.args.get('page', type=int)
     
-    if status_filter:
-        filtered = [r for r in filtered if r.get('Fee Status', '').lower() == status_filter.lower()]
+    if page is not None and not (search or month_filter or status_filter):
+        # Unfiltered page: only A{start}:G{end} is fetched when the cache is cold
+        page = max(page, 1)
+        records, total = store.read_page((page - 1) * per_page, per_page)
+    else:
+        if search:
+            # Name, father, ID, mobile and receipt via the search index (best match first)
+            filtered = store.search(search)
+        else:
+            filtered = read_sheet_data()
+        
+        filtered = [r for r in filtered if passes_filters(r)]
+        total = len(filtered)
+        
+        if page is None:
+            return jsonify({
+                'success': True,
+                'data': filtered,
+                'total': total
+            })
+        
+        page = max(page, 1)
+        records = filtered[(page - 1) * per_page:page * per_page]
     
+    total_pages = (total + per_page - 1) // per_page
     return jsonify({
         'success': True,
-        'data': filtered,
-        'total': len(filtered)
+        'data': records,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': total_pages,
+        'has_next': page < total_pages,
+        'has_prev': page > 1
     })
 
 
 @app.route('/api/summary', methods=['GET'])
+@store.conditional_get
 def get_summary():
     """Get fee collection summary statistics"""
-    records = read_sheet_data()
-    
-    total_records = len(records)
-    paid_count = sum(1 for r in records if str(r.get('Fee Status', '')).lower() == 'paid')
-    unpaid_count = total_records - paid_count
-    
-    # Get unique students
-    unique_students = set()
-    unique_months = set()
-    for r in records:
-        key = f"{r.get('Student Name', '')}_{r.get('Father Name', '')}"
-        unique_students.add(key)
-        month = r.get('Month', '')
-        if month:
-            unique_months.add(month)
+    # Counters are maintained incrementally by the store
+    summary = store.summary()
     
     # Sort months
     month_order = ['January', 'February', 'March', 'April', 'May', 'June',
@@ -243,16 +239,17 @@ def get_summary():
         month_idx = month_order.index(month_name) if month_name in month_order else 0
         return (year, month_idx)
     
-    sorted_months = sorted(unique_months, key=month_sort_key)
+    sorted_months = sorted(summary['months'], key=month_sort_key)
     
     return jsonify({
         'success': True,
         'summary': {
-            'total': total_records,
-            'total_students': len(unique_students),
-            'paid': paid_count,
-            'unpaid': unpaid_count,
-            'months': sorted_months
+            'total': summary['total'],
+            'total_students': summary['total_students'],
+            'paid': summary['paid'],
+            'unpaid': summary['unpaid'],
+            'months': sorted_months,
+            'by_month': summary['by_month']
         }
     })
 
@@ -276,14 +273,9 @@ def add_record():
     if not all([student_name, month]):
         return jsonify({'success': False, 'error': 'Student name and month are required'}), 400
     
-    records = read_sheet_data()
-    
-    # Check for duplicate
-    for r in records:
-        if (str(r.get('Student Name', '')) == student_name and 
-            str(r.get('Father Name', '')) == father_name and 
-            str(r.get('Month', '')).lower() == month.lower()):
-            return jsonify({'success': False, 'error': 'Record already exists for this student and month'}), 400
+    # Check for duplicate (row index lookup)
+    if store.find_row(student_name, father_name, month):
+        return jsonify({'success': False, 'error': 'Record already exists for this student and month'}), 400
     
     # Add new record
     new_record = {
@@ -296,9 +288,8 @@ def add_record():
         'Receipt Number': receipt_number
     }
     
-    records.append(new_record)
-    
-    if save_sheet_data(records):
+    # Append just this row
+    if store.append_rows([new_record]):
         return jsonify({'success': True, 'message': 'Record added successfully'})
     else:
         return jsonify({'success': False, 'error': 'Failed to save record'}), 500
@@ -321,22 +312,17 @@ def update_record():
     if not all([student_name, month]):
         return jsonify({'success': False, 'error': 'Student name and month are required'}), 400
     
-    records = read_sheet_data()
+    row_number = store.find_row(student_name, father_name, month)
+    record = store.get_record(row_number) if row_number else None
     
-    found = False
-    for r in records:
-        if (str(r.get('Student Name', '')) == student_name and 
-            str(r.get('Father Name', '')) == father_name and 
-            str(r.get('Month', '')) == month):
-            r['Fee Status'] = fee_status
-            r['Receipt Number'] = receipt_number
-            found = True
-            break
-    
-    if not found:
+    if not record:
         return jsonify({'success': False, 'error': 'Record not found'}), 404
     
-    if save_sheet_data(records):
+    record['Fee Status'] = fee_status
+    record['Receipt Number'] = receipt_number
+    
+    # Write only this row (A{n}:G{n})
+    if store.update_row(row_number, record):
         return jsonify({'success': True, 'message': 'Record updated successfully'})
     else:
         return jsonify({'success': False, 'error': 'Failed to update record'}), 500
@@ -357,19 +343,13 @@ def delete_record():
     if not all([student_name, month]):
         return jsonify({'success': False, 'error': 'Student name and month are required'}), 400
     
-    records = read_sheet_data()
-    
-    original_count = len(records)
-    records = [r for r in records if not (
-        str(r.get('Student Name', '')) == student_name and 
-        str(r.get('Father Name', '')) == father_name and 
-        str(r.get('Month', '')) == month
-    )]
+    row_number = store.find_row(student_name, father_name, month)
     
-    if len(records) == original_count:
+    if not row_number:
         return jsonify({'success': False, 'error': 'Record not found'}), 404
     
-    if save_sheet_data(records):
+    # Delete only this row
+    if store.delete_row(row_number):
         return jsonify({'success': True, 'message': 'Record deleted successfully'})
     else:
         return jsonify({'success': False, 'error': 'Failed to delete record'}), 500
@@ -388,18 +368,9 @@ def bulk_add_records():
     if not new_records or len(new_records) == 0:
         return jsonify({'success': False, 'error': 'Empty records list'}), 400
     
-    existing_records = read_sheet_data()
-    
-    # Build lookup sets for duplicate checking
-    existing_student_months = set()
-    existing_receipts = set()
-    
-    for record in existing_records:
-        key = f"{record.get('Student Name', '')}_{record.get('Father Name', '')}_{record.get('Month', '').lower()}"
-        existing_student_months.add(key)
-        receipt = str(record.get('Receipt Number', '')).lower().strip()
-        if receipt:
-            existing_receipts.add(receipt)
+    # Existing records are checked through the row index; this set catches duplicates within the request
+    new_student_months = set()
+    records_to_add = []
     
     added_count = 0
     skipped_count = 0
@@ -418,8 +389,8 @@ def bulk_add_records():
             continue
         
         # Check for duplicate student+month
-        key = f"{student_name}_{father_name}_{month.lower()}"
-        if key in existing_student_months:
+        key = record_key(student_name, father_name, month)
+        if key in new_student_months or store.find_row(student_name, father_name, month):
             skipped_count += 1
             continue
         
@@ -434,12 +405,13 @@ def bulk_add_records():
             'Receipt Number': receipt_number
         }
         
-        existing_records.append(new_record)
-        existing_student_months.add(key)
+        records_to_add.append(new_record)
+        new_student_months.add(key)
         added_count += 1
     
     if added_count > 0:
-        if save_sheet_data(existing_records):
+        # One batch append instead of rewriting the sheet
+        if store.append_rows(records_to_add):
             return jsonify({
                 'success': True,
                 'added': added_count,
@@ -458,52 +430,45 @@ def bulk_add_records():
 
 
 @app.route('/api/unique-students', methods=['GET'])
+@store.conditional_get
 def get_unique_students():
     """Get list of unique students for bulk add feature"""
-    records = read_sheet_data()
-    
-    unique_students = {}
-    for r in records:
-        key = f"{r.get('Student Name', '')}_{r.get('Father Name', '')}"
-        if key not in unique_students:
-            unique_students[key] = {
-                'name': r.get('Student Name', ''),
-                'father': r.get('Father Name', ''),
-                'student_id': r.get('Student ID', ''),
-                'mobile': r.get('Mobile Number', '')
-            }
-    
     return jsonify({
         'success': True,
-        'students': list(unique_students.values())
+        'students': [{
+            'name': student['name'],
+            'father': student['father'],
+            'student_id': student['student_id'],
+            'mobile': student['mobile']
+        } for student in store.unique_students()]
     })
 
 
+@app.route('/api/student-profile', methods=['GET'])
 @app.route('/api/student-profile/<path:student_key>', methods=['GET'])
-def get_student_profile(student_key):
-    """Get complete student profile with all payment records"""
-    records = read_sheet_data()
-    
-    parts = student_key.split('_')
-    student_name = parts[0] if len(parts) > 0 else ''
-    father_name = parts[1] if len(parts) > 1 else ''
-    
-    student_records = [r for r in records if 
-        str(r.get('Student Name', '')) == str(student_name) and
-        str(r.get('Father Name', '')) == str(father_name)]
+def get_student_profile(student_key=None):
+    """Get complete student profile with all payment records (?name=&father=, or a legacy name_father key)"""
+    if student_key is None:
+        number = store.find_student(request.args.get('name', ''), request.args.get('father', ''))
+    else:
+        number = store.find_student(student_key)
     
-    if not student_records:
+    # Only this student's rows are read, via the student table
+    result = store.student_records(number) if number is not None else None
+    if result is None:
         return jsonify({'success': False, 'error': 'Student not found'}), 404
     
-    first_record = student_records[0]
+    student, student_records = result
     total_months = len(student_records)
     paid_months = sum(1 for r in student_records if str(r.get('Fee Status', '')).lower() == 'paid')
     
     return jsonify({
         'success': True,
         'student': {
-            'name': first_record.get('Student Name', ''),
-            'father_name': first_record.get('Father Name', ''),
+            'name': student['name'],
+            'father_name': student['father'],
+            'student_id': student['student_id'],
+            'mobile_number': student['mobile'],
             'total_months': total_months,
             'paid_months': paid_months,
             'unpaid_months': total_months - paid_months
@@ -530,22 +495,19 @@ def update_student_profile():
     if not new_name:
         return jsonify({'success': False, 'error': 'Student name is required'}), 400
     
-    records = read_sheet_data()
-    updated_count = 0
-    
-    for record in records:
-        if (str(record.get('Student Name', '')) == original_name and 
-            str(record.get('Father Name', '')) == original_father):
-            record['Student ID'] = new_student_id
-            record['Student Name'] = new_name
-            record['Father Name'] = new_father
-            record['Mobile Number'] = new_mobile
-            updated_count += 1
+    # Only this student's A:D cells are written, in one batch update
+    number = store.find_student(original_name, original_father)
+    updated_count = store.update_student(number, {
+        'Student ID': new_student_id,
+        'Student Name': new_name,
+        'Father Name': new_father,
+        'Mobile Number': new_mobile
+    }) if number is not None else 0
     
     if updated_count == 0:
         return jsonify({'success': False, 'error': 'No records found for this student'}), 404
     
-    if save_sheet_data(records):
+    if updated_count is not None:
         return jsonify({
             'success': True,
             'updated': updated_count,
@@ -570,12 +532,10 @@ def download_data():
     if not records:
         return jsonify({'success': False, 'error': 'No records to download'}), 404
     
-    df = pd.DataFrame(records)
-    
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Fee Records')
-    
+    with timing.phase('serialize'):
+        write_table(records, output)
+    timing.count_rows('exported', len(records))
     output.seek(0)
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -601,25 +561,65 @@ def debug_info():
     error_msg = None
     
     try:
-        worksheet = get_google_sheet()
-        if worksheet:
-            connection_status = "Connected"
-            all_values = worksheet.get_all_values()
-            record_count = max(0, len(all_values) - 1)
+        if not isinstance(storage, GoogleSheetsBackend):
+            connection_status = f"Local {storage.name} storage"
+            record_count = len(storage.read_all())
         else:
-            connection_status = "Failed - worksheet is None"
+            worksheet = get_google_sheet()
+            if worksheet:
+                connection_status = "Connected"
+                record_count = len(storage.read_all())
+            else:
+                connection_status = "Failed - worksheet is None"
     except Exception as e:
         connection_status = "Failed"
         error_msg = str(e)
     
     return jsonify({
+        'storage_backend': storage.name,
         'has_google_credentials': has_creds,
         'spreadsheet_id': sheet_id,
         'connection_status': connection_status,
         'record_count': record_count,
+        'cache': store.stats(),
         'error': error_msg
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request latency, phase and Sheets call metrics in Prometheus text format"""
+    return app.response_class(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """Saved request profiles and the slow request log (needs X-Profile-Token)"""
+    if not request_profiler.authorized(request.headers):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    return jsonify({
+        'success': True,
+        'profiles': request_profiler.profiles(),
+        'slow_requests': request_profiler.slow_requests(),
+        'stats': request_profiler.stats
+    })
+
+
+@app.route('/api/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Top functions of a saved profile as text, or the raw pstats file with ?format=prof"""
+    if not request_profiler.authorized(request.headers):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    if request.args.get('format') == 'prof':
+        path = request_profiler.profile_path(name)
+        if path is None:
+            return jsonify({'success': False, 'error': 'Profile not found'}), 404
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
+    report = request_profiler.report(name, sort=request.args.get('sort', 'cumulative'))
+    if report is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    return app.response_class(report, mimetype='text/plain')
+
+
 # For Vercel
 app.debug = False
@@ -5,19 +5,44 @@ A Flask application to manage student fee records using Google Sheets as databas
 
 from flask import Flask, render_template, request, jsonify, send_file
 from werkzeug.utils import secure_filename
-import pandas as pd
+import atexit
 import os
+import tempfile
 from datetime import datetime
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from io import BytesIO
 import gspread
+from fee_core import profiling, timing
+from fee_core.datastore import DataStore
+from fee_core.export import write_pivot
+from fee_core.importer import read_upload
+from fee_core.jobs import ImportJobs
+from fee_core.receipts import ReceiptSequence
+from fee_core.row_index import record_key
+from fee_core.quota import SheetsQuota
+from fee_core.storage import create_backend
+from fee_core.write_queue import WriteBehindQueue
 
 app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', '64')) * 1024 * 1024  # Uploads are spooled to disk
 
 # Configuration
 DATA_FOLDER = 'data'
 CREDENTIALS_FILE = 'credentials.json'  # Your Google service account JSON
 SPREADSHEET_ID = '19F9qbeUSWyia-oWQbIWonJccytEUArW0ZrZ7kgmB0jc'  # Your Google Sheet ID
+CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', '60'))  # How long reads are served from memory
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'sheets')  # sheets, excel or sqlite
+SHEETS_READS_PER_MINUTE = int(os.environ.get('SHEETS_READS_PER_MINUTE', '60'))  # Google Sheets read quota per user
+SHEETS_WRITES_PER_MINUTE = int(os.environ.get('SHEETS_WRITES_PER_MINUTE', '60'))  # Google Sheets write quota per user
+EXCEL_DB_FILE = os.environ.get('EXCEL_DB_FILE', os.path.join(DATA_FOLDER, 'students.xlsx'))  # Used when STORAGE_BACKEND=excel
+SQLITE_DB_FILE = os.environ.get('SQLITE_DB_FILE', os.path.join(DATA_FOLDER, 'students.db'))  # Used when STORAGE_BACKEND=sqlite
+WRITE_BEHIND_MS = int(os.environ.get('WRITE_BEHIND_MS', '0'))  # Opt-in batch window for row writes, 0 = write immediately
+WRITE_JOURNAL_FILE = os.path.join(DATA_FOLDER, 'pending_writes.jsonl')  # Per-process journals (pending_writes.<pid>.jsonl) survive a restart
+IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS', '1000'))  # Rows per append in streaming uploads
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '1000'))  # Requests slower than this go in the slow request log
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '0') == '1'  # cProfile every request, keep the slow ones
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')  # X-Profile-Token value that profiles a request and reads the profiles
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(DATA_FOLDER, 'profiles'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '20'))  # Most recent profiles kept on disk
 
 # Ensure data folder exists
 os.makedirs(DATA_FOLDER, exist_ok=True)
@@ -41,184 +66,83 @@ def get_google_sheet():
         return None
 
 
+# Active storage backend, selected by STORAGE_BACKEND
+storage = create_backend(
+    STORAGE_BACKEND,
+    get_worksheet=get_google_sheet,
+    excel_file=EXCEL_DB_FILE,
+    sqlite_file=SQLITE_DB_FILE,
+    quota=SheetsQuota(reads_per_minute=SHEETS_READS_PER_MINUTE, writes_per_minute=SHEETS_WRITES_PER_MINUTE)
+)
+
+# Row updates and appends are batched for WRITE_BEHIND_MS and journaled locally until flushed
+write_queue = None
+if WRITE_BEHIND_MS > 0:
+    write_queue = WriteBehindQueue(storage, window=WRITE_BEHIND_MS / 1000, journal_path=WRITE_JOURNAL_FILE)
+    atexit.register(write_queue.flush)
+
+# Shared record cache + row index - reads are served from memory until expiry, writes are applied in place
+store = DataStore(storage, ttl=CACHE_TTL_SECONDS, write_queue=write_queue)
+
+# Receipt numbers come from a counter persisted in storage
+receipt_sequence = ReceiptSequence(store)
+
+# Streaming uploads run in the background; progress is polled by job ID
+import_jobs = ImportJobs()
+
+# Per-request phase timings: Server-Timing headers + histograms on /api/metrics
+request_metrics = timing.RequestMetrics()
+timing.instrument(app, request_metrics)
+
+# Opt-in cProfile of requests + log of slow ones, read back through /api/profiles
+request_profiler = profiling.RequestProfiler(PROFILE_DIR, keep=PROFILE_KEEP, slow_ms=SLOW_REQUEST_MS,
+                                             always=PROFILE_REQUESTS, token=PROFILE_TOKEN)
+profiling.instrument(app, request_profiler)
+
+
 def read_sheet_data():
-    """Read student data from Google Sheet"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return []
-        
-        # Get all records as list of dicts
-        records = worksheet.get_all_records()
-        
-        # Convert to proper format
-        for record in records:
-            for key in record:
-                if record[key] is None:
-                    record[key] = ''
-                else:
-                    record[key] = str(record[key])
-        
-        return records
-    except Exception as e:
-        print(f"Error reading Google Sheet: {e}")
-        return []
+    """Read student data from the storage backend (served from cache when fresh)"""
+    return store.read_all()
 
 
 def save_sheet_data(records):
-    """Save all data to Google Sheet (clear and rewrite) - USE SPARINGLY!"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return False
-        
-        # Clear the sheet
-        worksheet.clear()
-        
-        if not records:
-            # Write header only
-            worksheet.append_row(['Student ID', 'Student Name', 'Father Name', 'Mobile Number', 'Month', 'Fee Status', 'Receipt Number'])
-            return True
-        
-        # Write header
-        headers = ['Student ID', 'Student Name', 'Father Name', 'Mobile Number', 'Month', 'Fee Status', 'Receipt Number']
-        
-        # Build all rows at once
-        all_rows = [headers]
-        for record in records:
-            row = [
-                str(record.get('Student ID', '')),
-                str(record.get('Student Name', '')),
-                str(record.get('Father Name', '')),
-                str(record.get('Mobile Number', '')),
-                str(record.get('Month', '')),
-                str(record.get('Fee Status', '')),
-                str(record.get('Receipt Number', ''))
-            ]
-            all_rows.append(row)
-        
-        # BATCH WRITE - Write all rows at once (MUCH FASTER!)
-        worksheet.update('A1', all_rows)
-        
-        return True
-    except Exception as e:
-        print(f"Error saving to Google Sheet: {e}")
-        return False
+    """Save all data to storage (clear and rewrite) - USE SPARINGLY!"""
+    return store.save_all(records)
 
 
 def update_row_in_sheet(row_number, record):
-    """Update a specific row in Google Sheet (FAST - single API call)"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return False
-        
-        row = [
-            str(record.get('Student ID', '')),
-            str(record.get('Student Name', '')),
-            str(record.get('Father Name', '')),
-            str(record.get('Mobile Number', '')),
-            str(record.get('Month', '')),
-            str(record.get('Fee Status', '')),
-            str(record.get('Receipt Number', ''))
-        ]
-        
-        # Update only the specific row (row_number is 1-indexed, +1 for header)
-        worksheet.update(f'A{row_number}:G{row_number}', [row])
-        return True
-    except Exception as e:
-        print(f"Error updating row in Google Sheet: {e}")
-        return False
+    """Update a specific row in storage (FAST - single API call)"""
+    return store.update_row(row_number, record)
 
 
 def delete_row_in_sheet(row_number):
-    """Delete a specific row in Google Sheet (FAST - single API call)"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return False
-        
-        worksheet.delete_rows(row_number)
-        return True
-    except Exception as e:
-        print(f"Error deleting row in Google Sheet: {e}")
-        return False
+    """Delete a specific row in storage (FAST - single API call)"""
+    return store.delete_row(row_number)
 
 
 def append_rows_to_sheet(records):
-    """Append multiple records to Google Sheet in one batch (FAST)"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return False
-        
-        rows = []
-        for record in records:
-            row = [
-                str(record.get('Student ID', '')),
-                str(record.get('Student Name', '')),
-                str(record.get('Father Name', '')),
-                str(record.get('Mobile Number', '')),
-                str(record.get('Month', '')),
-                str(record.get('Fee Status', '')),
-                str(record.get('Receipt Number', ''))
-            ]
-            rows.append(row)
-        
-        # BATCH APPEND - Much faster than individual appends
-        worksheet.append_rows(rows)
-        return True
-    except Exception as e:
-        print(f"Error appending rows to Google Sheet: {e}")
-        return False
+    """Append multiple records to storage in one batch (FAST)"""
+    return store.append_rows(records)
 
 
 def find_row_number(student_name, father_name, month):
     """Find the row number for a specific record (1-indexed, includes header)"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return None
-        
-        all_values = worksheet.get_all_values()
-        
-        for idx, row in enumerate(all_values):
-            if idx == 0:  # Skip header
-                continue
-            # Row format: [Student ID, Student Name, Father Name, Mobile Number, Month, Fee Status, Receipt Number]
-            if len(row) >= 5:
-                if (str(row[1]).strip() == str(student_name).strip() and 
-                    str(row[2]).strip() == str(father_name).strip() and
-                    str(row[4]).strip().lower() == str(month).strip().lower()):
-                    return idx + 1  # Return 1-indexed row number
-        
-        return None
-    except Exception as e:
-        print(f"Error finding row: {e}")
-        return None
+    return store.find_row(student_name, father_name, month)
+
+
+def find_receipt_row(receipt_number):
+    """Find the row number already using a receipt number, or None"""
+    return store.find_receipt_row(receipt_number)
+
+
+def get_record_at(row_number):
+    """Current record on a sheet row (from cache when possible)"""
+    return store.get_record(row_number)
 
 
 def append_to_sheet(record):
-    """Append a single record to Google Sheet"""
-    try:
-        worksheet = get_google_sheet()
-        if worksheet is None:
-            return False
-        
-        row = [
-            str(record.get('Student ID', '')),
-            str(record.get('Student Name', '')),
-            str(record.get('Father Name', '')),
-            str(record.get('Mobile Number', '')),
-            str(record.get('Month', '')),
-            str(record.get('Fee Status', '')),
-            str(record.get('Receipt Number', ''))
-        ]
-        worksheet.append_row(row)
-        return True
-    except Exception as e:
-        print(f"Error appending to Google Sheet: {e}")
-        return False
+    """Append a single record to storage"""
+    return append_rows_to_sheet([record])
 
 
 # Alias functions for compatibility with existing code
@@ -232,9 +156,14 @@ def save_excel_data(records):
     return save_sheet_data(records)
 
 
+def id_key(record):
+    """Identity of a fee record: student + father + month"""
+    return record_key(record.get('Student Name'), record.get('Father Name'), record.get('Month'))
+
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'xlsx', 'xls'}
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'xlsx', 'xls', 'csv'}
 
 
 @app.route('/')
@@ -244,19 +173,24 @@ def index():
 
 
 @app.route('/api/students', methods=['GET'])
+@store.conditional_get
 def get_students():
-    """Get all student records with optional pagination"""
+    """Get all student records with optional pagination.
+
+    ?page=&per_page= pages in sheet order; ?cursor= (empty for the first page)
+    pages by student then month using the opaque next_cursor of the last response.
+    """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
     
-    records = read_excel_data()
-    total = len(records)
+    if 'cursor' in request.args:
+        return cursor_page_response(request.args.get('cursor'), per_page, include_total=True)
     
     # If pagination is requested
     if page and per_page:
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_records = records[start:end]
+        page = max(page, 1)
+        # Only this page is copied (or fetched from storage when the cache is cold)
+        paginated_records, total = store.read_page((page - 1) * per_page, per_page)
         total_pages = (total + per_page - 1) // per_page  # Ceiling division
         
         return jsonify({
@@ -270,15 +204,58 @@ def get_students():
             'has_prev': page > 1
         })
     
+    records = read_excel_data()
+    
     # Return all records (for backward compatibility)
     return jsonify({
         'success': True,
         'data': records,
-        'total': total
+        'total': len(records)
     })
 
 
+def record_filter(month, status, allowed_keys=None):
+    """Predicate for the month/status filters of /api/search"""
+    def match(record):
+        if allowed_keys is not None and id_key(record) not in allowed_keys:
+            return False
+        
+        if month and month not in str(record.get('Month', '')).lower():
+            return False
+        
+        if status:
+            record_status = str(record.get('Fee Status', '')).lower()
+            if status == 'paid' and record_status != 'paid':
+                return False
+            elif status == 'unpaid' and record_status not in ['not paid', 'unpaid', 'pending']:
+                return False
+        
+        return True
+    return match
+
+
+def cursor_page_response(cursor, per_page, predicate=None, include_total=False):
+    """One keyset page (student, then month in calendar order)"""
+    per_page = per_page if per_page and per_page > 0 else 50
+    result = store.page_sorted(cursor or None, per_page, predicate)
+    if result is None:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    records, next_cursor = result
+    response = {
+        'success': True,
+        'data': records,
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+    if include_total:
+        response['total'] = store.summary()['total']
+    return jsonify(response)
+
+
 @app.route('/api/search', methods=['GET'])
+@store.conditional_get
 def search_students():
     """Search students by name, father name, or receipt number with pagination"""
     query = request.args.get('query', '').strip().lower()
@@ -288,45 +265,35 @@ def search_students():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
     
-    records = read_excel_data()
-    filtered = []
-    
-    for record in records:
-        # Apply filters
-        match = True
-        
-        # If searching by receipt number specifically
+    # Text matching goes through the search index (ranked, best match first)
+    if query:
+        records = store.search(query, ['Student Name', 'Father Name', 'Receipt Number'])
         if receipt:
-            receipt_match = receipt in str(record.get('Receipt Number', '')).lower()
-            if not receipt_match:
-                match = False
-        
-        if query and match:
-            name_match = query in str(record.get('Student Name', '')).lower()
-            father_match = query in str(record.get('Father Name', '')).lower()
-            # Also check if query matches receipt number
-            receipt_query_match = query in str(record.get('Receipt Number', '')).lower()
-            if not (name_match or father_match or receipt_query_match):
-                match = False
-        
-        if month and match:
-            if month not in str(record.get('Month', '')).lower():
-                match = False
-        
-        if status and match:
-            record_status = str(record.get('Fee Status', '')).lower()
-            if status == 'paid' and record_status != 'paid':
-                match = False
-            elif status == 'unpaid' and record_status not in ['not paid', 'unpaid', 'pending']:
-                match = False
-        
-        if match:
-            filtered.append(record)
+            # Searching by receipt number specifically as well
+            receipt_rows = {id_key(r) for r in store.search(receipt, ['Receipt Number'])}
+            records = [r for r in records if id_key(r) in receipt_rows]
+    elif receipt:
+        records = store.search(receipt, ['Receipt Number'])
+    else:
+        records = None
+    
+    if 'cursor' in request.args:
+        # Keyset pages walk the sorted view, keeping only index hits that pass the filters
+        allowed_keys = {id_key(r) for r in records} if records is not None else None
+        predicate = record_filter(month, status, allowed_keys) if (allowed_keys is not None or month or status) else None
+        return cursor_page_response(request.args.get('cursor'), per_page, predicate)
+    
+    if records is None:
+        records = read_excel_data()
+    
+    match = record_filter(month, status)
+    filtered = [record for record in records if match(record)]
     
     total = len(filtered)
     
     # Apply pagination
     if page and per_page:
+        page = max(page, 1)
         start = (page - 1) * per_page
         end = start + per_page
         paginated = filtered[start:end]
@@ -352,7 +319,11 @@ def search_students():
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
-    """Upload a new Excel file"""
+    """Upload a new Excel file.
+
+    mode=stream appends the file in the background (skipping duplicates) and
+    returns a job ID to poll; otherwise the file replaces all records.
+    """
     if 'file' not in request.files:
         return jsonify({'success': False, 'error': 'No file provided'}), 400
     
@@ -362,77 +333,40 @@ def upload_file():
         return jsonify({'success': False, 'error': 'No file selected'}), 400
     
     if not allowed_file(file.filename):
-        return jsonify({'success': False, 'error': 'Invalid file type. Please upload an Excel file (.xlsx or .xls)'}), 400
+        return jsonify({'success': False, 'error': 'Invalid file type. Please upload an Excel or CSV file (.xlsx, .xls or .csv)'}), 400
+    
+    if (request.form.get('mode') or request.args.get('mode')) == 'stream':
+        # Spool to a temp file and read it lazily in the background
+        suffix = os.path.splitext(secure_filename(file.filename))[1].lower()
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix='upload_')
+        os.close(fd)
+        try:
+            file.save(path)
+        except Exception as e:
+            print(f"Upload error: {e}")
+            os.remove(path)
+            return jsonify({'success': False, 'error': 'Failed to receive file'}), 500
+        
+        job = import_jobs.start(store, path, file.filename, chunk_rows=IMPORT_CHUNK_ROWS)
+        return jsonify({
+            'success': True,
+            'message': 'Import started',
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 202
     
     try:
-        # Read the uploaded file first to validate it
-        df = pd.read_excel(file)
-        
-        # Convert all column names to strings first (in case any are datetime objects)
-        df.columns = [str(col) if not isinstance(col, str) else col for col in df.columns]
-        
-        # Check if this is a horizontal format (months as columns)
-        # Horizontal format has columns like: Student Name, Father Name, Jan-26, Dec-25, etc.
-        # Vertical format has columns like: Student Name, Father Name, Month, Fee Status, Receipt Number
+        # Vertical (Month / Fee Status columns) or horizontal (months as columns) layout
+        with timing.phase('parse'):
+            records = read_upload(file)
+        timing.count_rows('parsed', len(records))
         
-        required_vertical_cols = ['Month', 'Fee Status', 'Receipt Number']
-        has_vertical_format = any(col.lower().strip() in ['month', 'fee status', 'receipt number'] 
-                                  for col in df.columns)
-        
-        if not has_vertical_format:
-            # This is horizontal format - convert to vertical
-            df = convert_horizontal_to_vertical(df)
-        else:
-            # Standard vertical format processing
-            column_mapping = {}
-            standard_columns = {
-                'student id': 'Student ID',
-                'id': 'Student ID',
-                'roll no': 'Student ID',
-                'student name': 'Student Name',
-                'name': 'Student Name',
-                'father name': 'Father Name',
-                'father\'s name': 'Father Name',
-                'father': 'Father Name',
-                'mobile': 'Mobile Number',
-                'mobile number': 'Mobile Number',
-                'phone': 'Mobile Number',
-                'phone number': 'Mobile Number',
-                'contact': 'Mobile Number',
-                'month': 'Month',
-                'fee status': 'Fee Status',
-                'status': 'Fee Status',
-                'receipt number': 'Receipt Number',
-                'receipt': 'Receipt Number',
-                'receipt no': 'Receipt Number'
-            }
-            
-            for actual_col in df.columns:
-                col_lower = str(actual_col).lower().strip()
-                if col_lower in standard_columns:
-                    column_mapping[actual_col] = standard_columns[col_lower]
-            
-            df = df.rename(columns=column_mapping)
-            
-            required_columns = ['Student ID', 'Student Name', 'Father Name', 'Mobile Number', 'Month', 'Fee Status', 'Receipt Number']
-            for col in required_columns:
-                if col not in df.columns:
-                    df[col] = ''
-            
-            df = df[required_columns]
-        
-        # Fill NaN values
-        df = df.fillna('')
-        
-        # Convert all values to strings, handling datetime objects
-        for col in df.columns:
-            df[col] = df[col].apply(lambda x: x.strftime('%B %Y') if hasattr(x, 'strftime') else (str(x) if x != '' and pd.notna(x) else ''))
-        
-        # Save the cleaned data
-        df.to_excel(EXCEL_FILE, index=False)
+        if not records:
+            return jsonify({'success': False, 'error': 'No records found in the uploaded file'}), 400
         
-        # Get the record count
-        records = df.to_dict('records')
+        # Replace the data in the active storage backend in one batch
+        if not save_sheet_data(records):
+            return jsonify({'success': False, 'error': 'Failed to save uploaded records'}), 500
         
         return jsonify({
             'success': True,
@@ -444,103 +378,13 @@ def upload_file():
         return jsonify({'success': False, 'error': f'Failed to process Excel file: {str(e)}'}), 500
 
 
-def convert_horizontal_to_vertical(df):
-    """
-    Convert horizontal Excel format (months as columns) to vertical format.
-    Input format: Student Name, Father Name, Jan-26, Dec-25, Nov-25...
-    Output format: Student Name, Father Name, Month, Fee Status, Receipt Number
-    """
-    import re
-    
-    # Identify student info columns and month columns
-    student_cols = []
-    month_cols = []
-    
-    # Month patterns to detect
-    month_patterns = [
-        r'^(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[-/]?\d{2,4}$',
-        r'^(january|february|march|april|may|june|july|august|september|october|november|december)\s*\d{2,4}$',
-        r'^\d{1,2}[-/]\d{2,4}$'
-    ]
-    
-    month_abbr_to_full = {
-        'jan': 'January', 'feb': 'February', 'mar': 'March', 'apr': 'April',
-        'may': 'May', 'jun': 'June', 'jul': 'July', 'aug': 'August',
-        'sep': 'September', 'oct': 'October', 'nov': 'November', 'dec': 'December'
-    }
-    
-    for col in df.columns:
-        col_str = str(col).lower().strip()
-        is_month = False
-        for pattern in month_patterns:
-            if re.match(pattern, col_str):
-                is_month = True
-                break
-        
-        if is_month:
-            month_cols.append(col)
-        else:
-            student_cols.append(col)
-    
-    # Map student columns to standard names
-    col_mapping = {}
-    for col in student_cols:
-        col_lower = str(col).lower().strip()
-        if 'name' in col_lower and 'father' not in col_lower:
-            col_mapping[col] = 'Student Name'
-        elif 'father' in col_lower:
-            col_mapping[col] = 'Father Name'
-    
-    # Build vertical records
-    records = []
-    for _, row in df.iterrows():
-        student_name = ''
-        father_name = ''
-        
-        for col in student_cols:
-            if col in col_mapping:
-                val = str(row[col]) if pd.notna(row[col]) else ''
-                if col_mapping[col] == 'Student Name':
-                    student_name = val
-                elif col_mapping[col] == 'Father Name':
-                    father_name = val
-        
-        # Process each month column
-        for month_col in month_cols:
-            cell_value = str(row[month_col]) if pd.notna(row[month_col]) else ''
-            
-            # Parse the month column name (e.g., "Jan-26" -> "January 2026")
-            month_str = str(month_col).strip()
-            month_match = re.match(r'^(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[-/]?(\d{2,4})$', 
-                                   month_str.lower())
-            if month_match:
-                month_abbr = month_match.group(1)
-                year = month_match.group(2)
-                if len(year) == 2:
-                    year = '20' + year
-                month_full = f"{month_abbr_to_full[month_abbr]} {year}"
-            else:
-                month_full = month_str
-            
-            # Parse cell value: "Paid (RCP-011-JAN26)" or "Not Paid"
-            if cell_value.lower().startswith('paid'):
-                fee_status = 'Paid'
-                # Extract receipt number from parentheses
-                receipt_match = re.search(r'\(([^)]+)\)', cell_value)
-                receipt_number = receipt_match.group(1) if receipt_match else ''
-            else:
-                fee_status = 'Not Paid'
-                receipt_number = ''
-            
-            records.append({
-                'Student Name': student_name,
-                'Father Name': father_name,
-                'Month': month_full,
-                'Fee Status': fee_status,
-                'Receipt Number': receipt_number
-            })
-    
-    return pd.DataFrame(records)
+@app.route('/api/upload/<job_id>', methods=['GET'])
+def upload_progress(job_id):
+    """Progress of a streaming upload"""
+    job = import_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Import job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
 
 
 @app.route('/api/quick-mark-paid', methods=['POST'])
@@ -558,40 +402,22 @@ def quick_mark_paid():
     if not all([student_name, month]):
         return jsonify({'success': False, 'error': 'Missing required fields'}), 400
     
-    records = read_excel_data()
-    
-    # Generate auto receipt number: RCP-MMYY-XXX
-    from datetime import datetime
-    now = datetime.now()
-    prefix = f"RCP-{now.strftime('%m%y')}-"
-    
-    # Find the highest receipt number with this prefix
-    max_num = 0
-    for record in records:
-        receipt = str(record.get('Receipt Number', ''))
-        if receipt.startswith(prefix):
-            try:
-                num = int(receipt.replace(prefix, ''))
-                max_num = max(max_num, num)
-            except:
-                pass
-    
-    receipt_number = f"{prefix}{str(max_num + 1).zfill(3)}"
-    
     # Find the row number for smart update
     row_number = find_row_number(student_name, father_name, month)
     
     if row_number:
-        # Find the existing record to preserve other fields
-        updated_record = None
-        for record in records:
-            if (str(record.get('Student Name', '')) == str(student_name) and 
-                str(record.get('Father Name', '')) == str(father_name) and
-                str(record.get('Month', '')).lower() == str(month).lower()):
-                updated_record = record.copy()
-                updated_record['Fee Status'] = 'Paid'
-                updated_record['Receipt Number'] = receipt_number
-                break
+        # Generate auto receipt number: RCP-MMYY-XXX (atomic counter, no scan)
+        try:
+            receipt_number = receipt_sequence.next()
+        except Exception as e:
+            print(f"Error allocating receipt number: {e}")
+            return jsonify({'success': False, 'error': 'Failed to generate receipt number'}), 500
+        
+        # Existing record from the cache, to preserve other fields
+        updated_record = get_record_at(row_number)
+        if updated_record:
+            updated_record['Fee Status'] = 'Paid'
+            updated_record['Receipt Number'] = receipt_number
         
         if updated_record and update_row_in_sheet(row_number, updated_record):
             return jsonify({
@@ -606,45 +432,13 @@ def quick_mark_paid():
 
 
 @app.route('/api/defaulters', methods=['GET'])
+@store.conditional_get
 def get_defaulters():
     """Get list of students with pending fees for 1+ months"""
     min_months = request.args.get('min_months', 1, type=int)
     
-    records = read_excel_data()
-    
-    # Group unpaid records by student (name + father name)
-    student_unpaid = {}
-    student_info = {}
-    
-    for record in records:
-        if str(record.get('Fee Status', '')).lower() not in ['paid']:
-            key = f"{record.get('Student Name', '')}_{record.get('Father Name', '')}"
-            if key not in student_unpaid:
-                student_unpaid[key] = []
-                student_info[key] = {
-                    'student_name': record.get('Student Name', ''),
-                    'father_name': record.get('Father Name', ''),
-                    'student_id': record.get('Student ID', ''),
-                    'mobile_number': record.get('Mobile Number', '')
-                }
-            student_unpaid[key].append(record.get('Month', ''))
-    
-    # Filter students with min_months or more unpaid
-    defaulters = []
-    for key, months in student_unpaid.items():
-        if len(months) >= min_months:
-            info = student_info[key]
-            defaulters.append({
-                'student_name': info['student_name'],
-                'father_name': info['father_name'],
-                'student_id': info['student_id'],
-                'mobile_number': info['mobile_number'],
-                'unpaid_count': len(months),
-                'unpaid_months': sorted(months)
-            })
-    
-    # Sort by unpaid count (highest first)
-    defaulters.sort(key=lambda x: x['unpaid_count'], reverse=True)
+    # Maintained per-student unpaid counts - no regrouping of every record
+    defaulters = store.defaulters(min_months)
     
     return jsonify({
         'success': True,
@@ -671,32 +465,21 @@ def update_record():
     if not all([student_name, month, fee_status]):
         return jsonify({'success': False, 'error': 'Missing required fields'}), 400
     
-    records = read_excel_data()
+    # Find the row number for smart update (hash index lookup)
+    row_number = find_row_number(student_name, father_name, month)
     
     # Check for duplicate receipt number if provided (excluding current record)
     if receipt_number and fee_status.lower() == 'paid':
-        for record in records:
-            if (str(record.get('Receipt Number', '')).lower() == str(receipt_number).lower() and
-                not (str(record.get('Student Name', '')) == str(student_name) and 
-                     str(record.get('Father Name', '')) == str(father_name) and
-                     str(record.get('Month', '')).lower() == str(month).lower())):
-                return jsonify({'success': False, 'error': 'This receipt number already exists for another record'}), 400
-    
-    # Find the row number for smart update
-    row_number = find_row_number(student_name, father_name, month)
+        receipt_row = find_receipt_row(receipt_number)
+        if receipt_row and receipt_row != row_number:
+            return jsonify({'success': False, 'error': 'This receipt number already exists for another record'}), 400
     
     if row_number:
-        # Build updated record
-        # First find the existing record to preserve other fields
-        updated_record = None
-        for record in records:
-            if (str(record.get('Student Name', '')) == str(student_name) and 
-                str(record.get('Father Name', '')) == str(father_name) and
-                str(record.get('Month', '')).lower() == str(month).lower()):
-                updated_record = record.copy()
-                updated_record['Fee Status'] = fee_status
-                updated_record['Receipt Number'] = receipt_number if fee_status.lower() == 'paid' else ''
-                break
+        # Build updated record, preserving the other fields
+        updated_record = get_record_at(row_number)
+        if updated_record:
+            updated_record['Fee Status'] = fee_status
+            updated_record['Receipt Number'] = receipt_number if fee_status.lower() == 'paid' else ''
         
         if updated_record and update_row_in_sheet(row_number, updated_record):
             return jsonify({'success': True, 'message': 'Record updated successfully!'})
@@ -726,8 +509,7 @@ def bulk_add_records():
     existing_receipts = set()
     
     for record in existing_records:
-        key = f"{record.get('Student Name', '')}_{record.get('Father Name', '')}_{record.get('Month', '').lower()}"
-        existing_student_months.add(key)
+        existing_student_months.add(id_key(record))
         receipt = str(record.get('Receipt Number', '')).lower().strip()
         if receipt:
             existing_receipts.add(receipt)
@@ -753,7 +535,7 @@ def bulk_add_records():
             continue
         
         # Check for duplicate student+month
-        key = f"{student_name}_{father_name}_{month.lower()}"
+        key = record_key(student_name, father_name, month)
         if key in existing_student_months:
             errors.append(f"Row {i+1}: {student_name} already has record for {month}")
             skipped_count += 1
@@ -782,6 +564,16 @@ def bulk_add_records():
             existing_receipts.add(receipt_number.lower())
         added_count += 1
     
+    # Paid records without a receipt get numbers from one reserved block
+    unnumbered = [r for r in records_to_add if r['Fee Status'].lower() == 'paid' and not r['Receipt Number']]
+    if unnumbered:
+        try:
+            for record, receipt in zip(unnumbered, receipt_sequence.reserve(len(unnumbered))):
+                record['Receipt Number'] = receipt
+        except Exception as e:
+            print(f"Error allocating receipt numbers: {e}")
+            return jsonify({'success': False, 'error': 'Failed to generate receipt numbers'}), 500
+    
     if added_count > 0:
         # BATCH INSERT - Much faster than individual appends!
         if append_rows_to_sheet(records_to_add):
@@ -818,20 +610,13 @@ def add_record():
         if not data.get(field):
             return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
     
-    records = read_excel_data()
-    
     # Check for duplicate entry (same student name + father name + month)
-    for record in records:
-        if (str(record.get('Student Name', '')) == str(data['student_name']) and 
-            str(record.get('Father Name', '')) == str(data['father_name']) and
-            str(record.get('Month', '')).lower() == str(data['month']).lower()):
-            return jsonify({'success': False, 'error': 'Record already exists for this student and month'}), 400
+    if find_row_number(data['student_name'], data['father_name'], data['month']):
+        return jsonify({'success': False, 'error': 'Record already exists for this student and month'}), 400
     
     # Check for duplicate receipt number if provided
-    if data.get('receipt_number'):
-        for record in records:
-            if str(record.get('Receipt Number', '')).lower() == str(data['receipt_number']).lower():
-                return jsonify({'success': False, 'error': 'This receipt number already exists'}), 400
+    if data.get('receipt_number') and find_receipt_row(data['receipt_number']):
+        return jsonify({'success': False, 'error': 'This receipt number already exists'}), 400
     
     new_record = {
         'Student ID': data.get('student_id', ''),
@@ -843,9 +628,7 @@ def add_record():
         'Receipt Number': data.get('receipt_number', '')
     }
     
-    records.append(new_record)
-    
-    if save_excel_data(records):
+    if append_to_sheet(new_record):
         return jsonify({'success': True, 'message': 'Record added successfully!'})
     else:
         return jsonify({'success': False, 'error': 'Failed to save record'}), 500
@@ -879,145 +662,33 @@ def delete_record():
 def download_file():
     """Download the Excel file in a clean pivoted format"""
     filter_type = request.args.get('filter', 'all').lower()  # all, paid, unpaid
-    records = read_excel_data()
+    # Ordered by student then month, so the pivot is built one student at a time
+    records = store.records_by_student()
     
     if not records:
         return jsonify({'success': False, 'error': 'No data to download'}), 404
     
     # Filter records based on filter_type
     if filter_type == 'paid':
-        records = [r for r in records if str(r.get('Fee Status', '')).lower() == 'paid']
+        records = [r for r in records if r.paid]
     elif filter_type == 'unpaid':
-        records = [r for r in records if str(r.get('Fee Status', '')).lower() in ['not paid', 'unpaid', 'pending', '']]
+        records = [r for r in records if r.status_label.lower() in ['not paid', 'unpaid', 'pending', '']]
     
     if not records:
         filter_label = 'paid' if filter_type == 'paid' else 'unpaid'
         return jsonify({'success': False, 'error': f'No {filter_label} records to download'}), 404
     
     try:
-        # Get unique students and months
-        students = {}
-        all_months = set()
-        
-        for record in records:
-            # Create unique key from name + father
-            student_key = f"{record.get('Student Name', '')}_{record.get('Father Name', '')}"
-            month = record.get('Month', '')
-            
-            if student_key not in students:
-                students[student_key] = {
-                    'Student Name': record.get('Student Name', ''),
-                    'Father Name': record.get('Father Name', ''),
-                    'months': {}
-                }
-            
-            # Store fee status with receipt
-            fee_status = record.get('Fee Status', '')
-            receipt = record.get('Receipt Number', '')
-            
-            if fee_status.lower() == 'paid' and receipt:
-                students[student_key]['months'][month] = f"Paid ({receipt})"
-            elif fee_status.lower() == 'paid':
-                students[student_key]['months'][month] = "Paid"
-            else:
-                students[student_key]['months'][month] = "Not Paid"
-            
-            all_months.add(month)
-        
-        # Sort months (most recent first)
-        def month_sort_key(month_str):
-            try:
-                parts = month_str.split()
-                month_names = ['January', 'February', 'March', 'April', 'May', 'June', 
-                              'July', 'August', 'September', 'October', 'November', 'December']
-                month_idx = month_names.index(parts[0]) if parts[0] in month_names else 0
-                year = int(parts[1]) if len(parts) > 1 else 2026
-                return (year, month_idx)
-            except:
-                return (0, 0)
-        
-        sorted_months = sorted(all_months, key=month_sort_key, reverse=True)
-        
-        # Build export data
-        export_data = []
-        for student_key, student_info in students.items():
-            row = {
-                'Student Name': student_info['Student Name'],
-                'Father Name': student_info['Father Name']
-            }
-            for month in sorted_months:
-                row[month] = student_info['months'].get(month, '-')
-            export_data.append(row)
-        
-        # Sort by student name
-        export_data.sort(key=lambda x: x['Student Name'])
-        
-        # Create DataFrame with ordered columns
-        columns = ['Student Name', 'Father Name'] + sorted_months
-        df = pd.DataFrame(export_data, columns=columns)
-        
-        # Save to temporary file
-        export_file = os.path.join(DATA_FOLDER, 'export_temp.xlsx')
-        
-        # Use ExcelWriter for better formatting
-        with pd.ExcelWriter(export_file, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Fee Records')
-            
-            worksheet = writer.sheets['Fee Records']
-            
-            # Define styles
-            red_fill = PatternFill(start_color='FFCCCC', end_color='FFCCCC', fill_type='solid')
-            green_fill = PatternFill(start_color='CCFFCC', end_color='CCFFCC', fill_type='solid')
-            header_fill = PatternFill(start_color='4F46E5', end_color='4F46E5', fill_type='solid')
-            header_font = Font(color='FFFFFF', bold=True)
-            red_font = Font(color='CC0000', bold=True)
-            green_font = Font(color='006600')
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            # Style header row
-            for col_idx, col in enumerate(df.columns, 1):
-                cell = worksheet.cell(row=1, column=col_idx)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.border = thin_border
-            
-            # Style data cells and highlight Not Paid in red
-            for row_idx in range(2, len(df) + 2):
-                for col_idx in range(1, len(df.columns) + 1):
-                    cell = worksheet.cell(row=row_idx, column=col_idx)
-                    cell.border = thin_border
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    
-                    # Check if it's a month column (after first 2 columns)
-                    if col_idx > 2:
-                        cell_value = str(cell.value) if cell.value else ''
-                        if 'Not Paid' in cell_value:
-                            cell.fill = red_fill
-                            cell.font = red_font
-                        elif 'Paid' in cell_value:
-                            cell.fill = green_fill
-                            cell.font = green_font
-            
-            # Auto-adjust column widths
-            for idx, col in enumerate(df.columns):
-                max_length = max(
-                    df[col].astype(str).map(len).max() if len(df) > 0 else 0,
-                    len(str(col))
-                ) + 2
-                col_letter = chr(65 + idx) if idx < 26 else 'A' + chr(65 + idx - 26)
-                worksheet.column_dimensions[col_letter].width = min(max_length, 30)
-            
-            # Set row height for header
-            worksheet.row_dimensions[1].height = 25
+        # Stream straight into memory - no shared temp file, no full pivot table
+        output = BytesIO()
+        with timing.phase('serialize'):
+            write_pivot(records, output)
+        timing.count_rows('exported', len(records))
+        output.seek(0)
         
         return send_file(
-            export_file,
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             as_attachment=True,
             download_name=f'student_fees_{datetime.now().strftime("%Y%m%d")}.xlsx'
         )
@@ -1027,49 +698,36 @@ def download_file():
 
 
 @app.route('/api/summary', methods=['GET'])
+@store.conditional_get
 def get_summary():
     """Get summary statistics"""
-    records = read_excel_data()
-    
-    total = len(records)
-    paid = sum(1 for r in records if str(r.get('Fee Status', '')).lower() == 'paid')
-    unpaid = total - paid
-    
-    # Get unique months
-    months = list(set(r.get('Month', '') for r in records if r.get('Month')))
+    # Counters are maintained incrementally by the store
+    summary = store.summary()
     
     return jsonify({
         'success': True,
         'summary': {
-            'total': total,
-            'paid': paid,
-            'unpaid': unpaid,
-            'months': sorted(months)
+            'total': summary['total'],
+            'paid': summary['paid'],
+            'unpaid': summary['unpaid'],
+            'months': sorted(summary['months']),
+            'by_month': summary['by_month']
         }
     })
 
 
 @app.route('/api/unique-students', methods=['GET'])
+@store.conditional_get
 def get_unique_students():
     """Get unique list of students (name + father name) for autocomplete"""
-    records = read_excel_data()
-    
-    # Get unique student combinations
-    seen = set()
-    students = []
-    for record in records:
-        name = str(record.get('Student Name', '')).strip()
-        father = str(record.get('Father Name', '')).strip()
-        key = f"{name}_{father}"
-        if key not in seen and name:
-            seen.add(key)
-            students.append({
-                'name': name,
-                'father': father,
-                'student_id': str(record.get('Student ID', '')).strip(),
-                'mobile': str(record.get('Mobile Number', '')).strip(),
-                'display': f"{name} (F: {father})"
-            })
+    # One entry per student from the student table, no scan of the fee rows
+    students = [{
+        'name': student['name'],
+        'father': student['father'],
+        'student_id': student['student_id'],
+        'mobile': student['mobile'],
+        'display': f"{student['name']} (F: {student['father']})"
+    } for student in store.unique_students() if student['name']]
     
     # Sort alphabetically by name
     students.sort(key=lambda x: x['name'].lower())
@@ -1080,38 +738,46 @@ def get_unique_students():
     })
 
 
+def student_profile_response(number, not_found='Student not found'):
+    """Profile JSON for a student number from the student table"""
+    result = store.student_records(number) if number is not None else None
+    if result is None:
+        return jsonify({'success': False, 'error': not_found}), 404
+    
+    student, student_records = result
+    
+    # Calculate payment summary
+    total_months = len(student_records)
+    paid_months = sum(1 for r in student_records if str(r.get('Fee Status', '')).lower() == 'paid')
+    
+    return jsonify({
+        'success': True,
+        'student': {
+            'name': student['name'],
+            'father_name': student['father'],
+            'student_id': student['student_id'],
+            'mobile_number': student['mobile'],
+            'total_months': total_months,
+            'paid_months': paid_months,
+            'unpaid_months': total_months - paid_months
+        },
+        'records': student_records
+    })
+
+
 @app.route('/api/student/<receipt_number>', methods=['GET'])
 def get_student_by_receipt(receipt_number):
     """Get student profile by receipt number"""
-    records = read_excel_data()
+    # Find the record with matching receipt number (index lookup)
+    row_number = find_receipt_row(receipt_number)
+    record = get_record_at(row_number) if row_number else None
     
-    # Find the record with matching receipt number
-    for record in records:
-        if str(record.get('Receipt Number', '')).lower() == receipt_number.lower():
-            student_name = record.get('Student Name', '')
-            father_name = record.get('Father Name', '')
-            # Get all records for this student
-            student_records = [r for r in records if 
-                str(r.get('Student Name', '')) == str(student_name) and
-                str(r.get('Father Name', '')) == str(father_name)]
-            
-            # Calculate payment summary
-            total_months = len(student_records)
-            paid_months = sum(1 for r in student_records if str(r.get('Fee Status', '')).lower() == 'paid')
-            
-            return jsonify({
-                'success': True,
-                'student': {
-                    'name': record.get('Student Name', ''),
-                    'father_name': record.get('Father Name', ''),
-                    'total_months': total_months,
-                    'paid_months': paid_months,
-                    'unpaid_months': total_months - paid_months
-                },
-                'records': student_records
-            })
+    if not record:
+        return jsonify({'success': False, 'error': 'Receipt number not found'}), 404
     
-    return jsonify({'success': False, 'error': 'Receipt number not found'}), 404
+    # All of this student's records via the student table
+    return student_profile_response(store.find_student(record.get('Student Name', ''), record.get('Father Name', '')),
+                                    not_found='Receipt number not found')
 
 
 @app.route('/api/update-student-profile', methods=['POST'])
@@ -1132,22 +798,19 @@ def update_student_profile():
     if not new_name:
         return jsonify({'success': False, 'error': 'Student name is required'}), 400
     
-    records = read_excel_data()
-    updated_count = 0
-    
-    for record in records:
-        if (str(record.get('Student Name', '')) == original_name and 
-            str(record.get('Father Name', '')) == original_father):
-            record['Student ID'] = new_student_id
-            record['Student Name'] = new_name
-            record['Father Name'] = new_father
-            record['Mobile Number'] = new_mobile
-            updated_count += 1
+    # Only this student's A:D cells are written, in one batch update
+    number = store.find_student(original_name, original_father)
+    updated_count = store.update_student(number, {
+        'Student ID': new_student_id,
+        'Student Name': new_name,
+        'Father Name': new_father,
+        'Mobile Number': new_mobile
+    }) if number is not None else 0
     
     if updated_count == 0:
         return jsonify({'success': False, 'error': 'No records found for this student'}), 404
     
-    if save_excel_data(records):
+    if updated_count is not None:
         return jsonify({
             'success': True,
             'updated': updated_count,
@@ -1157,44 +820,65 @@ def update_student_profile():
         return jsonify({'success': False, 'error': 'Failed to save changes'}), 500
 
 
+@app.route('/api/student-profile', methods=['GET'])
 @app.route('/api/student-profile/<path:student_key>', methods=['GET'])
-def get_student_profile(student_key):
-    """Get complete student profile with all payment records"""
-    records = read_excel_data()
-    
-    # Parse student key (name_father)
-    parts = student_key.split('_')
-    student_name = parts[0] if len(parts) > 0 else ''
-    father_name = parts[1] if len(parts) > 1 else ''
-    
-    # Get all records for this student
-    student_records = [r for r in records if 
-        str(r.get('Student Name', '')) == str(student_name) and
-        str(r.get('Father Name', '')) == str(father_name)]
-    
-    if not student_records:
-        return jsonify({'success': False, 'error': 'Student not found'}), 404
-    
-    # Get student info from first record
-    first_record = student_records[0]
-    
-    # Calculate payment summary
-    total_months = len(student_records)
-    paid_months = sum(1 for r in student_records if str(r.get('Fee Status', '')).lower() == 'paid')
-    
+def get_student_profile(student_key=None):
+    """Get complete student profile with all payment records.
+
+    The student is given as ?name=&father=; the older name_father path key
+    is still accepted and resolved against the student table.
+    """
+    if student_key is None:
+        number = store.find_student(request.args.get('name', ''), request.args.get('father', ''))
+    else:
+        number = store.find_student(student_key)
+    return student_profile_response(number)
+
+
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Record cache hit/miss counters"""
     return jsonify({
         'success': True,
-        'student': {
-            'name': first_record.get('Student Name', ''),
-            'father_name': first_record.get('Father Name', ''),
-            'total_months': total_months,
-            'paid_months': paid_months,
-            'unpaid_months': total_months - paid_months
-        },
-        'records': student_records
+        'cache': store.stats()
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request latency, phase and Sheets call metrics in Prometheus text format"""
+    return app.response_class(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """Saved request profiles and the slow request log (needs X-Profile-Token)"""
+    if not request_profiler.authorized(request.headers):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    return jsonify({
+        'success': True,
+        'profiles': request_profiler.profiles(),
+        'slow_requests': request_profiler.slow_requests(),
+        'stats': request_profiler.stats
     })
 
 
+@app.route('/api/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Top functions of a saved profile as text, or the raw pstats file with ?format=prof"""
+    if not request_profiler.authorized(request.headers):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    if request.args.get('format') == 'prof':
+        path = request_profiler.profile_path(name)
+        if path is None:
+            return jsonify({'success': False, 'error': 'Profile not found'}), 404
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
+    report = request_profiler.report(name, sort=request.args.get('sort', 'cumulative'))
+    if report is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    return app.response_class(report, mimetype='text/plain')
+
+
 if __name__ == '__main__':
     print("=" * 50)
     print("  Student Fee Management System")
@@ -0,0 +1,58 @@
+"""
+Student Fee Management System - Cold Start Benchmark
+Times `import api.index` in fresh interpreters, the way a Vercel cold start
+pays for it.
+
+`--eager` also imports the modules the Vercel API used to load at import
+time (pandas, gspread, google-auth, openpyxl), so one run shows the cost
+before and after they were made lazy:
+
+    python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --runs 10 --eager
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported at module level by api/index.py before they were deferred
+EAGER_MODULES = ['pandas', 'gspread', 'google.oauth2.service_account', 'openpyxl']
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+{eager}import api.index
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(eager=False):
+    """Seconds one fresh interpreter spends importing the API module"""
+    eager_lines = ''.join(f'import {module}\n' for module in EAGER_MODULES) if eager else ''
+    env = dict(os.environ, STORAGE_BACKEND=os.environ.get('STORAGE_BACKEND', 'sqlite'),
+               SQLITE_DB_FILE=os.environ.get('SQLITE_DB_FILE', ':memory:'))
+    result = subprocess.run([sys.executable, '-c', SNIPPET.format(eager=eager_lines)],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to time')
+    parser.add_argument('--eager', action='store_true', help='also import the formerly eager modules')
+    args = parser.parse_args()
+
+    modes = [False, True] if args.eager else [False]
+    for eager in modes:
+        times = sorted(time_import(eager) * 1000 for _ in range(args.runs))
+        label = 'eager (before)' if eager else 'lazy (now)'
+        print(f"{label:15} median {statistics.median(times):7.1f} ms   "
+              f"min {times[0]:7.1f} ms   max {times[-1]:7.1f} ms   ({args.runs} runs)")
+
+
+if __name__ == '__main__':
+    main()
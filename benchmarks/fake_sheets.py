@@ -0,0 +1,497 @@
+"""
+Student Fee Management System - Local Google Sheets Stand-in
+An in-memory spreadsheet implementing the part of the gspread Worksheet and
+Spreadsheet surface that GoogleSheetsBackend uses, so caching, batching and
+retries can be measured on a machine with no network.
+
+Every call can be slowed by a fixed latency (plus jitter) and counted against
+per-minute read/write quotas; over quota it raises an error carrying a 429
+response, which SheetsQuota treats exactly like the real thing.
+
+    spreadsheet = FakeSpreadsheet(latency=0.08, reads_per_minute=60)
+    backend = GoogleSheetsBackend(lambda: spreadsheet.sheet1)
+
+`serve()` exposes the same data over HTTP as the Sheets v4 values endpoints,
+for load tools that speak the REST API:
+
+    python benchmarks/fake_sheets.py --port 8089 --latency 0.08
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+RANGE_PATTERN = re.compile(r'^([A-Z]+)?(\d+)?(?::([A-Z]+)?(\d+)?)?$')
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    """Shaped like gspread.exceptions.APIError: the HTTP response is on .response"""
+
+    def __init__(self, status_code, message, retry_after=None):
+        super().__init__(message)
+        headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+        self.response = FakeResponse(status_code, headers)
+        self.code = status_code
+
+
+try:
+    from gspread.exceptions import WorksheetNotFound
+except ImportError:  # gspread is optional for the stand-in
+    class WorksheetNotFound(Exception):
+        pass
+
+
+def column_index(letters):
+    """0-based index of a column given as letters (A, B, ..., AA)"""
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index - 1
+
+
+def parse_range(a1):
+    """(first row, last row, first col, last col) for an A1 range, 0-based; None = open-ended"""
+    a1 = a1.split('!')[-1].replace('$', '').upper()
+    if not a1:
+        # Just a sheet title - the whole grid
+        return 0, None, 0, None
+    match = RANGE_PATTERN.match(a1)
+    if not match:
+        raise FakeAPIError(400, f'Unable to parse range: {a1}')
+    col1, row1, col2, row2 = match.groups()
+    if ':' not in a1:
+        col2, row2 = col1, row1
+    return (int(row1) - 1 if row1 else 0, int(row2) - 1 if row2 else None,
+            column_index(col1) if col1 else 0, column_index(col2) if col2 else None)
+
+
+class CallMeter:
+    """Latency injection, per-minute quotas and call counting for one spreadsheet"""
+
+    def __init__(self, latency=0.0, jitter=0.0, reads_per_minute=None, writes_per_minute=None,
+                 sleep=time.sleep, clock=time.monotonic):
+        self.latency = latency
+        self.jitter = jitter
+        self.limits = {'read': reads_per_minute, 'write': writes_per_minute}
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._windows = {'read': [], 'write': []}
+        self.calls = {}
+        self.totals = {'read': 0, 'write': 0, 'rejected': 0}
+
+    def __call__(self, kind, method):
+        with self._lock:
+            limit = self.limits[kind]
+            if limit is not None:
+                now = self._clock()
+                window = [t for t in self._windows[kind] if now - t < 60]
+                self._windows[kind] = window
+                if len(window) >= limit:
+                    self.totals['rejected'] += 1
+                    raise FakeAPIError(429, f'Quota exceeded for quota metric \'{kind} requests\'',
+                                       retry_after=max(1, int(60 - (now - window[0])) + 1))
+                window.append(now)
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self.totals[kind] += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            self._sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.totals, calls=dict(self.calls))
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.totals = {'read': 0, 'write': 0, 'rejected': 0}
+
+
+class FakeWorksheet:
+    """One tab: a list of rows of strings (row 1 is rows[0])"""
+
+    def __init__(self, spreadsheet, sheet_id, title, rows=None, cols=26):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.col_count = cols
+        self._rows = [[str(v) for v in row] for row in rows or []]
+
+    @property
+    def row_count(self):
+        return len(self._rows)
+
+    def _meter(self, kind, method):
+        self.spreadsheet.meter(kind, method)
+
+    def _changed(self):
+        self.spreadsheet.touch()
+
+    @staticmethod
+    def _trim(row):
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        return row
+
+    def _values(self, a1):
+        first_row, last_row, first_col, last_col = parse_range(a1)
+        rows = self._rows[first_row:None if last_row is None else last_row + 1]
+        result = [self._trim(row[first_col:None if last_col is None else last_col + 1]) for row in rows]
+        # Like the API, trailing empty rows are not returned
+        while result and not result[-1]:
+            result.pop()
+        return result
+
+    def _write(self, a1, values):
+        first_row, _, first_col, _ = parse_range(a1)
+        for r, row in enumerate(values):
+            target = first_row + r
+            while len(self._rows) <= target:
+                self._rows.append([])
+            cells = self._rows[target]
+            for c, value in enumerate(row):
+                col = first_col + c
+                while len(cells) <= col:
+                    cells.append('')
+                cells[col] = '' if value is None else str(value)
+
+    # ----- gspread surface -----
+
+    def get_all_values(self):
+        self._meter('read', 'get_all_values')
+        with self.spreadsheet.lock:
+            return [self._trim(row) for row in self._rows]
+
+    def get_all_records(self):
+        self._meter('read', 'get_all_records')
+        with self.spreadsheet.lock:
+            if not self._rows:
+                return []
+            headers = self._rows[0]
+            return [{h: (row[i] if i < len(row) else '') for i, h in enumerate(headers)} for row in self._rows[1:]]
+
+    def row_values(self, row_number):
+        self._meter('read', 'row_values')
+        with self.spreadsheet.lock:
+            index = row_number - 1
+            return self._trim(self._rows[index]) if 0 <= index < len(self._rows) else []
+
+    def batch_get(self, ranges):
+        self._meter('read', 'batch_get')
+        with self.spreadsheet.lock:
+            return [self._values(a1) for a1 in ranges]
+
+    def update(self, values=None, range_name=None):
+        self._meter('write', 'update')
+        with self.spreadsheet.lock:
+            self._write(range_name or 'A1', values or [])
+            self._changed()
+        return {'updatedRange': range_name}
+
+    def batch_update(self, data):
+        self._meter('write', 'batch_update')
+        with self.spreadsheet.lock:
+            for entry in data:
+                self._write(entry['range'], entry['values'])
+            self._changed()
+        return {'totalUpdatedRows': sum(len(entry['values']) for entry in data)}
+
+    def append_rows(self, values):
+        self._meter('write', 'append_rows')
+        with self.spreadsheet.lock:
+            while self._rows and not any(self._rows[-1]):
+                self._rows.pop()
+            self._rows.extend([['' if v is None else str(v) for v in row] for row in values])
+            self._changed()
+        return {'updates': {'updatedRows': len(values)}}
+
+    def delete_rows(self, start_index, end_index=None):
+        self._meter('write', 'delete_rows')
+        with self.spreadsheet.lock:
+            del self._rows[start_index - 1:(end_index or start_index)]
+            self._changed()
+
+    def resize(self, rows=None, cols=None):
+        self._meter('write', 'resize')
+        with self.spreadsheet.lock:
+            if rows is not None:
+                del self._rows[rows:]
+            if cols is not None:
+                self.col_count = cols
+            self._changed()
+
+    def clear(self):
+        self._meter('write', 'clear')
+        with self.spreadsheet.lock:
+            self._rows = []
+            self._changed()
+
+
+class FakeSpreadsheet:
+    """Spreadsheet holding FakeWorksheets, with the metadata calls the backend makes"""
+
+    def __init__(self, rows=None, title='Sheet1', spreadsheet_id='fake-spreadsheet', **meter_options):
+        self.id = spreadsheet_id
+        self.lock = threading.RLock()
+        self.meter = CallMeter(**meter_options)
+        self._worksheets = [FakeWorksheet(self, 0, title, rows)]
+        self._modified = 0
+        self._conditional_formats = {}
+
+    @property
+    def sheet1(self):
+        return self._worksheets[0]
+
+    def touch(self):
+        self._modified += 1
+
+    def stats(self):
+        return self.meter.stats()
+
+    def get_lastUpdateTime(self):
+        self.meter('read', 'get_lastUpdateTime')
+        # A distinct RFC 3339 time per change, like Drive's modifiedTime
+        return datetime.fromtimestamp(self._modified, tz=timezone.utc).isoformat()
+
+    def worksheet(self, title):
+        self.meter('read', 'worksheet')
+        for worksheet in self._worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows=100, cols=26):
+        self.meter('write', 'add_worksheet')
+        with self.lock:
+            worksheet = FakeWorksheet(self, len(self._worksheets), title, cols=cols)
+            self._worksheets.append(worksheet)
+            return worksheet
+
+    def fetch_sheet_metadata(self, params=None):
+        self.meter('read', 'fetch_sheet_metadata')
+        with self.lock:
+            return {'sheets': [{
+                'properties': {'sheetId': ws.id, 'title': ws.title,
+                               'gridProperties': {'rowCount': ws.row_count, 'columnCount': ws.col_count}},
+                'conditionalFormats': list(self._conditional_formats.get(ws.id, []))
+            } for ws in self._worksheets]}
+
+    def _by_id(self, sheet_id):
+        for worksheet in self._worksheets:
+            if worksheet.id == sheet_id:
+                return worksheet
+        raise FakeAPIError(400, f'No grid with id: {sheet_id}')
+
+    def batch_update(self, body):
+        """The spreadsheets.batchUpdate requests GoogleSheetsBackend sends, applied atomically"""
+        self.meter('write', 'spreadsheet_batch_update')
+        with self.lock:
+            snapshot = {ws.id: [list(row) for row in ws._rows] for ws in self._worksheets}
+            formats = {k: list(v) for k, v in self._conditional_formats.items()}
+            try:
+                for request in body.get('requests', []):
+                    self._apply(request)
+            except Exception:
+                for worksheet in self._worksheets:
+                    worksheet._rows = snapshot.get(worksheet.id, [])
+                self._conditional_formats = formats
+                raise
+            self.touch()
+        return {'replies': [{} for _ in body.get('requests', [])]}
+
+    def _apply(self, request):
+        (kind, spec), = request.items()
+        if kind == 'updateSheetProperties':
+            props = spec['properties']
+            worksheet = self._by_id(props['sheetId'])
+            grid = props.get('gridProperties', {})
+            if 'rowCount' in grid:
+                del worksheet._rows[grid['rowCount']:]
+            if 'columnCount' in grid:
+                worksheet.col_count = grid['columnCount']
+        elif kind == 'updateCells':
+            if 'rows' in spec:
+                start = spec['start']
+                worksheet = self._by_id(start['sheetId'])
+                values = [[cell.get('userEnteredValue', {}).get('stringValue', '') for cell in row.get('values', [])]
+                          for row in spec['rows']]
+                first_row, first_col = start.get('rowIndex', 0), start.get('columnIndex', 0)
+                worksheet._write(f"{chr(ord('A') + first_col)}{first_row + 1}", values)
+            else:
+                self._by_id(spec['range']['sheetId'])._rows = []
+        elif kind == 'deleteDimension':
+            rng = spec['range']
+            worksheet = self._by_id(rng['sheetId'])
+            if rng.get('dimension', 'ROWS') == 'ROWS':
+                del worksheet._rows[rng['startIndex']:rng['endIndex']]
+        elif kind == 'addConditionalFormatRule':
+            rule = spec['rule']
+            sheet_id = rule['ranges'][0]['sheetId']
+            self._conditional_formats.setdefault(sheet_id, []).insert(spec.get('index', 0), rule)
+        elif kind == 'deleteConditionalFormatRule':
+            rules = self._conditional_formats.get(spec['sheetId'], [])
+            index = spec.get('index', 0)
+            if index >= len(rules):
+                raise FakeAPIError(400, f"No conditional format on sheet {spec['sheetId']} at index {index}")
+            del rules[index]
+        else:
+            raise FakeAPIError(400, f'Unsupported request: {kind}')
+
+
+# ===================================
+# Sheets v4 values endpoints over HTTP
+# ===================================
+
+def make_handler(spreadsheet):
+    """Request handler serving /v4/spreadsheets/<id>/values... from `spreadsheet`"""
+
+    class SheetsHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def _worksheet(self, a1):
+            """(worksheet, range) for 'Title!A1:B2', 'A1:B2' (first sheet) or a bare title"""
+            title, _, cells = a1.rpartition('!')
+            if not title:
+                title, cells = a1, ''
+                if not any(ws.title == title for ws in spreadsheet._worksheets):
+                    return spreadsheet.sheet1, a1
+            for worksheet in spreadsheet._worksheets:
+                if worksheet.title == title.strip("'"):
+                    return worksheet, cells
+            raise FakeAPIError(400, f'Unable to parse range: {a1}')
+
+        def _dispatch(self, method):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            prefix = f'/v4/spreadsheets/{spreadsheet.id}'
+            if not url.path.startswith(prefix):
+                return self._send(404, {'error': {'code': 404, 'message': 'Requested entity was not found.'}})
+            rest = unquote(url.path[len(prefix):])
+            try:
+                self._send(200, self._route(method, rest, query))
+            except FakeAPIError as e:
+                self._send(e.code, {'error': {'code': e.code, 'message': str(e)}}, e.response.headers)
+
+        def _route(self, method, rest, query):
+            if method == 'GET' and rest in ('', '/'):
+                return spreadsheet.fetch_sheet_metadata()
+            if method == 'POST' and rest == ':batchUpdate':
+                return spreadsheet.batch_update(self._body())
+            if method == 'GET' and rest == '/values:batchGet':
+                ranges = query.get('ranges', [])
+                results = []
+                for a1 in ranges:
+                    spreadsheet.meter('read', 'values_get')
+                    worksheet, cells = self._worksheet(a1)
+                    with spreadsheet.lock:
+                        results.append({'range': a1, 'values': worksheet._values(cells)})
+                return {'spreadsheetId': spreadsheet.id, 'valueRanges': results}
+            if method == 'POST' and rest == '/values:batchUpdate':
+                data = self._body().get('data', [])
+                spreadsheet.meter('write', 'values_batch_update')
+                with spreadsheet.lock:
+                    for entry in data:
+                        worksheet, cells = self._worksheet(entry['range'])
+                        worksheet._write(cells or 'A1', entry.get('values', []))
+                    spreadsheet.touch()
+                return {'spreadsheetId': spreadsheet.id, 'totalUpdatedRows': sum(len(e.get('values', [])) for e in data)}
+            if rest.startswith('/values/'):
+                a1 = rest[len('/values/'):]
+                action = None
+                if a1.endswith(':append') or a1.endswith(':clear'):
+                    a1, action = a1.rsplit(':', 1)
+                worksheet, cells = self._worksheet(a1)
+                if method == 'GET' and action is None:
+                    spreadsheet.meter('read', 'values_get')
+                    with spreadsheet.lock:
+                        return {'range': a1, 'majorDimension': 'ROWS', 'values': worksheet._values(cells)}
+                if method == 'PUT' and action is None:
+                    values = self._body().get('values', [])
+                    spreadsheet.meter('write', 'values_update')
+                    with spreadsheet.lock:
+                        worksheet._write(cells or 'A1', values)
+                        spreadsheet.touch()
+                    return {'updatedRange': a1, 'updatedRows': len(values)}
+                if method == 'POST' and action == 'append':
+                    worksheet.append_rows(self._body().get('values', []))
+                    return {'spreadsheetId': spreadsheet.id, 'updates': {'updatedRange': a1}}
+                if method == 'POST' and action == 'clear':
+                    worksheet.clear()
+                    return {'spreadsheetId': spreadsheet.id, 'clearedRange': a1}
+            raise FakeAPIError(404, f'Unsupported {method} {rest}')
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_PUT(self):
+            self._dispatch('PUT')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+    return SheetsHandler
+
+
+def serve(spreadsheet, host='127.0.0.1', port=8089):
+    """Serve `spreadsheet` over HTTP until interrupted; returns the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(spreadsheet))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Sheets v4 values API with latency and quota injection')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random seconds, up to this much')
+    parser.add_argument('--reads-per-minute', type=int, help='read quota (429 beyond it)')
+    parser.add_argument('--writes-per-minute', type=int, help='write quota (429 beyond it)')
+    args = parser.parse_args()
+
+    spreadsheet = FakeSpreadsheet(latency=args.latency, jitter=args.jitter,
+                                  reads_per_minute=args.reads_per_minute, writes_per_minute=args.writes_per_minute)
+    server = serve(spreadsheet, args.host, args.port)
+    print(f"Serving /v4/spreadsheets/{spreadsheet.id} on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(spreadsheet.stats()))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
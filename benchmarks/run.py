@@ -0,0 +1,392 @@
+"""
+Student Fee Management System - Route Benchmarks
+Drives every route of the local server (app.py) and the Vercel API
+(api/index.py) through the Flask test client against an offline backend -
+SQLite, or the Sheets backend on the local stand-in from fake_sheets.py with
+injected latency and quota - at several school sizes.
+
+For each endpoint it reports p50/p95 latency, storage calls per request and
+peak Python memory, and writes everything to a JSON file so runs can be
+compared:
+
+    python benchmarks/run.py --students 100,1000,10000 --months 12
+    python benchmarks/run.py --students 50000 --months 36 --repeat 5
+    python benchmarks/run.py --backend sheets --latency 0.08 --reads-per-minute 60
+    python benchmarks/run.py --compare benchmarks/results/<earlier run>.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from create_sample_data import iter_records
+from fee_core.quota import SheetsQuota
+from fee_core.records import HEADERS, MONTH_NAMES, record_to_row
+from fee_core.storage import GoogleSheetsBackend, SQLiteBackend
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+TARGETS = {'app': 'app', 'api': 'api.index'}
+
+# Backend methods that stand for one storage (Sheets API) round-trip
+BACKEND_CALLS = ['read_all', 'read_page', 'get_row', 'update_row', 'update_rows', 'update_fields',
+                 'append_rows', 'delete_row', 'save_all', 'query', 'find_row', 'change_token',
+                 'reserve_sequence']
+
+# Endpoints that rewrite or export everything run fewer times
+HEAVY = {'upload', 'download'}
+
+
+# ===================================
+# Dataset
+# ===================================
+
+def make_records(students, months, seed=0):
+    """students x months fee records from the sample data generator"""
+    return list(iter_records(students, months, seed, start_year=2024, start_month=1))
+
+
+def xlsx_bytes(records):
+    """The records as an uploadable vertical-layout workbook"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(HEADERS)
+    for record in records:
+        worksheet.append([record[h] for h in HEADERS])
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+# ===================================
+# Endpoints
+# ===================================
+
+class Scenario:
+    """Request factories for one loaded dataset; each call returns (method, url, kwargs)"""
+
+    def __init__(self, records, months, seed=0):
+        self.rng = random.Random(seed)
+        self.records = records
+        self.months = months
+        self.unpaid = [r for r in records if r['Fee Status'] != 'Paid']
+        self.rng.shuffle(self.unpaid)
+        self._upload_file = None
+        self._added = 0
+
+    def pick(self):
+        return self.rng.choice(self.records)
+
+    def students(self):
+        return 'GET', '/api/students?page=1&per_page=50', {}
+
+    def students_cursor(self):
+        return 'GET', '/api/students?cursor=&per_page=50', {}
+
+    def students_all(self):
+        return 'GET', '/api/students', {}
+
+    def search(self):
+        name = self.pick()['Student Name']
+        return 'GET', f'/api/search?query={name[:6].replace(" ", "+")}&page=1&per_page=50', {}
+
+    def summary(self):
+        return 'GET', '/api/summary', {}
+
+    def defaulters(self):
+        return 'GET', '/api/defaulters?min_months=2', {}
+
+    def unique_students(self):
+        return 'GET', '/api/unique-students', {}
+
+    def student_profile(self):
+        record = self.pick()
+        return 'GET', '/api/student-profile', {'query_string': {'name': record['Student Name'],
+                                                               'father': record['Father Name']}}
+
+    def update(self):
+        record = self.pick()
+        paid = self.rng.random() > 0.5
+        return 'POST', '/api/update', {'json': {
+            'student_name': record['Student Name'],
+            'father_name': record['Father Name'],
+            'month': record['Month'],
+            'fee_status': 'Paid' if paid else 'Not Paid',
+            'receipt_number': ''
+        }}
+
+    def quick_mark_paid(self):
+        record = self.unpaid.pop() if self.unpaid else self.pick()
+        return 'POST', '/api/quick-mark-paid', {'json': {
+            'student_name': record['Student Name'],
+            'father_name': record['Father Name'],
+            'month': record['Month']
+        }}
+
+    def bulk_add(self):
+        # Ten students get a month that does not exist yet
+        self._added += 1
+        month = f"{MONTH_NAMES[(self.months + self._added) % 12]} {2100 + self._added}"
+        chosen = self.rng.sample(self.records, min(10, len(self.records)))
+        return 'POST', '/api/bulk-add', {'json': {'records': [
+            dict(r, **{'Month': month, 'Fee Status': 'Not Paid', 'Receipt Number': ''}) for r in chosen
+        ]}}
+
+    def update_student_profile(self):
+        record = self.pick()
+        return 'POST', '/api/update-student-profile', {'json': {
+            'original_name': record['Student Name'],
+            'original_father': record['Father Name'],
+            'student_id': record['Student ID'],
+            'student_name': record['Student Name'],
+            'father_name': record['Father Name'],
+            'mobile_number': record['Mobile Number']
+        }}
+
+    def upload(self):
+        if self._upload_file is None:
+            self._upload_file = xlsx_bytes(self.records)
+        return 'POST', '/api/upload', {'data': {'file': (BytesIO(self._upload_file), 'students.xlsx')},
+                                       'content_type': 'multipart/form-data'}
+
+    def download(self):
+        return 'GET', '/api/download?filter=all', {}
+
+
+# Run order: reads first, then writes, then whole-table operations
+ENDPOINTS = ['students', 'students_cursor', 'students_all', 'search', 'summary', 'defaulters',
+             'unique_students', 'student_profile', 'update', 'quick_mark_paid', 'bulk_add',
+             'update_student_profile', 'download', 'upload']
+
+
+# ===================================
+# Measurement
+# ===================================
+
+def count_calls(backend):
+    """Wrap the backend's storage methods with counters; returns the counter dict"""
+    counts = {}
+    for name in BACKEND_CALLS:
+        method = getattr(backend, name, None)
+        if method is None:
+            continue
+
+        def counted(*args, _name=name, _method=method, **kwargs):
+            counts[_name] = counts.get(_name, 0) + 1
+            return _method(*args, **kwargs)
+        setattr(backend, name, counted)
+    return counts
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def load_target(target, workdir, db_file):
+    """Import a fresh copy of app.py or api/index.py backed by `db_file`"""
+    os.environ.update(STORAGE_BACKEND='sqlite', SQLITE_DB_FILE=db_file, WRITE_BEHIND_MS='0')
+    module_name = TARGETS[target]
+    sys.modules.pop(module_name, None)
+    cwd = os.getcwd()
+    os.chdir(workdir)  # app.py creates its data/ folder next to wherever it runs
+    try:
+        return importlib.import_module(module_name)
+    finally:
+        os.chdir(cwd)
+
+
+def use_fake_sheets(module, records, options):
+    """Point a loaded target at a FakeSpreadsheet holding `records`; returns the spreadsheet"""
+    spreadsheet = FakeSpreadsheet([HEADERS] + [record_to_row(r) for r in records], **options)
+    quota = SheetsQuota(reads_per_minute=options.get('reads_per_minute') or 6000,
+                        writes_per_minute=options.get('writes_per_minute') or 6000)
+    backend = GoogleSheetsBackend(lambda: spreadsheet.sheet1, quota=quota)
+    module.storage = module.store.backend = backend
+    return spreadsheet
+
+
+def has_route(module, method, url):
+    adapter = module.app.url_map.bind('localhost')
+    try:
+        adapter.match(url.split('?')[0], method=method)
+        return True
+    except Exception:
+        return False
+
+
+def measure(module, counts, scenario, endpoint, repeat, spreadsheet=None):
+    """Latency, storage (and Sheets API) calls and peak memory for one endpoint"""
+    client = module.app.test_client()
+    method, url, _ = getattr(scenario, endpoint)()
+    if not has_route(module, method, url):
+        return None
+
+    # One untimed call warms the record cache and any lazy imports
+    method, url, kwargs = getattr(scenario, endpoint)()
+    client.open(url, method=method, **kwargs)
+    counts.clear()
+    if spreadsheet is not None:
+        spreadsheet.meter.reset()
+
+    times = []
+    statuses = set()
+    for _ in range(repeat):
+        method, url, kwargs = getattr(scenario, endpoint)()
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        times.append((time.perf_counter() - start) * 1000)
+        statuses.add(response.status_code)
+    calls = dict(counts)
+    api = spreadsheet.stats() if spreadsheet is not None else None
+
+    # Memory is traced on a separate call - tracing slows everything down
+    method, url, kwargs = getattr(scenario, endpoint)()
+    tracemalloc.start()
+    client.open(url, method=method, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {
+        'p50_ms': round(percentile(times, 0.5), 3),
+        'p95_ms': round(percentile(times, 0.95), 3),
+        'mean_ms': round(statistics.fmean(times), 3),
+        'runs': repeat,
+        'status': sorted(statuses),
+        'storage_calls': calls,
+        'storage_calls_per_request': round(sum(calls.values()) / repeat, 2),
+        'peak_kb': round(peak / 1024, 1)
+    }
+    if api is not None:
+        result['sheets_api_calls'] = api['calls']
+        result['sheets_api_calls_per_request'] = round((api['read'] + api['write']) / repeat, 2)
+        result['sheets_429s'] = api['rejected']
+    return result
+
+
+def run(targets, sizes, months, repeat, endpoints, seed, backend='sqlite', sheets_options=None):
+    results = []
+    for students in sizes:
+        records = make_records(students, months, seed)
+        for target in targets:
+            workdir = tempfile.mkdtemp(prefix='fee_bench_')
+            try:
+                db_file = os.path.join(workdir, 'students.db')
+                SQLiteBackend(db_file).save_all(records)
+                module = load_target(target, workdir, db_file)
+                spreadsheet = use_fake_sheets(module, records, sheets_options or {}) if backend == 'sheets' else None
+                counts = count_calls(module.storage)
+                scenario = Scenario(records, months, seed)
+                for endpoint in endpoints:
+                    runs = min(repeat, 3) if endpoint in HEAVY else repeat
+                    result = measure(module, counts, scenario, endpoint, runs, spreadsheet)
+                    if result is None:
+                        continue
+                    result.update(target=target, endpoint=endpoint, students=students, months=months,
+                                  rows=len(records), backend=backend)
+                    results.append(result)
+                    print(f"{target:4} {students:>7} x {months:<3} {endpoint:24} "
+                          f"p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                          f"calls/req {result['storage_calls_per_request']:6.2f}  peak {result['peak_kb']:10.1f} KB"
+                          + (f"  sheets/req {result['sheets_api_calls_per_request']:6.2f}  429s {result['sheets_429s']}"
+                             if spreadsheet is not None else ''))
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    """Print p50 changes against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {(r['target'], r['endpoint'], r['students'], r['months']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path}:")
+    for result in current:
+        old = baseline.get((result['target'], result['endpoint'], result['students'], result['months']))
+        if old and old['p50_ms']:
+            change = (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+            print(f"{result['target']:4} {result['students']:>7} x {result['months']:<3} {result['endpoint']:24} "
+                  f"p50 {old['p50_ms']:9.2f} -> {result['p50_ms']:9.2f} ms ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every Flask route at realistic school sizes')
+    parser.add_argument('--students', default='100,1000,5000', help='comma-separated school sizes')
+    parser.add_argument('--months', type=int, default=12, help='fee months per student')
+    parser.add_argument('--repeat', type=int, default=20, help='timed requests per endpoint')
+    parser.add_argument('--targets', default='app,api', help='app (local server), api (Vercel) or both')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='subset of: ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--backend', choices=['sqlite', 'sheets'], default='sqlite',
+                        help='sheets = GoogleSheetsBackend on the local stand-in')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each stand-in Sheets call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random seconds per stand-in call')
+    parser.add_argument('--reads-per-minute', type=int, help='stand-in read quota (429 beyond it)')
+    parser.add_argument('--writes-per-minute', type=int, help='stand-in write quota (429 beyond it)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='results file (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare p50 against')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.students.split(',') if s]
+    targets = [t for t in args.targets.split(',') if t]
+    endpoints = [e for e in args.endpoints.split(',') if e]
+    for name in targets:
+        if name not in TARGETS:
+            parser.error(f'unknown target: {name}')
+    for name in endpoints:
+        if name not in ENDPOINTS:
+            parser.error(f'unknown endpoint: {name}')
+
+    sheets_options = {'latency': args.latency, 'jitter': args.jitter,
+                      'reads_per_minute': args.reads_per_minute, 'writes_per_minute': args.writes_per_minute}
+    results = run(targets, sizes, args.months, args.repeat, endpoints, args.seed, args.backend, sheets_options)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'months': args.months,
+                'repeat': args.repeat,
+                'seed': args.seed,
+                'backend': args.backend,
+                'sheets': sheets_options if args.backend == 'sheets' else None
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,64 +1,292 @@
 """
-Generate sample Excel data for Student Fee Management System
-Run this script once to create sample data.
+Generate sample data for Student Fee Management System
+Synthetic schools of any size: N students x M months with Indian names,
+shared father names, siblings, a skewed defaulter rate, RCP-MMYY-NNN receipt
+sequences and the occasional duplicate Student ID or shared mobile number.
+
+Output is streamed, so million-row fixtures never sit in memory:
+
+    python create_sample_data.py                                  # 10 students x 2 months -> data/students.xlsx
+    python create_sample_data.py -n 5000 -m 12 -o data/big.xlsx
+    python create_sample_data.py -n 2000 -m 12 --layout horizontal -o data/pivot.xlsx
+    python create_sample_data.py -n 50000 -m 36 --format csv -o data/students.csv
+    python create_sample_data.py -n 500 -m 12 --load sqlite          # straight into a storage backend
+
+The same --seed always produces the same school.
 """
 
-import pandas as pd
+import argparse
+import csv
 import os
+import random
+import sys
+
+from fee_core.records import HEADERS, MONTH_NAMES
+
+BOY_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Sai', 'Reyansh', 'Ayaan', 'Krishna', 'Ishaan',
+             'Shaurya', 'Atharv', 'Advik', 'Pranav', 'Rohan', 'Rahul', 'Amit', 'Karan', 'Dev', 'Harsh',
+             'Kabir', 'Yash', 'Manav', 'Laksh', 'Rudra', 'Ansh', 'Dhruv', 'Kunal', 'Nikhil', 'Tanmay']
+GIRL_NAMES = ['Aadhya', 'Ananya', 'Diya', 'Saanvi', 'Pari', 'Anika', 'Navya', 'Myra', 'Sara', 'Aarohi',
+              'Priya', 'Sneha', 'Kavya', 'Meera', 'Isha', 'Riya', 'Pooja', 'Nisha', 'Tanvi', 'Kriti',
+              'Avni', 'Kiara', 'Shreya', 'Neha', 'Sakshi', 'Khushi', 'Anjali', 'Simran', 'Muskan', 'Divya']
+FATHER_NAMES = ['Rajesh', 'Suresh', 'Ramesh', 'Mahesh', 'Anil', 'Sunil', 'Vijay', 'Sanjay', 'Prakash', 'Vinod',
+                'Deepak', 'Ashok', 'Manoj', 'Rakesh', 'Mukesh', 'Dinesh', 'Pankaj', 'Ajay', 'Rajendra', 'Mohan',
+                'Vikram', 'Naresh', 'Satish', 'Ravi', 'Gopal', 'Arun', 'Kamal', 'Santosh', 'Alok', 'Umesh']
+SURNAMES = ['Sharma', 'Verma', 'Gupta', 'Singh', 'Kumar', 'Patel', 'Yadav', 'Mishra', 'Joshi', 'Agarwal',
+            'Tiwari', 'Pandey', 'Chauhan', 'Jain', 'Srivastava', 'Saxena', 'Shukla', 'Tripathi', 'Dubey', 'Rathore',
+            'Chaudhary', 'Thakur', 'Bansal', 'Mehta', 'Nair', 'Reddy', 'Iyer', 'Das', 'Khan', 'Ansari']
+
+# Children per family: mostly one, some siblings
+FAMILY_SIZES = [1, 2, 3]
+FAMILY_WEIGHTS = [0.72, 0.23, 0.05]
+
+DUPLICATE_ID_RATE = 0.004   # Student ID re-used by mistake
+SHARED_MOBILE_RATE = 0.01   # Unrelated family gives the same number
+BLANK_ID_RATE = 0.01        # Student ID never filled in
+
+
+def month_labels(months, start_year=2025, start_month=12):
+    """`months` consecutive 'December 2025' style labels"""
+    labels = []
+    for i in range(months):
+        index = start_month - 1 + i
+        labels.append(f"{MONTH_NAMES[index % 12]} {start_year + index // 12}")
+    return labels
+
+
+def short_label(label):
+    """'December 2025' -> 'Dec-25', the header style of horizontal sheets"""
+    name, year = label.split()
+    return f"{name[:3]}-{year[-2:]}"
+
+
+def receipt_prefix(label):
+    """RCP-MMYY- prefix for a fee month, matching ReceiptSequence"""
+    name, year = label.split()
+    return f"RCP-{MONTH_NAMES.index(name) + 1:02d}{year[-2:]}-"
+
+
+def iter_students(count, seed=0):
+    """Yield `count` students family by family; each carries its own paying habit.
+
+    Only the current family is held in memory.
+    """
+    rng = random.Random(seed)
+    produced = 0
+    last_id = 0
+    recent_mobiles = []
+    while produced < count:
+        surname = rng.choice(SURNAMES)
+        father = f"{rng.choice(FATHER_NAMES)} {surname}"
+        if recent_mobiles and rng.random() < SHARED_MOBILE_RATE:
+            mobile = rng.choice(recent_mobiles)
+        else:
+            mobile = f"{rng.choice('6789')}{rng.randrange(10 ** 9):09d}"
+            recent_mobiles = (recent_mobiles + [mobile])[-50:]
+        # Most families pay nearly every month; a long tail rarely does
+        reliability = rng.betavariate(8, 1)
+        size = rng.choices(FAMILY_SIZES, FAMILY_WEIGHTS)[0]
+        names = set()
+        for _ in range(min(size, count - produced)):
+            first = rng.choice(BOY_NAMES if rng.random() < 0.5 else GIRL_NAMES)
+            while first in names:
+                first = rng.choice(BOY_NAMES + GIRL_NAMES)
+            names.add(first)
+            if rng.random() < BLANK_ID_RATE:
+                student_id = ''
+            elif last_id and rng.random() < DUPLICATE_ID_RATE:
+                student_id = f"VK{rng.randrange(1, last_id + 1):05d}"
+            else:
+                last_id += 1
+                student_id = f"VK{last_id:05d}"
+            produced += 1
+            yield {
+                'Student ID': student_id,
+                'Student Name': f"{first} {surname}",
+                'Father Name': father,
+                'Mobile Number': mobile,
+                'reliability': reliability,
+                'number': produced
+            }
+
+
+def fee_status(student, month_index, months, seed):
+    """Paid or not for one student-month - the same answer whatever the output order"""
+    rng = random.Random(seed * 1_000_003 + student['number'] * 1009 + month_index)
+    chance = student['reliability']
+    if month_index == months - 1:
+        chance *= 0.6  # The current month is still being collected
+    return rng.random() < chance
+
+
+def iter_records(students, months, seed=0, order='student', start_year=2025, start_month=12):
+    """Yield fee records (dicts keyed by HEADERS).
+
+    order='student' gives each student's months together; order='month' gives
+    every student for a month before the next month, like a sheet filled in
+    month by month. Each month numbers its receipts in student order, so both
+    orders carry the same receipts.
+    """
+    labels = month_labels(months, start_year, start_month)
+    prefixes = [receipt_prefix(label) for label in labels]
+    issued = [0] * months
+
+    def record(student, month_index):
+        paid = fee_status(student, month_index, months, seed)
+        receipt = ''
+        if paid:
+            issued[month_index] += 1
+            receipt = f"{prefixes[month_index]}{issued[month_index]:03d}"
+        return {
+            'Student ID': student['Student ID'],
+            'Student Name': student['Student Name'],
+            'Father Name': student['Father Name'],
+            'Mobile Number': student['Mobile Number'],
+            'Month': labels[month_index],
+            'Fee Status': 'Paid' if paid else 'Not Paid',
+            'Receipt Number': receipt
+        }
+
+    if order == 'month':
+        # Re-generate the (deterministic) students once per month instead of keeping them
+        for month_index in range(months):
+            for student in iter_students(students, seed):
+                yield record(student, month_index)
+    else:
+        for student in iter_students(students, seed):
+            for month_index in range(months):
+                yield record(student, month_index)
+
+
+def iter_horizontal_rows(students, months, seed=0, start_year=2025, start_month=12):
+    """Header then one row per student: ID, name, father, mobile, then 'Paid (RCP-...)' / 'Not Paid' per month"""
+    labels = month_labels(months, start_year, start_month)
+    yield ['Student ID', 'Student Name', 'Father Name', 'Mobile Number'] + [short_label(l) for l in labels]
+    row = None
+    for record in iter_records(students, months, seed, 'student', start_year, start_month):
+        if record['Month'] == labels[0]:
+            if row is not None:
+                yield row
+            row = [record['Student ID'], record['Student Name'], record['Father Name'], record['Mobile Number']]
+        receipt = record['Receipt Number']
+        row.append(f"Paid ({receipt})" if record['Fee Status'] == 'Paid' else 'Not Paid')
+    if row is not None:
+        yield row
+
+
+def iter_rows(args):
+    """Header + rows for the chosen layout"""
+    if args.layout == 'horizontal':
+        return iter_horizontal_rows(args.students, args.months, args.seed, args.start_year, args.start_month)
+
+    def vertical():
+        yield HEADERS
+        for record in iter_records(args.students, args.months, args.seed, args.order,
+                                   args.start_year, args.start_month):
+            yield [record[h] for h in HEADERS]
+    return vertical()
+
+
+def write_xlsx(rows, path):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Sheet1')
+    count = -1
+    for row in rows:
+        worksheet.append(row)
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def write_csv(rows, path):
+    count = -1
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def load_backend(args):
+    """Replace a storage backend's data with generated records.
+
+    Sheets and SQLite get the records in appends of --chunk-rows. An Excel
+    append rewrites the whole file, so the workbook is streamed out once instead.
+    """
+    from fee_core.storage import create_backend
+
+    if args.load == 'excel':
+        if os.path.dirname(args.excel_file):
+            os.makedirs(os.path.dirname(args.excel_file), exist_ok=True)
+        return write_xlsx(iter_rows(args), args.excel_file)
+
+    get_worksheet = None
+    if args.load == 'sheets':
+        import gspread
+
+        worksheet = gspread.service_account(filename=args.credentials).open_by_key(args.spreadsheet_id).sheet1
+        get_worksheet = lambda: worksheet
+    backend = create_backend(args.load, get_worksheet=get_worksheet, excel_file=args.excel_file,
+                             sqlite_file=args.sqlite_file)
+    backend.save_all([])  # Start from an empty table with just the header
+    total = 0
+    chunk = []
+    for record in iter_records(args.students, args.months, args.seed, args.order,
+                               args.start_year, args.start_month):
+        chunk.append(record)
+        if len(chunk) >= args.chunk_rows:
+            backend.append_rows(chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        backend.append_rows(chunk)
+        total += len(chunk)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic school of fee records')
+    parser.add_argument('-n', '--students', type=int, default=10)
+    parser.add_argument('-m', '--months', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start-year', type=int, default=2025)
+    parser.add_argument('--start-month', type=int, default=12, help='1-12, first fee month')
+    parser.add_argument('--layout', choices=['vertical', 'horizontal'], default='vertical',
+                        help='vertical: one row per student-month; horizontal: one column per month')
+    parser.add_argument('--order', choices=['student', 'month'], default='student',
+                        help='vertical row order: student by student, or month by month')
+    parser.add_argument('--format', choices=['xlsx', 'csv'], help='default: from the output extension')
+    parser.add_argument('-o', '--output', default=os.path.join('data', 'students.xlsx'))
+    parser.add_argument('--load', choices=['sheets', 'excel', 'sqlite'],
+                        help='replace the data in a storage backend instead of writing a file')
+    parser.add_argument('--chunk-rows', type=int, default=1000, help='rows per append when loading sheets or sqlite')
+    parser.add_argument('--sqlite-file', default=os.path.join('data', 'students.db'))
+    parser.add_argument('--excel-file', default=os.path.join('data', 'students.xlsx'))
+    parser.add_argument('--credentials', default='credentials.json')
+    parser.add_argument('--spreadsheet-id', default='19F9qbeUSWyia-oWQbIWonJccytEUArW0ZrZ7kgmB0jc')
+    args = parser.parse_args(argv)
+
+    if args.load:
+        if args.layout == 'horizontal':
+            parser.error('--load stores vertical records; drop --layout horizontal')
+        total = load_backend(args)
+        print(f"✅ Loaded {total} records ({args.students} students x {args.months} months) into {args.load}")
+        return
+
+    fmt = args.format or ('csv' if args.output.lower().endswith('.csv') else 'xlsx')
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    writer = write_csv if fmt == 'csv' else write_xlsx
+    count = writer(iter_rows(args), args.output)
+
+    print("✅ Sample data created successfully!")
+    print(f"📁 File saved: {args.output}")
+    print(f"👥 Total students: {args.students}")
+    print(f"📊 Rows written: {count} ({args.layout})")
+
 
-# Sample data - 10 students with multiple months
-data = [
-    # Student 1 - Aarav Patel
-    {"Student Name": "Aarav Patel", "Student ID": "VK001", "Father Name": "Rajesh Patel", "Month": "January 2026", "Fee Status": "Paid", "Receipt Number": "RCP-001-JAN26"},
-    {"Student Name": "Aarav Patel", "Student ID": "VK001", "Father Name": "Rajesh Patel", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-001-DEC25"},
-    
-    # Student 2 - Priya Sharma
-    {"Student Name": "Priya Sharma", "Student ID": "VK002", "Father Name": "Suresh Sharma", "Month": "January 2026", "Fee Status": "Not Paid", "Receipt Number": ""},
-    {"Student Name": "Priya Sharma", "Student ID": "VK002", "Father Name": "Suresh Sharma", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-002-DEC25"},
-    
-    # Student 3 - Rohan Gupta
-    {"Student Name": "Rohan Gupta", "Student ID": "VK003", "Father Name": "Anil Gupta", "Month": "January 2026", "Fee Status": "Paid", "Receipt Number": "RCP-003-JAN26"},
-    {"Student Name": "Rohan Gupta", "Student ID": "VK003", "Father Name": "Anil Gupta", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-003-DEC25"},
-    
-    # Student 4 - Sneha Verma
-    {"Student Name": "Sneha Verma", "Student ID": "VK004", "Father Name": "Prakash Verma", "Month": "January 2026", "Fee Status": "Not Paid", "Receipt Number": ""},
-    {"Student Name": "Sneha Verma", "Student ID": "VK004", "Father Name": "Prakash Verma", "Month": "December 2025", "Fee Status": "Not Paid", "Receipt Number": ""},
-    
-    # Student 5 - Amit Singh
-    {"Student Name": "Amit Singh", "Student ID": "VK005", "Father Name": "Vikram Singh", "Month": "January 2026", "Fee Status": "Paid", "Receipt Number": "RCP-005-JAN26"},
-    {"Student Name": "Amit Singh", "Student ID": "VK005", "Father Name": "Vikram Singh", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-005-DEC25"},
-    
-    # Student 6 - Kavya Mishra
-    {"Student Name": "Kavya Mishra", "Student ID": "VK006", "Father Name": "Deepak Mishra", "Month": "January 2026", "Fee Status": "Paid", "Receipt Number": "RCP-006-JAN26"},
-    {"Student Name": "Kavya Mishra", "Student ID": "VK006", "Father Name": "Deepak Mishra", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-006-DEC25"},
-    
-    # Student 7 - Arjun Kumar
-    {"Student Name": "Arjun Kumar", "Student ID": "VK007", "Father Name": "Ramesh Kumar", "Month": "January 2026", "Fee Status": "Not Paid", "Receipt Number": ""},
-    {"Student Name": "Arjun Kumar", "Student ID": "VK007", "Father Name": "Ramesh Kumar", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-007-DEC25"},
-    
-    # Student 8 - Ananya Joshi
-    {"Student Name": "Ananya Joshi", "Student ID": "VK008", "Father Name": "Sanjay Joshi", "Month": "January 2026", "Fee Status": "Paid", "Receipt Number": "RCP-008-JAN26"},
-    {"Student Name": "Ananya Joshi", "Student ID": "VK008", "Father Name": "Sanjay Joshi", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-008-DEC25"},
-    
-    # Student 9 - Rahul Sharma (Same name as Priya's family - different father)
-    {"Student Name": "Rahul Sharma", "Student ID": "VK009", "Father Name": "Mohan Sharma", "Month": "January 2026", "Fee Status": "Paid", "Receipt Number": "RCP-009-JAN26"},
-    {"Student Name": "Rahul Sharma", "Student ID": "VK009", "Father Name": "Mohan Sharma", "Month": "December 2025", "Fee Status": "Not Paid", "Receipt Number": ""},
-    
-    # Student 10 - Meera Agarwal
-    {"Student Name": "Meera Agarwal", "Student ID": "VK010", "Father Name": "Vinod Agarwal", "Month": "January 2026", "Fee Status": "Not Paid", "Receipt Number": ""},
-    {"Student Name": "Meera Agarwal", "Student ID": "VK010", "Father Name": "Vinod Agarwal", "Month": "December 2025", "Fee Status": "Paid", "Receipt Number": "RCP-010-DEC25"},
-]
-
-# Create data folder if it doesn't exist
-os.makedirs('data', exist_ok=True)
-
-# Create DataFrame and save to Excel
-df = pd.DataFrame(data)
-df.to_excel('data/students.xlsx', index=False)
-
-print("✅ Sample data created successfully!")
-print(f"📁 File saved: data/students.xlsx")
-print(f"👥 Total students: 10")
-print(f"📊 Total records: {len(data)}")
-print(f"   ✅ Paid: {sum(1 for d in data if d['Fee Status'] == 'Paid')}")
-print(f"   ❌ Not Paid: {sum(1 for d in data if d['Fee Status'] == 'Not Paid')}")
+if __name__ == '__main__':
+    sys.exit(main())
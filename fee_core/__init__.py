@@ -0,0 +1,4 @@
+"""
+Student Fee Management System - Core
+Shared data layer used by both the local server (app.py) and the Vercel API (api/index.py).
+"""
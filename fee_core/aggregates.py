@@ -0,0 +1,127 @@
+"""
+Student Fee Management System - Aggregates
+Paid/unpaid counters per month and per student, kept up to date by the record
+cache so the dashboard summary and defaulters list never rescan every record.
+"""
+
+import threading
+
+
+def student_key(record):
+    return (record.student_name, record.father_name)
+
+
+class FeeAggregates:
+    """Incrementally maintained summary counters and defaulter buckets"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.total = 0
+        self.paid = 0
+        self._months = {}    # month -> {'paid': n, 'unpaid': n}
+        self._students = {}  # (name, father) -> {'rows', 'unpaid_count', 'unpaid': {month: n}, 'info'}
+        self._buckets = {}   # unpaid_count -> {(name, father)}
+
+    def _rebucket(self, key, old_count, new_count):
+        if old_count == new_count:
+            return
+        if old_count:
+            bucket = self._buckets[old_count]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[old_count]
+        if new_count:
+            self._buckets.setdefault(new_count, set()).add(key)
+
+    def _apply(self, record, sign):
+        """Add (sign=1) or remove (sign=-1) one record's contribution"""
+        paid = record.paid
+        self.total += sign
+        if paid:
+            self.paid += sign
+        
+        month = record.month_label
+        if month:
+            counts = self._months.setdefault(month, {'paid': 0, 'unpaid': 0})
+            counts['paid' if paid else 'unpaid'] += sign
+            if counts['paid'] == 0 and counts['unpaid'] == 0:
+                del self._months[month]
+        
+        key = student_key(record)
+        student = self._students.get(key)
+        if student is None:
+            student = self._students[key] = {
+                'rows': 0,
+                'unpaid_count': 0,
+                'unpaid': {},
+                # Student ID and mobile come from the StudentTable, see DataStore.defaulters
+                'info': {
+                    'student_name': record.student_name,
+                    'father_name': record.father_name
+                }
+            }
+        student['rows'] += sign
+        
+        if not paid:
+            old_count = student['unpaid_count']
+            student['unpaid'][month] = student['unpaid'].get(month, 0) + sign
+            if student['unpaid'][month] == 0:
+                del student['unpaid'][month]
+            student['unpaid_count'] += sign
+            self._rebucket(key, old_count, student['unpaid_count'])
+        
+        if student['rows'] == 0:
+            del self._students[key]
+
+    # ----- maintenance (called by RecordCache) -----
+
+    def rebuild(self, records):
+        with self._lock:
+            self._reset()
+            for record in records:
+                self._apply(record, 1)
+
+    def on_update(self, row_number, old_record, new_record):
+        with self._lock:
+            self._apply(old_record, -1)
+            self._apply(new_record, 1)
+
+    def on_append(self, start_row, records):
+        with self._lock:
+            for record in records:
+                self._apply(record, 1)
+
+    def on_delete(self, row_number, old_record):
+        with self._lock:
+            self._apply(old_record, -1)
+
+    # ----- queries -----
+
+    def summary(self):
+        """Totals, unique students and the months present - O(months)"""
+        with self._lock:
+            return {
+                'total': self.total,
+                'paid': self.paid,
+                'unpaid': self.total - self.paid,
+                'total_students': len(self._students),
+                'months': list(self._months),
+                'by_month': {month: dict(counts) for month, counts in self._months.items()}
+            }
+
+    def defaulters(self, min_months=1):
+        """Students with at least `min_months` unpaid records, most unpaid first, then by name"""
+        with self._lock:
+            result = []
+            for count in sorted((c for c in self._buckets if c >= min_months), reverse=True):
+                # Ties by name, then father - the same order whether rebuilt or updated in place
+                for key in sorted(self._buckets[count]):
+                    student = self._students[key]
+                    unpaid_months = []
+                    for month, n in student['unpaid'].items():
+                        unpaid_months.extend([month] * n)
+                    result.append(dict(student['info'], unpaid_count=count, unpaid_months=sorted(unpaid_months)))
+            return result
@@ -0,0 +1,205 @@
+"""
+Student Fee Management System - Record Cache
+Keeps the last full read of the fee sheet in memory so read endpoints
+don't pay a Google Sheets round-trip on every request.
+
+Successful row writes are applied to the cached copy (write-through) and
+forwarded to attached views such as the RowIndex, so a single-record
+mutation never forces the whole sheet to be downloaded again.
+
+Records are held as compact FeeRecord objects; callers get plain dicts.
+"""
+
+import threading
+import time
+
+from fee_core.model import FeeRecord
+
+
+class RecordCache:
+    """Thread-safe TTL cache for the full list of fee records"""
+
+    def __init__(self, ttl=60, views=()):
+        self.ttl = ttl
+        self.views = list(views)
+        self._records = None
+        self._loaded_at = 0.0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped whenever the cached data changes - the basis of HTTP ETags
+        self.version = 0
+
+    def _is_fresh(self):
+        return self._records is not None and (time.monotonic() - self._loaded_at) < self.ttl
+
+    def is_fresh(self):
+        """True while cached records (and views) reflect the sheet"""
+        with self._lock:
+            return self._is_fresh()
+
+    def fresh_version(self):
+        """Data version while the cache is fresh, or None"""
+        with self._lock:
+            return self.version if self._is_fresh() else None
+
+    def get(self):
+        """Return a copy of the cached records, or None if empty/expired"""
+        with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                # Hand out dicts so callers can edit records freely
+                return [r.to_dict() for r in self._records]
+            self.misses += 1
+            return None
+
+    def get_stale(self):
+        """Copy of the last loaded records even if expired, or None"""
+        with self._lock:
+            if self._records is None:
+                return None
+            return [r.to_dict() for r in self._records]
+
+    def get_row(self, row_number):
+        """Copy of the cached record on a sheet row, or None"""
+        with self._lock:
+            index = row_number - 2
+            if self._is_fresh() and 0 <= index < len(self._records):
+                return self._records[index].to_dict()
+            return None
+
+    def get_rows(self, row_numbers):
+        """Copies of the cached records on several sheet rows, or None if empty/expired"""
+        with self._lock:
+            if not self._is_fresh():
+                return None
+            return [self._records[r - 2].to_dict() for r in row_numbers if 0 <= r - 2 < len(self._records)]
+
+    def get_slice(self, start, stop):
+        """(copies of records[start:stop], total count), or None if empty/expired"""
+        with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                return [r.to_dict() for r in self._records[start:stop]], len(self._records)
+            self.misses += 1
+            return None
+
+    def count(self):
+        """Number of cached records, or None if nothing is loaded"""
+        with self._lock:
+            return len(self._records) if self._records is not None else None
+
+    def set(self, records):
+        """Store a fresh full read of the sheet and rebuild views"""
+        with self._lock:
+            self._records = [r if isinstance(r, FeeRecord) else FeeRecord.from_dict(r) for r in records]
+            self._loaded_at = time.monotonic()
+            self.version += 1
+            for view in self.views:
+                view.rebuild(self._records)
+
+    def touch(self):
+        """Storage is unchanged - keep serving the loaded records for another TTL"""
+        with self._lock:
+            if self._records is not None:
+                self._loaded_at = time.monotonic()
+
+    def merge(self, records, max_changed_ratio=0.5):
+        """Apply a fresh full read as row-level changes to records and views.
+
+        Returns the number of rows that differed. Falls back to a full rebuild
+        when nothing is loaded or most rows changed (e.g. rows were inserted
+        near the top, shifting everything below).
+        """
+        with self._lock:
+            old = self._records
+            new = [FeeRecord.from_dict(r) for r in records]
+            if old is None:
+                self.set(new)
+                return len(new)
+            common = min(len(old), len(new))
+            changed = [i for i in range(common) if old[i] != new[i]]
+            diff_count = len(changed) + abs(len(old) - len(new))
+            if diff_count > max(len(old), len(new)) * max_changed_ratio:
+                self.set(new)
+                return diff_count
+            if diff_count:
+                self.version += 1
+
+            for i in changed:
+                previous, self._records[i] = old[i], new[i]
+                for view in self.views:
+                    view.on_update(i + 2, previous, new[i])
+            # Rows removed at the end, bottom first so row numbers stay valid
+            for i in range(len(old) - 1, len(new) - 1, -1):
+                removed = self._records.pop(i)
+                for view in self.views:
+                    view.on_delete(i + 2, removed)
+            if len(new) > common:
+                added = new[common:]
+                self._records.extend(added)
+                for view in self.views:
+                    view.on_append(common + 2, added)
+            self._loaded_at = time.monotonic()
+            return diff_count
+
+    def invalidate(self):
+        """Drop cached records - the next read reloads from storage"""
+        with self._lock:
+            self._records = None
+            self._loaded_at = 0.0
+            self.invalidations += 1
+            self.version += 1
+
+    # ----- write-through -----
+
+    def apply_update(self, row_number, record):
+        """Mirror a successful single-row update"""
+        with self._lock:
+            index = row_number - 2
+            if self._records is None or not 0 <= index < len(self._records):
+                self.invalidate()
+                return
+            old = self._records[index]
+            self._records[index] = FeeRecord.from_dict(record)
+            self.version += 1
+            for view in self.views:
+                view.on_update(row_number, old, self._records[index])
+
+    def apply_append(self, records):
+        """Mirror a successful append of records after the last row"""
+        with self._lock:
+            if self._records is None:
+                return
+            start_row = len(self._records) + 2
+            added = [FeeRecord.from_dict(r) for r in records]
+            self._records.extend(added)
+            self.version += 1
+            for view in self.views:
+                view.on_append(start_row, added)
+
+    def apply_delete(self, row_number):
+        """Mirror a successful row delete (rows below shift up)"""
+        with self._lock:
+            index = row_number - 2
+            if self._records is None or not 0 <= index < len(self._records):
+                self.invalidate()
+                return
+            old = self._records.pop(index)
+            self.version += 1
+            for view in self.views:
+                view.on_delete(row_number, old)
+
+    def stats(self):
+        """Hit/miss counters for debugging"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'cached_records': len(self._records) if self._records is not None else 0,
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._records is not None else None,
+                'ttl_seconds': self.ttl,
+                'version': self.version
+            }
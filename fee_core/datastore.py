@@ -0,0 +1,497 @@
+"""
+Student Fee Management System - Data Store
+Storage backend + record cache + row index behind one object, shared by the
+local server and the Vercel API so both make targeted single-row writes.
+"""
+
+import functools
+import hashlib
+import threading
+import uuid
+
+from fee_core import timing
+from fee_core.aggregates import FeeAggregates
+from fee_core.cache import RecordCache
+from fee_core.pagination import InvalidCursor, SortedRecords
+from fee_core.records import normalize_record
+from fee_core.row_index import RowIndex, record_key
+from fee_core.search import SearchIndex
+from fee_core.students import StudentTable
+
+
+class DataStore:
+    """What the routes talk to - every method returns a value, never raises"""
+
+    def __init__(self, backend, ttl=60, write_queue=None):
+        self.backend = backend
+        # Optional WriteBehindQueue - row updates/appends are batched instead of sent one by one
+        self.write_queue = write_queue
+        self.row_index = RowIndex()
+        self.search_index = SearchIndex()
+        self.aggregates = FeeAggregates()
+        self.sorted_records = SortedRecords()
+        self.students = StudentTable()
+        # Versions restart with the process, so ETags carry an instance tag too
+        self._instance = uuid.uuid4().hex[:8]
+        # Change token storage had when the cache was last synced
+        self._sync_token = None
+        self.sync_stats = {'full_loads': 0, 'merges': 0, 'rows_changed': 0, 'unchanged': 0, 'background_warms': 0}
+        # A cold page read starts a full load in the background, so the next request is served from memory
+        self.warm_on_page = True
+        self._warming = threading.Lock()
+        self.cache = RecordCache(ttl=ttl, views=[self.row_index, self.search_index, self.aggregates,
+                                                 self.sorted_records, self.students])
+        if write_queue is not None:
+            # Writes the queue gives up on never reached storage - stop serving them
+            write_queue.on_drop = self.cache.invalidate
+
+    def _sync(self):
+        """Push queued writes before reading from (or deleting in) storage"""
+        if self.write_queue is None:
+            return True
+        with timing.phase('write'):
+            return self.write_queue.flush()
+
+    def _refresh(self):
+        """Bring the in-memory replica up to date with storage.
+
+        A cheap change token (Drive modifiedTime, file mtime) is checked first:
+        unchanged storage costs one metadata call; changed storage is re-read
+        and only the rows that differ are applied to the cache and its views.
+        """
+        token = None
+        try:
+            with timing.phase('fetch'):
+                token = self.backend.change_token()
+        except Exception as e:
+            print(f"Error checking {self.backend.name} for changes: {e}")
+
+        if token is not None and token == self._sync_token and self.cache.count() is not None:
+            self.cache.touch()
+            self.sync_stats['unchanged'] += 1
+            return
+
+        # Token taken before the read, so edits made meanwhile show up next time
+        with timing.phase('fetch'):
+            records = self.backend.read_all()
+        timing.count_rows('fetched', len(records))
+        with timing.phase('parse'):
+            if self.cache.count() is None:
+                self.cache.set(records)
+                self.sync_stats['full_loads'] += 1
+            else:
+                self.sync_stats['rows_changed'] += self.cache.merge(records)
+                self.sync_stats['merges'] += 1
+        self._sync_token = token
+
+    def _check_sync(self):
+        """Before a row-targeted write: True while cached row numbers still match storage.
+
+        Row numbers come from a cache up to a TTL old, and staff may insert,
+        delete or sort rows in the Sheets UI meanwhile. When the change token
+        has moved (or the engine can't tell), queued writes are flushed and
+        storage is merged into the cache; False then tells the caller to look
+        its rows up again. None when storage can't be reached.
+        """
+        try:
+            with timing.phase('fetch'):
+                token = self.backend.change_token()
+        except Exception as e:
+            print(f"Error checking {self.backend.name} for changes: {e}")
+            token = None
+        if token is not None and token == self._sync_token:
+            return True
+        if not self._sync():
+            return None
+        try:
+            self._refresh()
+        except Exception as e:
+            print(f"Error reading {self.backend.name} data: {e}")
+            return None
+        return False
+
+    def _current_row(self, row_number, cached):
+        """Row now holding `cached` (the record the cache had on `row_number`), or None if it is gone"""
+        in_sync = self._check_sync()
+        if in_sync is None:
+            return None
+        if in_sync:
+            return row_number
+        key = record_key(cached.get('Student Name'), cached.get('Father Name'), cached.get('Month'))
+        now = self.cache.get_row(row_number)
+        if now is not None and record_key(now.get('Student Name'), now.get('Father Name'), now.get('Month')) == key:
+            return row_number
+        return self.row_index.find(*key)
+
+    def _wrote(self):
+        """Our own write moved the change token - take the new one so the next write needn't re-read.
+
+        Only called right after a _check_sync, so the window in which an edit
+        made by someone else could be taken for ours is the write itself.
+        """
+        try:
+            with timing.phase('fetch'):
+                self._sync_token = self.backend.change_token()
+        except Exception as e:
+            print(f"Error checking {self.backend.name} for changes: {e}")
+            self._sync_token = None
+
+    # ----- reads -----
+
+    def read_all(self):
+        """All records (served from cache when fresh)"""
+        cached = self.cache.get()
+        if cached is not None:
+            return cached
+        
+        self._sync()
+        try:
+            self._refresh()
+            return self.cache.get_stale()
+        except Exception as e:
+            print(f"Error reading {self.backend.name} data: {e}")
+            # Better slightly old data than an empty table while the quota recovers
+            stale = self.cache.get_stale()
+            return stale if stale is not None else []
+
+    def ensure_loaded(self):
+        """Load the cache (and row index) if it has expired"""
+        if not self.cache.is_fresh():
+            self.read_all()
+        return self.cache.is_fresh()
+
+    def find_row(self, student_name, father_name, month):
+        """Row number for a student's month (1-indexed, includes header)"""
+        try:
+            if self.ensure_loaded():
+                return self.row_index.find(student_name, father_name, month)
+            with timing.phase('fetch'):
+                return self.backend.find_row(str(student_name).strip(), str(father_name or '').strip(),
+                                             str(month).strip())
+        except Exception as e:
+            print(f"Error finding row: {e}")
+            return None
+
+    def find_receipt_row(self, receipt_number):
+        """Row number already using a receipt number, or None"""
+        try:
+            if self.ensure_loaded():
+                return self.row_index.find_receipt(receipt_number)
+            with timing.phase('fetch'):
+                results = self.backend.query({'Receipt Number': receipt_number})
+            return results[0][0] if results else None
+        except Exception as e:
+            print(f"Error finding receipt: {e}")
+            return None
+
+    def receipts_in_storage(self, receipts):
+        """Receipt numbers (lowercase) already saved in storage, whatever the cache says.
+
+        Catches numbers another server wrote after our cache was loaded; the
+        cache (find_receipt_row) still covers our own writes that are queued.
+        """
+        try:
+            with timing.phase('fetch'):
+                return self.backend.receipts_in_use(receipts)
+        except Exception as e:
+            print(f"Error checking receipts in {self.backend.name}: {e}")
+            return set()
+
+    def search(self, query, fields=None):
+        """Ranked substring search via the in-memory index"""
+        if self.ensure_loaded():
+            return self.search_index.search(query, fields)
+        # Storage unreachable - nothing to search
+        return []
+
+    def read_page(self, offset, limit):
+        """(records, total) for one page in sheet order.
+
+        Sliced from the cache when warm. Otherwise only that range is fetched
+        from storage - with the stale cache's count as the total, when there
+        is one - and a full load starts in the background, so this request
+        stays fast and the following ones are served from memory (with ETags).
+        """
+        cached = self.cache.get_slice(offset, offset + limit)
+        if cached is not None:
+            return cached
+        self._sync()
+        try:
+            with timing.phase('fetch'):
+                records, total = self.backend.read_page(offset, limit, total=self.cache.count())
+            timing.count_rows('fetched', len(records))
+        except Exception as e:
+            print(f"Error reading page from {self.backend.name}: {e}")
+            return [], 0
+        if self.warm_on_page:
+            self._warm_in_background()
+        return records, total
+
+    def _warm_in_background(self):
+        """Load the cache on a background thread, unless a load is already running"""
+        if not self._warming.acquire(blocking=False):
+            return
+
+        def warm():
+            try:
+                self.read_all()
+                self.sync_stats['background_warms'] += 1
+            finally:
+                self._warming.release()
+        threading.Thread(target=warm, name='cache-warm', daemon=True).start()
+
+    def page_sorted(self, cursor=None, limit=50, predicate=None):
+        """Keyset page ordered by student then month: (records, next_cursor).
+
+        Returns None when the cursor is malformed.
+        """
+        if not self.ensure_loaded():
+            return [], None
+        try:
+            return self.sorted_records.page(cursor, limit, predicate)
+        except InvalidCursor:
+            return None
+
+    def records_by_student(self):
+        """Every record ordered by student then month, without copying each one"""
+        if self.ensure_loaded():
+            return self.sorted_records.snapshot()
+        return []
+
+    def find_student(self, student_name, father_name=None):
+        """Student number for a name + father, or None.
+
+        With no father given, `student_name` is a legacy 'name_father' key.
+        """
+        if not self.ensure_loaded():
+            return None
+        if father_name is None:
+            key = self.students.resolve(student_name)
+            return self.students.find(*key) if key else None
+        return self.students.find(student_name, father_name)
+
+    def student_records(self, number):
+        """(student info, that student's records in sheet order) - O(months), or None"""
+        if not self.ensure_loaded():
+            return None
+        info = self.students.info(number)
+        records = self.cache.get_rows(self.students.rows(number)) if info else None
+        if not records:
+            return None
+        return info, records
+
+    def unique_students(self):
+        """Student ID, name, father and mobile of every student"""
+        if self.ensure_loaded():
+            return self.students.all()
+        return []
+
+    def summary(self):
+        """Dashboard counters from the maintained aggregates"""
+        self.ensure_loaded()
+        return self.aggregates.summary()
+
+    def defaulters(self, min_months=1):
+        """Students with `min_months`+ unpaid months, most unpaid first"""
+        self.ensure_loaded()
+        defaulters = self.aggregates.defaulters(min_months)
+        # Same ID and mobile as the student's profile
+        for entry in defaulters:
+            info = self.students.info(self.students.find(entry['student_name'], entry['father_name']))
+            entry['student_id'] = info['student_id'] if info else ''
+            entry['mobile_number'] = info['mobile'] if info else ''
+        return defaulters
+
+    def get_record(self, row_number):
+        """Current record on a sheet row (from cache when possible)"""
+        record = self.cache.get_row(row_number)
+        if record is None:
+            self._sync()
+            try:
+                with timing.phase('fetch'):
+                    record = self.backend.get_row(row_number)
+            except Exception as e:
+                print(f"Error reading row {row_number}: {e}")
+        return record
+
+    def etag(self, *parts):
+        """Strong ETag for a response built now from `parts` (path, params), or None.
+
+        Changes whenever the cached data does. None while the cache is cold:
+        the response then has to be built anyway, so it goes out untagged.
+        """
+        version = self.cache.fresh_version()
+        if version is None:
+            return None
+        digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+        return f'{self._instance}-{version}-{digest}'
+
+    def conditional_get(self, view):
+        """Flask view decorator: tag a read endpoint with an ETag and answer a
+        matching If-None-Match with 304.
+
+        The tag covers the data version and the query, so an unchanged dashboard
+        reload skips building and serialising the JSON entirely.
+        """
+        from flask import current_app, request
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = self.etag(request.path, sorted(request.args.items(multi=True)))
+            if etag is not None and request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if etag is None or response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Browsers may keep the body but must revalidate before using it
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+
+    # ----- writes -----
+
+    def save_all(self, records):
+        """Rewrite everything - USE SPARINGLY!"""
+        if not self._sync():
+            return False
+        try:
+            with timing.phase('write'):
+                self.backend.save_all(records)
+            timing.count_rows('written', len(records))
+            self.cache.set([normalize_record(r) for r in records])
+            return True
+        except Exception as e:
+            print(f"Error saving {self.backend.name} data: {e}")
+            self.cache.invalidate()
+            return False
+
+    def update_row(self, row_number, record):
+        """Overwrite one row (single API call, or queued for the next batch).
+
+        `row_number` is checked against storage first: if rows moved since the
+        cache was loaded, the write goes to wherever that record is now.
+        """
+        old = self.cache.get_row(row_number)
+        if old is not None:
+            # A cold cache means the row number was just looked up in storage itself
+            row_number = self._current_row(row_number, old)
+            if row_number is None:
+                print("Not updating: the row is no longer in storage or storage is unreachable")
+                return False
+            old = self.cache.get_row(row_number)
+        if self.write_queue is not None:
+            # Identity of the row being overwritten, so a replay after restart finds it again
+            key = record_key(old.get('Student Name'), old.get('Father Name'), old.get('Month')) if old else None
+            self.cache.apply_update(row_number, normalize_record(record))
+            self.write_queue.update(row_number, normalize_record(record), key)
+            return True
+        try:
+            with timing.phase('write'):
+                self.backend.update_row(row_number, record)
+            timing.count_rows('written', 1)
+            self.cache.apply_update(row_number, normalize_record(record))
+            if old is not None:
+                self._wrote()
+            return True
+        except Exception as e:
+            print(f"Error updating row in {self.backend.name}: {e}")
+            self.cache.invalidate()
+            return False
+
+    def update_student(self, number, fields):
+        """Set columns ({header: value}) on every fee row of one student in one write.
+
+        Returns the number of rows updated (0 if the student is unknown), or
+        None on failure. Other rows and columns are never touched.
+        """
+        if not self.ensure_loaded():
+            return None
+        info = self.students.info(number)
+        if info is None:
+            return 0
+        # Queued full-row writes go first so they can't put the old values back
+        if not self._sync():
+            return None
+        in_sync = self._check_sync()
+        if in_sync is None:
+            return None
+        if not in_sync:
+            # Rows moved (or the table was rebuilt) - find the student again
+            number = self.students.find(info['name'], info['father'])
+        row_numbers = self.students.rows(number) if number is not None else []
+        if not row_numbers:
+            return 0
+        try:
+            with timing.phase('write'):
+                self.backend.update_fields(row_numbers, fields)
+            timing.count_rows('written', len(row_numbers))
+            self._wrote()
+        except Exception as e:
+            print(f"Error updating student in {self.backend.name}: {e}")
+            self.cache.invalidate()
+            return None
+        for row_number in row_numbers:
+            record = self.cache.get_row(row_number)
+            if record is None:
+                self.cache.invalidate()
+                break
+            record.update(fields)
+            self.cache.apply_update(row_number, record)
+        return len(row_numbers)
+
+    def delete_row(self, row_number):
+        """Delete one row (single API call) - the row holding the record the cache has there"""
+        # Queued writes go first - deleting shifts the rows they point at
+        if not self._sync():
+            return False
+        old = self.cache.get_row(row_number)
+        if old is not None:
+            row_number = self._current_row(row_number, old)
+            if row_number is None:
+                print("Not deleting: the row is no longer in storage or storage is unreachable")
+                return False
+        try:
+            with timing.phase('write'):
+                self.backend.delete_row(row_number)
+            timing.count_rows('written', 1)
+            self.cache.apply_delete(row_number)
+            if old is not None:
+                self._wrote()
+            return True
+        except Exception as e:
+            print(f"Error deleting row in {self.backend.name}: {e}")
+            self.cache.invalidate()
+            return False
+
+    def append_rows(self, records):
+        """Append records in one batch (single API call, or queued for the next batch)"""
+        if self.write_queue is not None:
+            records = [normalize_record(r) for r in records]
+            count = self.cache.count()
+            self.cache.apply_append(records)
+            self.write_queue.append(records, count + 2 if count is not None else None)
+            return True
+        try:
+            with timing.phase('write'):
+                self.backend.append_rows(records)
+            timing.count_rows('written', len(records))
+            self.cache.apply_append([normalize_record(r) for r in records])
+            return True
+        except Exception as e:
+            print(f"Error appending rows to {self.backend.name}: {e}")
+            self.cache.invalidate()
+            return False
+
+    def stats(self):
+        """Cache and index counters for debugging"""
+        stats = self.cache.stats()
+        stats['indexed_records'] = len(self.row_index)
+        stats['students'] = len(self.students)
+        stats['storage_backend'] = self.backend.name
+        stats.update(self.backend.stats())
+        stats['sync'] = dict(self.sync_stats)
+        if self.write_queue is not None:
+            stats['write_queue'] = self.write_queue.stats()
+        return stats
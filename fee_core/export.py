@@ -0,0 +1,147 @@
+"""
+Student Fee Management System - Excel Export
+Streams fee records into an .xlsx with openpyxl's write-only mode.
+
+Rows are written as they are produced and every cell points at one of a few
+shared named styles, so memory stays flat no matter how many students or
+months are exported.
+"""
+
+from fee_core.records import HEADERS, month_order
+
+PIVOT_SHEET = 'Fee Records'
+MAX_COLUMN_WIDTH = 30
+
+STYLE_HEADER = 'fee_header'
+STYLE_CELL = 'fee_cell'
+STYLE_PAID = 'fee_paid'
+STYLE_UNPAID = 'fee_unpaid'
+
+
+def _register_styles(workbook):
+    """Add the shared named styles once per workbook"""
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+    side = Side(style='thin')
+    border = Border(left=side, right=side, top=side, bottom=side)
+    center = Alignment(horizontal='center', vertical='center')
+
+    def solid(color):
+        return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+    for style in (
+        NamedStyle(STYLE_HEADER, font=Font(color='FFFFFF', bold=True), fill=solid('4F46E5'),
+                   border=border, alignment=center),
+        NamedStyle(STYLE_CELL, border=border, alignment=center),
+        NamedStyle(STYLE_PAID, font=Font(color='006600'), fill=solid('CCFFCC'),
+                   border=border, alignment=center),
+        NamedStyle(STYLE_UNPAID, font=Font(color='CC0000', bold=True), fill=solid('FFCCCC'),
+                   border=border, alignment=center),
+    ):
+        workbook.add_named_style(style)
+
+
+def _styled_row(worksheet, values, style_for):
+    from openpyxl.cell import WriteOnlyCell
+
+    row = []
+    for idx, value in enumerate(values):
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.style = style_for(idx, value)
+        row.append(cell)
+    return row
+
+
+def _set_widths(worksheet, widths):
+    from openpyxl.utils import get_column_letter
+
+    # Write-only sheets need column sizes before the first row is written
+    for idx, width in enumerate(widths, 1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+
+def status_cell(record):
+    """Text shown in a month column of the pivot"""
+    if record.paid:
+        return f"Paid ({record.receipt})" if record.receipt else "Paid"
+    return "Not Paid"
+
+
+def _student_rows(records):
+    """Group records sorted by student into (name, father, {month: cell}).
+
+    Only one student's months are held at a time.
+    """
+    group_key = None
+    group = {}
+    for record in records:
+        name, father = record.student_name, record.father_name
+        key = (name.lower(), father.lower())
+        if key != group_key:
+            yield from group.values()
+            group_key, group = key, {}
+        # Same student spelled with different case stays a separate row, as before
+        entry = group.setdefault((name, father), (name, father, {}))
+        entry[2][record.month_label] = status_cell(record)
+    yield from group.values()
+
+
+def write_pivot(records, output):
+    """Write one row per student and one column per month (most recent first).
+
+    `records` must be ordered by student (see pagination.sort_key) and may be
+    iterated twice; returns the number of student rows written.
+    """
+    from openpyxl import Workbook
+
+    # Pass 1: month columns and column widths
+    widths = {}
+    name_width, father_width = len('Student Name'), len('Father Name')
+    for name, father, cells in _student_rows(records):
+        name_width = max(name_width, len(str(name)))
+        father_width = max(father_width, len(str(father)))
+        for month, value in cells.items():
+            widths[month] = max(widths.get(month, len(str(month))), len(value))
+    sorted_months = sorted(widths, key=lambda m: (month_order(m), m), reverse=True)
+    month_widths = [widths[month] for month in sorted_months]
+
+    workbook = Workbook(write_only=True)
+    _register_styles(workbook)
+    worksheet = workbook.create_sheet(PIVOT_SHEET)
+    _set_widths(worksheet, [name_width, father_width] + month_widths)
+    worksheet.row_dimensions[1].height = 25
+
+    worksheet.append(_styled_row(worksheet, ['Student Name', 'Father Name'] + sorted_months,
+                                 lambda idx, value: STYLE_HEADER))
+
+    def month_style(idx, value):
+        if idx < 2:
+            return STYLE_CELL
+        if 'Not Paid' in value:
+            return STYLE_UNPAID
+        if 'Paid' in value:
+            return STYLE_PAID
+        return STYLE_CELL
+
+    # Pass 2: stream the rows
+    written = 0
+    for name, father, cells in _student_rows(records):
+        values = [name, father] + [cells.get(month, '-') for month in sorted_months]
+        worksheet.append(_styled_row(worksheet, values, month_style))
+        written += 1
+
+    workbook.save(output)
+    return written
+
+
+def write_table(records, output, headers=HEADERS):
+    """Write records as a flat table, one row per record"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    _register_styles(workbook)
+    worksheet = workbook.create_sheet(PIVOT_SHEET)
+    worksheet.append(_styled_row(worksheet, list(headers), lambda idx, value: STYLE_HEADER))
+    for record in records:
+        worksheet.append([record.get(header, '') for header in headers])
+    workbook.save(output)
@@ -0,0 +1,222 @@
+"""
+Student Fee Management System - Excel Import
+Turns an uploaded sheet (vertical or horizontal layout) into fee records
+using column-wise pandas operations instead of per-row Python loops.
+"""
+
+import csv
+import os
+import re
+
+import pandas as pd
+
+from fee_core.records import HEADERS
+
+# Month column headers: "Jan-26", "Jan/2026", "January 2026", "01-26"
+MONTH_HEADER_PATTERN = re.compile(
+    r'^(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[-/]?\d{2,4}'
+    r'|(?:january|february|march|april|may|june|july|august|september|october|november|december)\s*\d{2,4}'
+    r'|\d{1,2}[-/]\d{2,4})$'
+)
+SHORT_MONTH_PATTERN = re.compile(r'^(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[-/]?(\d{2,4})$')
+
+# Receipt inside a pivot cell: "Paid (RCP-0126-001)"
+RECEIPT_PATTERN = re.compile(r'\(([^)]+)\)')
+
+MONTH_ABBR_TO_FULL = {
+    'jan': 'January', 'feb': 'February', 'mar': 'March', 'apr': 'April',
+    'may': 'May', 'jun': 'June', 'jul': 'July', 'aug': 'August',
+    'sep': 'September', 'oct': 'October', 'nov': 'November', 'dec': 'December'
+}
+
+STANDARD_COLUMNS = {
+    'student id': 'Student ID',
+    'id': 'Student ID',
+    'roll no': 'Student ID',
+    'student name': 'Student Name',
+    'name': 'Student Name',
+    'father name': 'Father Name',
+    'father\'s name': 'Father Name',
+    'father': 'Father Name',
+    'mobile': 'Mobile Number',
+    'mobile number': 'Mobile Number',
+    'phone': 'Mobile Number',
+    'phone number': 'Mobile Number',
+    'contact': 'Mobile Number',
+    'month': 'Month',
+    'fee status': 'Fee Status',
+    'status': 'Fee Status',
+    'receipt number': 'Receipt Number',
+    'receipt': 'Receipt Number',
+    'receipt no': 'Receipt Number'
+}
+
+
+def is_vertical(columns):
+    """Vertical sheets have Month / Fee Status / Receipt Number columns"""
+    return any(str(col).lower().strip() in ['month', 'fee status', 'receipt number'] for col in columns)
+
+
+def month_from_header(header):
+    """'Jan-26' -> 'January 2026'; anything else is kept as written"""
+    header = str(header).strip()
+    match = SHORT_MONTH_PATTERN.match(header.lower())
+    if not match:
+        return header
+    abbr, year = match.groups()
+    if len(year) == 2:
+        year = '20' + year
+    return f"{MONTH_ABBR_TO_FULL[abbr]} {year}"
+
+
+def normalize_vertical(df):
+    """Rename known column spellings and keep the standard columns in order"""
+    mapping = {}
+    for col in df.columns:
+        standard = STANDARD_COLUMNS.get(str(col).lower().strip())
+        if standard:
+            mapping[col] = standard
+    df = df.rename(columns=mapping)
+    df = df.loc[:, ~df.columns.duplicated()]
+    return df.reindex(columns=HEADERS)
+
+
+def horizontal_to_vertical(df):
+    """Melt a months-as-columns sheet into one row per student per month.
+
+    Cells reading "Paid (RCP-...)" become Paid with that receipt; anything
+    else becomes Not Paid. Output keeps the sheet's row order.
+    """
+    lowered = pd.Index([str(col).lower().strip() for col in df.columns])
+    is_month = lowered.str.match(MONTH_HEADER_PATTERN)
+    month_cols = list(df.columns[is_month])
+
+    # Student columns: the last matching column wins, as in the old importer
+    info_cols = {}
+    for col, col_lower in zip(df.columns[~is_month], lowered[~is_month]):
+        if 'father' in col_lower:
+            info_cols['Father Name'] = col
+        elif 'name' in col_lower:
+            info_cols['Student Name'] = col
+        elif STANDARD_COLUMNS.get(col_lower) in ('Student ID', 'Mobile Number'):
+            info_cols[STANDARD_COLUMNS[col_lower]] = col
+
+    info = pd.DataFrame({field: df[col] for field, col in info_cols.items()}, index=df.index)
+    cells = df[month_cols].rename(columns={col: month_from_header(col) for col in month_cols})
+    melted = (
+        info.join(cells)
+        .melt(id_vars=list(info.columns), var_name='Month', value_name='_cell', ignore_index=False)
+        .sort_index(kind='stable')  # student by student, months in sheet order
+        .reset_index(drop=True)
+    )
+
+    cell = melted.pop('_cell').fillna('').astype(str).str.strip()
+    paid = cell.str.lower().str.startswith('paid')
+    melted['Fee Status'] = paid.map({True: 'Paid', False: 'Not Paid'})
+    melted['Receipt Number'] = cell.str.extract(RECEIPT_PATTERN, expand=False).where(paid, '')
+    return melted.reindex(columns=HEADERS)
+
+
+def column_to_strings(series):
+    """Stringify a column: dates become 'Month YYYY', whole floats lose '.0', blanks become ''"""
+    missing = series.isna()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = series.dt.strftime('%B %Y')
+    elif pd.api.types.is_float_dtype(series) and (series[~missing] % 1 == 0).all():
+        # Numeric IDs / mobile numbers read as floats because of blank cells
+        text = series.astype('Int64').astype(str)
+    else:
+        text = series.astype(str)
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+        if kind in ('datetime', 'datetime64', 'date', 'mixed'):
+            is_date = ~missing
+            if kind == 'mixed':
+                # Only real date cells - not strings that happen to parse as dates
+                is_date &= series.map(lambda v: hasattr(v, 'strftime'))
+            dates = pd.to_datetime(series.where(is_date), errors='coerce')
+            text = text.mask(dates.notna(), dates.dt.strftime('%B %Y'))
+    return text.mask(missing, '')
+
+
+def dataframe_to_records(df):
+    """Parse an uploaded sheet into fee records (dicts keyed by HEADERS)"""
+    # Column names may be dates in a pivoted sheet
+    df.columns = [col if isinstance(col, str) else
+                  (col.strftime('%b-%y') if hasattr(col, 'strftime') else str(col)) for col in df.columns]
+    df = normalize_vertical(df) if is_vertical(df.columns) else horizontal_to_vertical(df)
+    df = df.apply(column_to_strings)
+    return df.to_dict('records')
+
+
+def read_upload(file):
+    """Read an uploaded Excel or CSV file into fee records"""
+    if str(getattr(file, 'filename', '')).lower().endswith('.csv'):
+        return dataframe_to_records(pd.read_csv(file, dtype=str))
+    return dataframe_to_records(pd.read_excel(file))
+
+
+# ----- streaming ingestion -----
+
+def _iter_sheet_rows(path):
+    """Yield the header row then data rows without loading the whole file"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f)
+    elif ext == '.xls':
+        # Legacy format - openpyxl cannot read it lazily
+        df = pd.read_excel(path, header=None, dtype=object)
+        yield from df.itertuples(index=False, name=None)
+    else:
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+
+def count_data_rows(path):
+    """Data rows in an upload (best effort, for progress), or None"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == '.csv':
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+        if ext == '.xlsx':
+            from openpyxl import load_workbook
+            workbook = load_workbook(path, read_only=True)
+            try:
+                max_row = workbook.active.max_row
+            finally:
+                workbook.close()
+            return max(max_row - 1, 0) if max_row else None
+    except Exception as e:
+        print(f"Error counting upload rows: {e}")
+    return None
+
+
+def iter_record_chunks(path, chunk_rows=1000):
+    """Yield (sheet rows read, fee records) for each chunk of an uploaded file"""
+    rows = _iter_sheet_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    header = [f'Column {idx + 1}' if col is None else col for idx, col in enumerate(header)]
+
+    def parse(chunk):
+        # Pad / trim CSV rows to the header width
+        width = len(header)
+        chunk = [(list(row) + [None] * width)[:width] for row in chunk]
+        return dataframe_to_records(pd.DataFrame(chunk, columns=header, dtype=object))
+
+    chunk = []
+    for row in rows:
+        if not any(value not in (None, '') for value in row):
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield len(chunk), parse(chunk)
+            chunk = []
+    if chunk:
+        yield len(chunk), parse(chunk)
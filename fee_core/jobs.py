@@ -0,0 +1,151 @@
+"""
+Student Fee Management System - Import Jobs
+Background ingestion of uploaded files with progress tracking.
+
+An upload is saved to a temp file and read in chunks; each chunk is checked
+against the row and receipt indexes and appended to storage in one call, so a
+large year-end import neither holds a request open nor loads the whole file.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+from fee_core.importer import count_data_rows, iter_record_chunks
+from fee_core.row_index import receipt_key, record_key
+
+MAX_ERROR_MESSAGES = 10
+
+
+class ImportJob:
+    """Progress of one streaming import"""
+
+    def __init__(self, filename):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = 'queued'  # queued -> running -> done | failed
+        self.total_rows = None
+        self.processed_rows = 0
+        self.added = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.errors = []
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def note(self, message):
+        if len(self.errors) < MAX_ERROR_MESSAGES:
+            self.errors.append(message)
+
+    def to_dict(self):
+        progress = None
+        if self.status == 'done':
+            progress = 100
+        elif self.total_rows:
+            progress = min(99, int(self.processed_rows * 100 / self.total_rows))
+        return {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'progress': progress,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'added': self.added,
+            'skipped': self.skipped,
+            'chunks': self.chunks,
+            'errors': list(self.errors),
+            'error': self.error,
+            'elapsed_seconds': round((self.finished_at or time.time()) - self.created_at, 2)
+        }
+
+
+def ingest_file(job, store, path, chunk_rows=1000):
+    """Validate, dedup and append an uploaded file chunk by chunk"""
+    job.status = 'running'
+    job.total_rows = count_data_rows(path)
+    seen_keys = set()
+    seen_receipts = set()
+
+    for rows_read, records in iter_record_chunks(path, chunk_rows):
+        # Keep the indexes warm - every duplicate check below is a dict lookup
+        if not store.ensure_loaded():
+            raise ConnectionError(f'{store.backend.name} storage is not reachable')
+
+        to_add = []
+        for record in records:
+            name = record.get('Student Name', '').strip()
+            father = record.get('Father Name', '').strip()
+            month = record.get('Month', '').strip()
+            receipt = record.get('Receipt Number', '').strip()
+
+            if not all([name, month]):
+                job.skipped += 1
+                job.note("Skipped a row without student name or month")
+                continue
+
+            key = record_key(name, father, month)
+            if key in seen_keys or store.find_row(name, father, month):
+                job.skipped += 1
+                job.note(f"{name} already has record for {month}")
+                continue
+
+            if receipt and (receipt_key(receipt) in seen_receipts or store.find_receipt_row(receipt)):
+                job.skipped += 1
+                job.note(f"Receipt {receipt} already exists")
+                continue
+
+            seen_keys.add(key)
+            if receipt:
+                seen_receipts.add(receipt_key(receipt))
+            to_add.append(dict(record, **{'Student Name': name, 'Father Name': father, 'Month': month}))
+
+        # One append per chunk
+        if to_add and not store.append_rows(to_add):
+            raise IOError(f'Failed to save rows after {job.added} records were added')
+
+        job.added += len(to_add)
+        job.processed_rows += rows_read
+        job.chunks += 1
+
+
+class ImportJobs:
+    """Registry of recent import jobs, each run on its own thread"""
+
+    def __init__(self, max_jobs=50):
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def start(self, store, path, filename, chunk_rows=1000):
+        """Ingest `path` in the background; the file is deleted afterwards"""
+        job = ImportJob(filename)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs
+            finished = sorted((j for j in self._jobs.values() if j.finished_at), key=lambda j: j.finished_at)
+            for old in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[old.id]
+
+        def run():
+            try:
+                ingest_file(job, store, path, chunk_rows)
+                job.status = 'done'
+            except Exception as e:
+                print(f"Import job {job.id} failed: {e}")
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        threading.Thread(target=run, name=f'import-{job.id[:8]}', daemon=True).start()
+        return job
@@ -0,0 +1,109 @@
+"""
+Student Fee Management System - Record Model
+Compact in-memory form of a fee record, used by the record cache and its views.
+
+Names, IDs and mobiles are interned (they repeat on every month's row), the
+month is held as (year, month) integers and the status as an enum. The text
+written in the sheet is kept only when it differs from the canonical form, so
+converting back to a dict gives exactly what was read. Dicts are produced only
+when records leave the store for a response.
+"""
+
+import enum
+import sys
+
+from fee_core.records import HEADERS, MONTH_NAMES, month_order
+
+_intern = sys.intern
+
+# Sheet header -> FeeRecord attribute
+FIELD_ATTRS = {
+    'Student ID': 'student_id',
+    'Student Name': 'student_name',
+    'Father Name': 'father_name',
+    'Mobile Number': 'mobile',
+    'Month': 'month_label',
+    'Fee Status': 'status_label',
+    'Receipt Number': 'receipt'
+}
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def month_label(year, month):
+    """Canonical 'January 2026' text for a (year, month) pair, or ''"""
+    if year and 1 <= month <= 12:
+        return f"{MONTH_NAMES[month - 1]} {year}"
+    return ''
+
+
+class FeeStatus(enum.Enum):
+    PAID = 'Paid'
+    NOT_PAID = 'Not Paid'
+
+    @classmethod
+    def parse(cls, text):
+        return cls.PAID if text.lower() == 'paid' else cls.NOT_PAID
+
+
+class FeeRecord:
+    """One fee row (student + month) in compact form"""
+
+    __slots__ = ('student_id', 'student_name', 'father_name', 'mobile',
+                 'year', 'month', 'status', 'receipt', '_month_text', '_status_text')
+
+    @classmethod
+    def from_dict(cls, record):
+        self = cls.__new__(cls)
+        self.student_id = _intern(_text(record.get('Student ID')))
+        self.student_name = _intern(_text(record.get('Student Name')))
+        self.father_name = _intern(_text(record.get('Father Name')))
+        self.mobile = _intern(_text(record.get('Mobile Number')))
+
+        month_text = _text(record.get('Month'))
+        self.year, self.month = month_order(month_text)
+        self._month_text = None if month_text == month_label(self.year, self.month) else _intern(month_text)
+
+        status_text = _text(record.get('Fee Status'))
+        self.status = FeeStatus.parse(status_text)
+        self._status_text = None if status_text == self.status.value else _intern(status_text)
+
+        self.receipt = _text(record.get('Receipt Number'))
+        return self
+
+    @property
+    def month_label(self):
+        return self._month_text if self._month_text is not None else month_label(self.year, self.month)
+
+    @property
+    def status_label(self):
+        return self._status_text if self._status_text is not None else self.status.value
+
+    @property
+    def paid(self):
+        return self.status is FeeStatus.PAID
+
+    def _values(self):
+        return (self.student_id, self.student_name, self.father_name, self.mobile,
+                self.month_label, self.status_label, self.receipt)
+
+    def to_dict(self):
+        """JSON-ready dict keyed by the sheet headers"""
+        return dict(zip(HEADERS, self._values()))
+
+    def get(self, header, default=''):
+        """Read a field by sheet header, like a record dict"""
+        attr = FIELD_ATTRS.get(header)
+        return getattr(self, attr) if attr is not None else default
+
+    def __eq__(self, other):
+        if not isinstance(other, FeeRecord):
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"FeeRecord({self.student_name!r}, {self.father_name!r}, {self.month_label!r}, {self.status_label!r})"
@@ -0,0 +1,132 @@
+"""
+Student Fee Management System - Pagination
+Keyset (cursor) pagination over a stable student/month order.
+
+Cursors are opaque to the client: a base64 token holding the sort key of the
+last record on the page, so the next page starts with a binary search instead
+of re-filtering and slicing the whole dataset.
+"""
+
+import base64
+import bisect
+import json
+import threading
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def sort_key(record):
+    """Student name, father name, then month in calendar order"""
+    return (record.student_name.lower(), record.father_name.lower(),
+            record.year, record.month, record.month_label.lower())
+
+
+def encode_cursor(entry):
+    key, doc = entry
+    raw = json.dumps([list(key), doc], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+# sort_key() field types - a cursor of any other shape would fail the comparisons in bisect
+KEY_TYPES = (str, str, int, int, str)
+
+
+def _is(value, kind):
+    return isinstance(value, kind) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key, doc = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if (not isinstance(key, list) or len(key) != len(KEY_TYPES)
+            or not all(_is(value, kind) for value, kind in zip(key, KEY_TYPES)) or not _is(doc, int)):
+        raise InvalidCursor('Invalid cursor')
+    return (tuple(key), doc)
+
+
+class SortedRecords:
+    """Records kept sorted by sort_key() - a record-cache view"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._entries = []  # sorted [(sort_key, doc)]
+        self._docs = {}     # doc -> record
+        self._order = []    # doc ids in sheet row order
+        self._next_doc = 0
+
+    def _new_doc(self, record):
+        doc = self._next_doc
+        self._next_doc += 1
+        self._docs[doc] = record
+        return doc
+
+    def _remove_entry(self, doc):
+        entry = (sort_key(self._docs[doc]), doc)
+        idx = bisect.bisect_left(self._entries, entry)
+        if idx < len(self._entries) and self._entries[idx] == entry:
+            del self._entries[idx]
+
+    # ----- maintenance (called by RecordCache) -----
+
+    def rebuild(self, records):
+        with self._lock:
+            self._reset()
+            self._order = [self._new_doc(record) for record in records]
+            self._entries = sorted((sort_key(self._docs[doc]), doc) for doc in self._order)
+
+    def on_update(self, row_number, old_record, new_record):
+        with self._lock:
+            doc = self._order[row_number - 2]
+            self._remove_entry(doc)
+            self._docs[doc] = new_record
+            bisect.insort(self._entries, (sort_key(new_record), doc))
+
+    def on_append(self, start_row, records):
+        with self._lock:
+            for record in records:
+                doc = self._new_doc(record)
+                self._order.append(doc)
+                bisect.insort(self._entries, (sort_key(record), doc))
+
+    def on_delete(self, row_number, old_record):
+        with self._lock:
+            doc = self._order.pop(row_number - 2)
+            self._remove_entry(doc)
+            del self._docs[doc]
+
+    # ----- queries -----
+
+    def snapshot(self):
+        """Every record in sorted order (shared references - do not modify)"""
+        with self._lock:
+            return [self._docs[doc] for _, doc in self._entries]
+
+    def page(self, cursor=None, limit=50, predicate=None):
+        """Up to `limit` records after `cursor`; returns (records, next_cursor or None).
+
+        Without a predicate this is O(log N + limit). With one, records are
+        tested in order until the page is full.
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._entries, decode_cursor(cursor)) if cursor else 0
+            page = []
+            last = None
+            idx = start
+            while idx < len(self._entries) and len(page) < limit:
+                entry = self._entries[idx]
+                record = self._docs[entry[1]]
+                if predicate is None or predicate(record):
+                    page.append(record.to_dict())
+                    last = entry
+                idx += 1
+            # Only hand out a cursor if something could follow
+            has_more = idx < len(self._entries)
+            return page, (encode_cursor(last) if last is not None and has_more else None)
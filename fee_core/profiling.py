@@ -0,0 +1,250 @@
+"""
+Student Fee Management System - Request Profiling
+Opt-in cProfile of live requests, for finding out why a download or upload
+was slow in production.
+
+A request is profiled when PROFILE_REQUESTS is on (every request, kept only
+if slow) or when it carries an `X-Profile-Token` header matching
+PROFILE_TOKEN (kept whatever its speed). Kept profiles are pstats dumps in a
+directory holding only the most recent `keep` of them.
+
+Independently, every request slower than the threshold goes into the slow
+request log - route, params (personal values masked), rows handled and the
+phase breakdown from fee_core.timing - printed to the server log and kept in
+memory.
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from collections import deque
+
+from fee_core import timing
+
+TOKEN_HEADER = 'X-Profile-Token'
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls', 'ncalls')
+
+
+def _slug(route):
+    return re.sub(r'[^A-Za-z0-9]+', '-', route).strip('-') or 'root'
+
+
+class RequestProfiler:
+    """Profiles requests on demand and remembers the slow ones"""
+
+    def __init__(self, directory, keep=20, slow_ms=1000, always=False, token=None, log_size=100):
+        self.directory = directory
+        self.keep = keep
+        self.slow_ms = slow_ms
+        self.always = always
+        self.token = token or None
+        self._slow = deque(maxlen=log_size)
+        self._lock = threading.Lock()
+        # cProfile can't run two profiles at once on newer Pythons - concurrent requests go unprofiled
+        self._profiling = threading.Lock()
+        self.stats = {'profiled': 0, 'kept': 0, 'skipped_busy': 0, 'slow_requests': 0}
+
+    def authorized(self, headers):
+        """True when the request carries the admin profiling token"""
+        supplied = headers.get(TOKEN_HEADER)
+        return bool(self.token and supplied) and hmac.compare_digest(supplied, self.token)
+
+    def start(self, forced=False):
+        """A running cProfile.Profile for this request, or None"""
+        if not (self.always or forced):
+            return None
+        if not self._profiling.acquire(blocking=False):
+            self.stats['skipped_busy'] += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) already owns the hook
+            self._profiling.release()
+            return None
+        return profile
+
+    def abandon(self, profile):
+        """Stop a profile without keeping it"""
+        profile.disable()
+        self._profiling.release()
+
+    def finish(self, route, method, get_params, status, timer, profile=None, forced=False):
+        """Stop the request's profile, keep it if wanted and log the request if slow.
+
+        `get_params` is only called for slow requests. Returns the saved
+        profile's name, or None.
+        """
+        if profile is not None:
+            self.abandon(profile)
+            self.stats['profiled'] += 1
+        total_ms = timer.finish() * 1000
+        slow = total_ms >= self.slow_ms
+        name = None
+        if profile is not None and (slow or forced):
+            name = self._save(profile, route, total_ms)
+        if slow:
+            self._log(route, method, get_params(), status, timer, total_ms, name)
+        return name
+
+    # ----- profile ring -----
+
+    def _save(self, profile, route, total_ms):
+        # Sortable by time, so the ring drops the oldest
+        now = time.time_ns()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now // 10 ** 9))}-{now % 10 ** 9:09d}"
+        name = f"{stamp}-{_slug(route)}-{total_ms:.0f}ms.prof"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(os.path.join(self.directory, name))
+            self.stats['kept'] += 1
+            self._prune()
+            return name
+        except OSError as e:
+            print(f"Error saving request profile: {e}")
+            return None
+
+    def _prune(self):
+        with self._lock:
+            for old in self._names()[self.keep:]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+
+    def _names(self):
+        """Saved profile file names, newest first"""
+        try:
+            return sorted((f for f in os.listdir(self.directory) if f.endswith('.prof')), reverse=True)
+        except OSError:
+            return []
+
+    def profiles(self):
+        """Saved profiles, newest first: name, size and when they were taken"""
+        listing = []
+        for name in self._names():
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            listing.append({'name': name, 'bytes': stat.st_size,
+                            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stat.st_mtime))})
+        return listing
+
+    def profile_path(self, name):
+        """Path of a saved profile, or None - only names from the listing are accepted"""
+        if name not in self._names():
+            return None
+        return os.path.join(self.directory, name)
+
+    def report(self, name, sort='cumulative', limit=40):
+        """Top `limit` functions of a saved profile as pstats text, or None"""
+        path = self.profile_path(name)
+        if path is None:
+            return None
+        if sort not in SORT_KEYS:
+            sort = 'cumulative'
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    # ----- slow request log -----
+
+    def _log(self, route, method, params, status, timer, total_ms, profile_name):
+        entry = {
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'route': route,
+            'method': method,
+            'params': params,
+            'status': status,
+            'total_ms': round(total_ms, 2),
+            'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in timer.phases.items()},
+            'rows': dict(timer.rows),
+            'sheets_calls': dict(timer.calls),
+            'profile': profile_name
+        }
+        self._slow.append(entry)
+        self.stats['slow_requests'] += 1
+        print(f"Slow request: {json.dumps(entry)}")
+
+    def slow_requests(self):
+        """Recent slow requests, newest first"""
+        return list(reversed(self._slow))
+
+
+# Params that never carry personal data - every other value is masked in the log
+LOGGED_PARAMS = frozenset({'page', 'per_page', 'cursor', 'filter', 'format', 'mode', 'month', 'status',
+                           'fee_status', 'sort', 'min_months'})
+
+MASK = '***'
+
+
+def request_params(request, max_length=100):
+    """Keys of the query string, form fields and top-level JSON, for the slow request log.
+
+    Names, father names, mobiles, IDs and receipt numbers must not end up in
+    server logs, so only LOGGED_PARAMS keep their (shortened) values.
+    """
+    def shown(key, value):
+        if isinstance(value, list):
+            return f'[{len(value)} items]'
+        return str(value)[:max_length] if key in LOGGED_PARAMS else MASK
+
+    params = {key: shown(key, value) for key, value in request.args.items()}
+    params.update({key: shown(key, value) for key, value in request.form.items()})
+    if request.files:
+        params['files'] = f'[{len(request.files)} files]'
+    body = request.get_json(silent=True) if request.is_json else None
+    if isinstance(body, dict):
+        params.update({key: shown(key, value) for key, value in body.items()})
+    return params
+
+
+def instrument(app, profiler, exclude=('/api/profiles', '/api/metrics')):
+    """Profile a Flask app's requests on demand; call after timing.instrument().
+
+    Paths under `exclude` are never profiled, so reading the profiles back
+    doesn't push the interesting ones out of the ring.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def start_profile():
+        if request.url_rule is None or request.path.startswith(exclude):
+            return
+        g.profile_forced = profiler.authorized(request.headers)
+        g.profile = profiler.start(g.profile_forced)
+
+    @app.after_request
+    def finish_profile(response):
+        timer = timing.current()
+        profile = g.pop('profile', None)
+        if timer is None:
+            if profile is not None:
+                profiler.abandon(profile)
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        name = profiler.finish(route, request.method, lambda: request_params(request), response.status_code,
+                               timer, profile, g.pop('profile_forced', False))
+        if name is not None:
+            response.headers['X-Profile'] = name
+        return response
+
+    @app.teardown_request
+    def drop_profile(error=None):
+        # A request that never reached after_request must not keep the profiler busy
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiler.abandon(profile)
+
+    return app
@@ -0,0 +1,194 @@
+"""
+Student Fee Management System - Sheets Quota
+Every Google Sheets call goes through SheetsQuota.call():
+
+- a token bucket per request type keeps us under the per-minute quota
+  (Sheets allows 60 reads and 60 writes per minute per user by default)
+- 429 and 5xx responses are retried with exponential backoff and full jitter,
+  honouring Retry-After when Google sends it
+- identical reads already in flight share one request instead of repeating it
+
+so heavy use slows requests down gradually instead of failing them.
+"""
+
+import random
+import threading
+import time
+
+from fee_core import timing
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate_per_minute` calls per minute with bursts of up to `burst`"""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, rate_per_minute // 6))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def error_status(error):
+    """HTTP status of a gspread APIError (or similar), or None"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'code', None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error):
+    if error_status(error) in RETRYABLE_STATUS:
+        return True
+    try:
+        import requests
+    except ImportError:
+        return False
+    # Dropped connections and timeouts are worth another try too
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def retry_after(error):
+    """Seconds from a Retry-After header, or None"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class SheetsQuota:
+    """Rate limiting, retries and read de-duplication for Sheets API calls"""
+
+    def __init__(self, reads_per_minute=60, writes_per_minute=60, drive_per_minute=600, max_retries=5,
+                 base_delay=1.0, max_delay=32.0, sleep=time.sleep):
+        self.buckets = {
+            'read': TokenBucket(reads_per_minute),
+            'write': TokenBucket(writes_per_minute),
+            # Drive metadata calls count against the (much larger) Drive quota
+            'drive': TokenBucket(drive_per_minute),
+        }
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.metrics = {
+            'calls': 0,
+            'reads': 0,
+            'writes': 0,
+            'drive_calls': 0,
+            'deduplicated': 0,
+            'throttled': 0,       # 429 responses
+            'server_errors': 0,   # 5xx / connection errors
+            'retries': 0,
+            'failures': 0,
+            'limiter_waits': 0,
+            'limiter_wait_seconds': 0.0,
+            'backoff_seconds': 0.0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.metrics[name] += amount
+
+    def backoff(self, attempt, error=None):
+        """Full-jitter exponential delay for a retry attempt (0-based)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        hinted = retry_after(error) if error is not None else None
+        return max(delay, hinted) if hinted is not None else delay
+
+    def _execute(self, kind, fn, args, kwargs, idempotent=True):
+        attempt = 0
+        while True:
+            with timing.phase('throttle'):
+                waited = self.buckets[kind].acquire()
+            if waited:
+                self._count('limiter_waits')
+                self._count('limiter_wait_seconds', waited)
+            self._count('calls')
+            self._count({'read': 'reads', 'write': 'writes', 'drive': 'drive_calls'}[kind])
+            timing.count_call(kind)
+            try:
+                with timing.phase('write' if kind == 'write' else 'fetch'):
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                # A 5xx may hide a write that was applied - only repeat it if that is harmless
+                retryable = is_retryable(e) and (idempotent or error_status(e) == 429)
+                if not retryable or attempt >= self.max_retries:
+                    self._count('failures')
+                    raise
+                self._count('throttled' if error_status(e) == 429 else 'server_errors')
+                self._count('retries')
+                delay = self.backoff(attempt, e)
+                self._count('backoff_seconds', delay)
+                with timing.phase('throttle'):
+                    self._sleep(delay)
+                attempt += 1
+
+    def call(self, kind, fn, *args, dedup_key=None, idempotent=True, **kwargs):
+        """Run fn(*args, **kwargs) as a 'read', 'write' or 'drive' call under the quota.
+
+        Reads with the same dedup_key running at the same time share a result.
+        Non-idempotent writes (appends, deletes) are only retried on 429.
+        """
+        if kind == 'write' or dedup_key is None:
+            return self._execute(kind, fn, args, kwargs, idempotent)
+
+        with self._lock:
+            flight = self._in_flight.get(dedup_key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[dedup_key] = _InFlight()
+            else:
+                self.metrics['deduplicated'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._execute(kind, fn, args, kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[dedup_key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+        stats['limiter_wait_seconds'] = round(stats['limiter_wait_seconds'], 3)
+        stats['backoff_seconds'] = round(stats['backoff_seconds'], 3)
+        return stats
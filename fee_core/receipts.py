@@ -0,0 +1,60 @@
+"""
+Student Fee Management System - Receipt Numbers
+Allocates RCP-MMYY-XXX receipt numbers from a per-prefix counter persisted in
+the storage backend, instead of scanning every record for the highest suffix.
+"""
+
+from datetime import datetime
+
+from fee_core import timing
+
+
+class ReceiptSequence:
+    """Hands out unique receipt numbers: RCP-MMYY-001, RCP-MMYY-002, ..."""
+
+    def __init__(self, store, width=3):
+        self.store = store
+        self.width = width
+
+    @staticmethod
+    def prefix_for(when=None):
+        when = when or datetime.now()
+        return f"RCP-{when.strftime('%m%y')}-"
+
+    def _highest_used(self, prefix):
+        """Seed value: highest suffix already used with this prefix (one scan per new counter)"""
+        self.store.ensure_loaded()
+        prefix_key = prefix.lower()
+        highest = 0
+        for receipt in self.store.row_index.receipts():
+            if receipt.startswith(prefix_key):
+                suffix = receipt[len(prefix_key):]
+                if suffix.isdigit():
+                    highest = max(highest, int(suffix))
+        return highest
+
+    def _format(self, prefix, number):
+        return f"{prefix}{str(number).zfill(self.width)}"
+
+    def reserve(self, count, when=None):
+        """Reserve a block of `count` receipt numbers (e.g. for bulk payments)"""
+        prefix = self.prefix_for(when)
+        receipts = []
+        while len(receipts) < count:
+            needed = count - len(receipts)
+            with timing.phase('write'):
+                first = self.store.backend.reserve_sequence(
+                    prefix, needed, seed=lambda: self._highest_used(prefix)
+                )
+            candidates = [self._format(prefix, number) for number in range(first, first + needed)]
+            # Skip numbers typed in by hand or issued by another server - the sheet is checked
+            # as well as the cache, as the Sheets counter can still hand out a number twice
+            in_storage = self.store.receipts_in_storage(candidates)
+            for receipt in candidates:
+                if receipt.lower() not in in_storage and not self.store.find_receipt_row(receipt):
+                    receipts.append(receipt)
+        return receipts
+
+    def next(self, when=None):
+        """Allocate the next receipt number"""
+        return self.reserve(1, when)[0]
@@ -0,0 +1,72 @@
+"""
+Student Fee Management System - Record Helpers
+Column layout shared by every storage backend.
+"""
+
+# Sheet column order (A:G)
+HEADERS = ['Student ID', 'Student Name', 'Father Name', 'Mobile Number', 'Month', 'Fee Status', 'Receipt Number']
+
+# Fields compared case-insensitively when matching records
+CASE_INSENSITIVE_FIELDS = {'Month', 'Fee Status', 'Receipt Number'}
+
+
+def _cell(value):
+    return '' if value is None else str(value)
+
+
+def record_to_row(record):
+    """Convert a record dict to a sheet row in column order"""
+    return [_cell(record.get(header)) for header in HEADERS]
+
+
+def row_to_record(row, headers=HEADERS):
+    """Convert a sheet row to a record dict, padding short rows"""
+    return {header: (_cell(row[i]) if i < len(row) else '') for i, header in enumerate(headers)}
+
+
+def normalize_record(record):
+    """Return a record with every standard column present as a string"""
+    return row_to_record(record_to_row(record))
+
+
+def column_letter(index):
+    """Sheet column letter for a 0-based HEADERS index"""
+    return chr(ord('A') + index)
+
+
+def column_runs(fields):
+    """Group headers into runs of adjacent columns: [(first index, [headers])]"""
+    runs = []
+    for index in sorted(HEADERS.index(field) for field in fields):
+        if runs and runs[-1][0] + len(runs[-1][1]) == index:
+            runs[-1][1].append(HEADERS[index])
+        else:
+            runs.append((index, [HEADERS[index]]))
+    return runs
+
+
+def matches(record, filters):
+    """Check a record against {column: value} filters"""
+    for field, value in filters.items():
+        actual = str(record.get(field, '')).strip()
+        expected = str(value).strip()
+        if field in CASE_INSENSITIVE_FIELDS:
+            actual, expected = actual.lower(), expected.lower()
+        if actual != expected:
+            return False
+    return True
+
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+
+def month_order(month):
+    """(year, month index) for 'January 2026' style months; unknown values sort first"""
+    parts = str(month or '').split()
+    try:
+        month_idx = MONTH_NAMES.index(parts[0].capitalize()) + 1 if parts else 0
+        year = int(parts[1]) if len(parts) > 1 else 0
+    except (ValueError, IndexError):
+        return (0, 0)
+    return (year, month_idx)
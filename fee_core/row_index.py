@@ -0,0 +1,104 @@
+"""
+Student Fee Management System - Row Index
+Hash index from (student, father, month) and receipt number to sheet row number,
+kept in step with the record cache so lookups never re-download the sheet.
+"""
+
+import bisect
+import threading
+
+
+def record_key(student_name, father_name, month):
+    """Lookup key for a student's record in a month (month is case-insensitive)"""
+    return (str(student_name or '').strip(), str(father_name or '').strip(), str(month or '').strip().lower())
+
+
+def receipt_key(receipt_number):
+    return str(receipt_number or '').strip().lower()
+
+
+class RowIndex:
+    """Maps record keys and receipt numbers to sheet row numbers (header is row 1)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_key = {}
+        self._by_receipt = {}
+
+    def _keys(self, record):
+        key = record_key(record.student_name, record.father_name, record.month_label)
+        receipt = receipt_key(record.receipt)
+        return key, receipt
+
+    @staticmethod
+    def _add(index, key, row_number):
+        rows = index.setdefault(key, [])
+        bisect.insort(rows, row_number)
+
+    @staticmethod
+    def _remove(index, key, row_number):
+        rows = index.get(key)
+        if rows and row_number in rows:
+            rows.remove(row_number)
+            if not rows:
+                del index[key]
+
+    def _insert(self, row_number, record):
+        key, receipt = self._keys(record)
+        self._add(self._by_key, key, row_number)
+        if receipt:
+            self._add(self._by_receipt, receipt, row_number)
+
+    # ----- lookups -----
+
+    def find(self, student_name, father_name, month):
+        """First row holding this student's record for the month, or None"""
+        with self._lock:
+            rows = self._by_key.get(record_key(student_name, father_name, month))
+            return rows[0] if rows else None
+
+    def find_receipt(self, receipt_number):
+        """First row using this receipt number, or None"""
+        with self._lock:
+            rows = self._by_receipt.get(receipt_key(receipt_number))
+            return rows[0] if rows else None
+
+    def receipts(self):
+        """All indexed receipt numbers (lower-cased)"""
+        with self._lock:
+            return list(self._by_receipt)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    # ----- maintenance (called by RecordCache) -----
+
+    def rebuild(self, records):
+        with self._lock:
+            self._by_key = {}
+            self._by_receipt = {}
+            for idx, record in enumerate(records):
+                self._insert(idx + 2, record)
+
+    def on_update(self, row_number, old_record, new_record):
+        with self._lock:
+            key, receipt = self._keys(old_record)
+            self._remove(self._by_key, key, row_number)
+            self._remove(self._by_receipt, receipt, row_number)
+            self._insert(row_number, new_record)
+
+    def on_append(self, start_row, records):
+        with self._lock:
+            for offset, record in enumerate(records):
+                self._insert(start_row + offset, record)
+
+    def on_delete(self, row_number, old_record):
+        with self._lock:
+            # Rows below the deleted one move up, just like delete_rows() in the sheet
+            for index in (self._by_key, self._by_receipt):
+                for key in list(index):
+                    rows = [r - 1 if r > row_number else r for r in index[key] if r != row_number]
+                    if rows:
+                        index[key] = rows
+                    else:
+                        del index[key]
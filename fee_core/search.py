@@ -0,0 +1,157 @@
+"""
+Student Fee Management System - Search Index
+In-memory trigram index for search-as-you-type over name, father name,
+Student ID, mobile and receipt number.
+
+Trigrams point at distinct field values rather than rows - a student's name
+repeats on every month's row, so this keeps the index small. Each value then
+points at the rows (documents) that carry it.
+"""
+
+import threading
+
+from fee_core.model import FIELD_ATTRS
+
+SEARCH_FIELDS = ['Student Name', 'Father Name', 'Student ID', 'Mobile Number', 'Receipt Number']
+
+# An exact hit on one of these is almost certainly what the user wants
+EXACT_MATCH_FIELDS = {'Student ID', 'Receipt Number'}
+
+RANK_EXACT, RANK_PREFIX, RANK_SUBSTRING = 0, 1, 2
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Substring/prefix search kept in step with the record cache"""
+
+    def __init__(self, fields=SEARCH_FIELDS):
+        self.fields = list(fields)
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._grams = {}        # trigram -> {text}
+        self._refs = {}         # text -> number of (field, text) postings using it
+        self._by_value = {field: {} for field in self.fields}  # field -> text -> {doc}
+        self._docs = {}         # doc -> record
+        self._order = []        # doc ids in sheet row order
+        self._next_doc = 0
+
+    # ----- postings -----
+
+    def _link(self, field, text, doc):
+        postings = self._by_value[field].get(text)
+        if postings is None:
+            postings = self._by_value[field][text] = set()
+            self._refs[text] = self._refs.get(text, 0) + 1
+            if self._refs[text] == 1:
+                for gram in trigrams(text):
+                    self._grams.setdefault(gram, set()).add(text)
+        postings.add(doc)
+
+    def _unlink(self, field, text, doc):
+        postings = self._by_value[field].get(text)
+        if postings is None:
+            return
+        postings.discard(doc)
+        if postings:
+            return
+        del self._by_value[field][text]
+        self._refs[text] -= 1
+        if self._refs[text] == 0:
+            del self._refs[text]
+            for gram in trigrams(text):
+                texts = self._grams.get(gram)
+                if texts is not None:
+                    texts.discard(text)
+                    if not texts:
+                        del self._grams[gram]
+
+    def _values(self, record):
+        for field in self.fields:
+            text = getattr(record, FIELD_ATTRS[field]).strip().lower()
+            if text:
+                yield field, text
+
+    def _add(self, record):
+        doc = self._next_doc
+        self._next_doc += 1
+        self._docs[doc] = record
+        for field, text in self._values(record):
+            self._link(field, text, doc)
+        return doc
+
+    def _drop(self, doc):
+        record = self._docs.pop(doc)
+        for field, text in self._values(record):
+            self._unlink(field, text, doc)
+
+    # ----- maintenance (called by RecordCache) -----
+
+    def rebuild(self, records):
+        with self._lock:
+            self._reset()
+            self._order = [self._add(record) for record in records]
+
+    def on_update(self, row_number, old_record, new_record):
+        with self._lock:
+            doc = self._order[row_number - 2]
+            self._drop(doc)
+            # Re-use the doc id so the row keeps its place in sheet order
+            self._docs[doc] = new_record
+            for field, text in self._values(new_record):
+                self._link(field, text, doc)
+
+    def on_append(self, start_row, records):
+        with self._lock:
+            self._order.extend(self._add(record) for record in records)
+
+    def on_delete(self, row_number, old_record):
+        with self._lock:
+            self._drop(self._order.pop(row_number - 2))
+
+    # ----- queries -----
+
+    def _matching_texts(self, query):
+        if len(query) < 3:
+            # Too short for trigrams - scan the distinct values instead
+            candidates = self._refs.keys()
+        else:
+            gram_sets = sorted((self._grams.get(g, set()) for g in trigrams(query)), key=len)
+            candidates = set.intersection(*gram_sets) if gram_sets else set()
+        return [text for text in candidates if query in text]
+
+    def search(self, query, fields=None):
+        """Records containing `query` in any of `fields`, best matches first.
+
+        Ranking: exact Student ID / receipt match, then prefix matches, then
+        other substring matches; ties keep sheet order.
+        """
+        query = str(query or '').strip().lower()
+        fields = [f for f in (fields or self.fields) if f in self._by_value]
+        with self._lock:
+            if not query:
+                return [self._docs[doc].to_dict() for doc in self._order]
+            best = {}
+            for text in self._matching_texts(query):
+                for field in fields:
+                    docs = self._by_value[field].get(text)
+                    if not docs:
+                        continue
+                    if text == query and field in EXACT_MATCH_FIELDS:
+                        rank = RANK_EXACT
+                    elif text.startswith(query):
+                        rank = RANK_PREFIX
+                    else:
+                        rank = RANK_SUBSTRING
+                    for doc in docs:
+                        if rank < best.get(doc, RANK_SUBSTRING + 1):
+                            best[doc] = rank
+            ranked = sorted(best, key=lambda doc: (best[doc], doc))
+            return [self._docs[doc].to_dict() for doc in ranked]
+
+    def __len__(self):
+        return len(self._docs)
@@ -0,0 +1,619 @@
+"""
+Student Fee Management System - Storage Backends
+One interface over Google Sheets, a local Excel file and a local SQLite database.
+
+Row numbers follow the Google Sheets convention everywhere: 1-indexed with the
+header on row 1, so the first record lives on row 2.
+"""
+
+import os
+import sqlite3
+import threading
+import uuid
+
+from fee_core import timing
+from fee_core.quota import SheetsQuota
+from fee_core.records import (HEADERS, CASE_INSENSITIVE_FIELDS, column_letter, column_runs, record_to_row,
+                              row_to_record, normalize_record, matches)
+
+
+class StorageBackend:
+    """Interface implemented by every storage engine. Methods raise on failure."""
+
+    name = 'base'
+
+    def __init__(self):
+        self._sequences = {}
+        self._sequence_lock = threading.Lock()
+
+    def read_all(self):
+        """Return every record in sheet order"""
+        raise NotImplementedError
+
+    def get_row(self, row_number):
+        """Return the record on a sheet row, or None"""
+        records = self.read_all()
+        index = row_number - 2
+        if 0 <= index < len(records):
+            return records[index]
+        return None
+
+    def read_page(self, offset, limit, total=None):
+        """(records[offset:offset + limit], total record count) in sheet order.
+
+        `total` is a record count the caller already knows (e.g. from a stale
+        cache); engines that pay extra to count rows may use it instead.
+        """
+        records = self.read_all()
+        return records[offset:offset + limit], len(records)
+
+    def update_row(self, row_number, record):
+        """Overwrite a single row"""
+        raise NotImplementedError
+
+    def update_rows(self, updates):
+        """Overwrite several rows - {row_number: record}"""
+        for row_number, record in sorted(updates.items()):
+            self.update_row(row_number, record)
+
+    def update_fields(self, row_numbers, fields):
+        """Set the same columns ({header: value}) on several rows, leaving other columns alone"""
+        updates = {}
+        for row_number in row_numbers:
+            record = self.get_row(row_number)
+            if record is None:
+                raise IndexError(f'Row {row_number} does not exist')
+            record.update(fields)
+            updates[row_number] = record
+        self.update_rows(updates)
+
+    def append_rows(self, records):
+        """Append records after the last row"""
+        raise NotImplementedError
+
+    def delete_row(self, row_number):
+        """Delete a single row (rows below shift up by one)"""
+        raise NotImplementedError
+
+    def save_all(self, records):
+        """Replace the whole table"""
+        raise NotImplementedError
+
+    def query(self, filters):
+        """Return [(row_number, record)] for records matching {column: value}"""
+        return [(idx + 2, record) for idx, record in enumerate(self.read_all())
+                if matches(record, filters)]
+
+    def find_row(self, student_name, father_name, month):
+        """Row number of a student's record for a month, or None"""
+        results = self.query({'Student Name': student_name, 'Father Name': father_name, 'Month': month})
+        return results[0][0] if results else None
+
+    def receipts_in_use(self, receipts):
+        """The given receipt numbers that some stored record already has (lowercase)"""
+        wanted = {str(r).strip().lower() for r in receipts}
+        return {receipt for receipt in (str(r.get('Receipt Number', '')).strip().lower() for r in self.read_all())
+                if receipt in wanted}
+
+    def stats(self):
+        """Backend-specific counters for debugging"""
+        return {}
+
+    def change_token(self):
+        """Cheap value that changes whenever the stored data may have changed.
+
+        None means the engine cannot tell, so every refresh re-reads the data.
+        """
+        return None
+
+    def reserve_sequence(self, name, count=1, seed=None):
+        """Atomically reserve `count` numbers from a named counter and return the first.
+
+        `seed` is called only when the counter does not exist yet and returns the
+        highest number already in use. The default keeps counters in memory.
+        """
+        with self._sequence_lock:
+            if name not in self._sequences:
+                self._sequences[name] = seed() if seed else 0
+            first = self._sequences[name] + 1
+            self._sequences[name] += count
+            return first
+
+
+class GoogleSheetsBackend(StorageBackend):
+    """Google Sheets via gspread - get_worksheet returns a connected worksheet"""
+
+    name = 'sheets'
+
+    # Worksheet holding persisted counters (name | last value | claim of the last writer)
+    SEQUENCE_SHEET = 'Sequences'
+    SEQUENCE_ATTEMPTS = 5
+
+    def __init__(self, get_worksheet, quota=None):
+        super().__init__()
+        self.get_worksheet = get_worksheet
+        self.quota = quota or SheetsQuota()
+        self._sequence_sheet = None
+
+    def _worksheet(self):
+        worksheet = self.get_worksheet()
+        if worksheet is None:
+            raise ConnectionError('Google Sheet is not connected')
+        return worksheet
+
+    def _read(self, fn, *args, dedup_key=None, **kwargs):
+        return self.quota.call('read', fn, *args, dedup_key=dedup_key, **kwargs)
+
+    def _write(self, fn, *args, idempotent=True, **kwargs):
+        return self.quota.call('write', fn, *args, idempotent=idempotent, **kwargs)
+
+    def stats(self):
+        return {'quota': self.quota.stats()}
+
+    def change_token(self):
+        # Drive modifiedTime - bumped by our writes and by edits made in the Sheets UI
+        spreadsheet = self._worksheet().spreadsheet
+        return self.quota.call('drive', spreadsheet.get_lastUpdateTime, dedup_key=('modified', spreadsheet.id))
+
+    def read_all(self):
+        worksheet = self._worksheet()
+        all_values = self._read(worksheet.get_all_values, dedup_key=('values', worksheet.id))
+        if len(all_values) <= 1:
+            return []
+        headers = all_values[0]
+        with timing.phase('parse'):
+            return [row_to_record(row, headers) for row in all_values[1:]]
+
+    def read_page(self, offset, limit, total=None):
+        # Only the page's rows; without a total from the caller, the name column is read
+        # alongside in the same request. The grid's row count is no use - a hand-made sheet
+        # starts with 1000 rows, and rows past the data are never returned to correct it
+        first = offset + 2
+        last = first + max(limit, 1) - 1
+        worksheet = self._worksheet()
+        ranges = [f'A{first}:G{last}'] + (['B2:B'] if total is None else [])
+        # The API leaves out empty rows at the end of each range
+        page, *names = self._read(worksheet.batch_get, ranges, dedup_key=('batch_get', worksheet.id, *ranges))
+        if names:
+            total = len(names[0])
+        elif len(page) < limit and (page or offset == 0):
+            total = offset + len(page)
+        return [row_to_record(row) for row in page], total
+
+    def get_row(self, row_number):
+        worksheet = self._worksheet()
+        row = self._read(worksheet.row_values, row_number, dedup_key=('row', worksheet.id, row_number))
+        return row_to_record(row) if row else None
+
+    def receipts_in_use(self, receipts):
+        # One column read (G) instead of the whole sheet
+        wanted = {str(r).strip().lower() for r in receipts}
+        worksheet = self._worksheet()
+        column, = self._read(worksheet.batch_get, ['G2:G'], dedup_key=('batch_get', worksheet.id, 'G2:G'))
+        return {receipt for receipt in (str(row[0]).strip().lower() for row in column if row) if receipt in wanted}
+
+    def update_row(self, row_number, record):
+        # Single API call for the whole row
+        self._write(self._worksheet().update, range_name=f'A{row_number}:G{row_number}', values=[record_to_row(record)])
+
+    def update_rows(self, updates):
+        # Every row in one values.batchUpdate request
+        if updates:
+            self._write(self._worksheet().batch_update, [
+                {'range': f'A{row_number}:G{row_number}', 'values': [record_to_row(record)]}
+                for row_number, record in sorted(updates.items())
+            ])
+
+    def update_fields(self, row_numbers, fields):
+        # Only the given cells (e.g. A:D) of each row, all in one values.batchUpdate
+        values = normalize_record(fields)
+        data = []
+        for row_number in sorted(row_numbers):
+            for first, headers in column_runs(fields):
+                cells = f'{column_letter(first)}{row_number}:{column_letter(first + len(headers) - 1)}{row_number}'
+                data.append({'range': cells, 'values': [[values[h] for h in headers]]})
+        if data:
+            self._write(self._worksheet().batch_update, data)
+
+    def append_rows(self, records):
+        if records:
+            self._write(self._worksheet().append_rows, [record_to_row(r) for r in records], idempotent=False)
+
+    def delete_row(self, row_number):
+        self._write(self._worksheet().delete_rows, row_number, idempotent=False)
+
+    def save_all(self, records):
+        """Rewrite the sheet and its formatting in ONE batchUpdate request.
+
+        Google applies a batchUpdate atomically - if any part fails nothing is
+        written, so the sheet is never left half-cleared or half-written.
+        """
+        worksheet = self._worksheet()
+        sheet_id = worksheet.id
+        rows = [HEADERS] + [record_to_row(r) for r in records]
+        requests = [
+            # Size the grid to the rows we write (drops stale rows below). One spare row
+            # past the header, as the API rejects a grid whose only row is frozen
+            {'updateSheetProperties': {
+                'properties': {'sheetId': sheet_id, 'gridProperties': {
+                    'rowCount': max(len(rows) + 1, 2),
+                    'columnCount': max(len(HEADERS), worksheet.col_count)
+                }},
+                'fields': 'gridProperties.rowCount,gridProperties.columnCount'
+            }},
+            # Clear every existing value
+            {'updateCells': {'range': {'sheetId': sheet_id}, 'fields': 'userEnteredValue'}},
+            # Header + all rows, stored as plain strings (keeps leading zeros)
+            {'updateCells': {
+                'start': {'sheetId': sheet_id, 'rowIndex': 0, 'columnIndex': 0},
+                'rows': [{'values': [{'userEnteredValue': {'stringValue': value}} for value in row]} for row in rows],
+                'fields': 'userEnteredValue'
+            }}
+        ]
+        requests += self._conditional_format_requests(worksheet)
+        self._write(worksheet.spreadsheet.batch_update, {'requests': requests})
+
+    def _sequences_worksheet(self):
+        if self._sequence_sheet is None:
+            from gspread.exceptions import WorksheetNotFound
+
+            spreadsheet = self._worksheet().spreadsheet
+            try:
+                self._sequence_sheet = self._read(spreadsheet.worksheet, self.SEQUENCE_SHEET)
+            except WorksheetNotFound:
+                self._sequence_sheet = self._write(spreadsheet.add_worksheet, title=self.SEQUENCE_SHEET,
+                                                   rows=100, cols=3, idempotent=False)
+            if self._sequence_sheet.col_count < 3:
+                # Tabs created before the claim column existed
+                self._write(self._sequence_sheet.resize, cols=3)
+        return self._sequence_sheet
+
+    def reserve_sequence(self, name, count=1, seed=None):
+        """Counter persisted in the Sequences worksheet: read, write with a claim, read back.
+
+        Sheets has no compare-and-set and the lock only serialises this
+        process. Each write carries a random claim and the row is read back:
+        if another server wrote the row in between, its claim is there and the
+        reservation starts over. A server that read the counter before ours was
+        written and writes after our read-back still goes unseen, so the
+        caller also checks the numbers against the sheet (ReceiptSequence.reserve).
+        """
+        with self._sequence_lock:
+            worksheet = self._sequences_worksheet()
+            for _ in range(self.SEQUENCE_ATTEMPTS):
+                rows = self._read(worksheet.get_all_values)
+                row_number = len(rows) + 1
+                current = None
+                for idx, row in enumerate(rows):
+                    if row and row[0] == name:
+                        row_number = idx + 1
+                        current = int(row[1]) if len(row) > 1 and str(row[1]).isdigit() else 0
+                        break
+                if current is None:
+                    current = seed() if seed else 0
+                written = [name, str(current + count), uuid.uuid4().hex]
+                self._write(worksheet.update, range_name=f'A{row_number}:C{row_number}', values=[written])
+                if self._read(worksheet.row_values, row_number)[:3] == written:
+                    return current + 1
+            raise RuntimeError(f'Counter {name} kept changing under us - try again')
+
+    # Same look as apply_formatting.py: background on the name columns (A-D),
+    # background plus coloured text on Month, Fee Status and Receipt (E-G)
+    STATUS_FORMATS = {
+        'Not Paid': ({'red': 1.0, 'green': 0.85, 'blue': 0.85},
+                     {'foregroundColor': {'red': 0.8, 'green': 0.0, 'blue': 0.0}, 'bold': True}),
+        'Paid': ({'red': 0.85, 'green': 0.95, 'blue': 0.85},
+                 {'foregroundColor': {'red': 0.0, 'green': 0.5, 'blue': 0.0}, 'bold': False})
+    }
+
+    def _conditional_format_requests(self, worksheet):
+        """Requests that replace the sheet's rules with the Paid/Not Paid formatting.
+
+        The grid is resized on every save, which would cut fixed-range rules
+        (apply_formatting.py uses A2:G1000) down to the rows written, so the
+        rules are rewritten with open-ended ranges instead of being kept.
+        """
+        sheet_id = worksheet.id
+        # Counted on every save - rules added or removed in the Sheets UI would otherwise
+        # put the deletes out of range and fail the whole batch. One small call next to a rewrite
+        metadata = self._read(
+            worksheet.spreadsheet.fetch_sheet_metadata,
+            {'fields': 'sheets(properties.sheetId,conditionalFormats)'}
+        )
+        rule_count = 0
+        for sheet_meta in metadata.get('sheets', []):
+            if sheet_meta.get('properties', {}).get('sheetId') == sheet_id:
+                rule_count = len(sheet_meta.get('conditionalFormats', []))
+
+        requests = [{'deleteConditionalFormatRule': {'sheetId': sheet_id, 'index': 0}}
+                    for _ in range(rule_count)]
+        # Open-ended ranges from row 2, so rows appended later are formatted too
+        name_columns = {'sheetId': sheet_id, 'startRowIndex': 1, 'startColumnIndex': 0, 'endColumnIndex': 4}
+        fee_columns = {'sheetId': sheet_id, 'startRowIndex': 1, 'startColumnIndex': 4,
+                       'endColumnIndex': len(HEADERS)}
+        rules = []
+        for status, (background, _) in self.STATUS_FORMATS.items():
+            rules.append((name_columns, status, {'backgroundColor': background}))
+        for status, (background, text) in self.STATUS_FORMATS.items():
+            rules.append((fee_columns, status, {'backgroundColor': background, 'textFormat': text}))
+        for index, (grid_range, status, cell_format) in enumerate(rules):
+            requests.append({'addConditionalFormatRule': {'index': index, 'rule': {
+                'ranges': [grid_range],
+                'booleanRule': {
+                    'condition': {'type': 'CUSTOM_FORMULA',
+                                  'values': [{'userEnteredValue': f'=$F2="{status}"'}]},
+                    'format': cell_format
+                }
+            }}})
+        return requests
+
+
+def _file_token(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ExcelBackend(StorageBackend):
+    """Local .xlsx file via pandas (the original offline storage)"""
+
+    name = 'excel'
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._lock = threading.RLock()
+
+    def change_token(self):
+        return _file_token(self.path)
+
+    def read_all(self):
+        import pandas as pd
+
+        with self._lock:
+            if not os.path.exists(self.path):
+                return []
+            df = pd.read_excel(self.path, dtype=object)
+            for col in HEADERS:
+                if col not in df.columns:
+                    df[col] = ''
+            df = df[HEADERS].fillna('')
+            records = df.to_dict('records')
+        for record in records:
+            for key, value in record.items():
+                # Month cells typed as dates come back as datetime objects
+                record[key] = value.strftime('%B %Y') if hasattr(value, 'strftime') else str(value)
+        return records
+
+    def save_all(self, records):
+        import pandas as pd
+
+        with self._lock:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            df = pd.DataFrame([normalize_record(r) for r in records], columns=HEADERS)
+            df.to_excel(self.path, index=False)
+
+    # Excel has no partial writes - edit the table and write the file back
+    def update_row(self, row_number, record):
+        with self._lock:
+            records = self.read_all()
+            records[row_number - 2] = normalize_record(record)
+            self.save_all(records)
+
+    def update_rows(self, updates):
+        with self._lock:
+            records = self.read_all()
+            for row_number, record in updates.items():
+                records[row_number - 2] = normalize_record(record)
+            self.save_all(records)
+
+    def update_fields(self, row_numbers, fields):
+        with self._lock:
+            records = self.read_all()
+            for row_number in row_numbers:
+                records[row_number - 2].update(fields)
+            self.save_all(records)
+
+    def append_rows(self, records):
+        with self._lock:
+            self.save_all(self.read_all() + list(records))
+
+    def delete_row(self, row_number):
+        with self._lock:
+            records = self.read_all()
+            del records[row_number - 2]
+            self.save_all(records)
+
+
+class SQLiteBackend(StorageBackend):
+    """Local SQLite database with indexes for point lookups"""
+
+    name = 'sqlite'
+
+    COLUMNS = ['student_id', 'student_name', 'father_name', 'mobile_number', 'month', 'fee_status', 'receipt_number']
+    HEADER_TO_COLUMN = dict(zip(HEADERS, COLUMNS))
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._create_schema()
+
+    def change_token(self):
+        # Bumped only by commits from other connections - ours are already in the cache
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS fee_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id TEXT NOT NULL DEFAULT '',
+                    student_name TEXT NOT NULL DEFAULT '',
+                    father_name TEXT NOT NULL DEFAULT '',
+                    mobile_number TEXT NOT NULL DEFAULT '',
+                    month TEXT NOT NULL DEFAULT '',
+                    fee_status TEXT NOT NULL DEFAULT '',
+                    receipt_number TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_fee_student_month "
+                "ON fee_records (student_name, father_name, month COLLATE NOCASE)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_fee_receipt "
+                "ON fee_records (receipt_number COLLATE NOCASE)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sequences (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+
+    def _select(self):
+        return f"SELECT id, {', '.join(self.COLUMNS)} FROM fee_records"
+
+    def _row_id(self, row_number):
+        """Primary key of the record on a sheet-style row number"""
+        row = self._conn.execute(
+            "SELECT id FROM fee_records ORDER BY id LIMIT 1 OFFSET ?", (row_number - 2,)
+        ).fetchone()
+        if row is None:
+            raise IndexError(f'Row {row_number} does not exist')
+        return row[0]
+
+    def _row_number(self, row_id):
+        count = self._conn.execute("SELECT COUNT(*) FROM fee_records WHERE id < ?", (row_id,)).fetchone()[0]
+        return count + 2
+
+    def read_all(self):
+        with self._lock:
+            rows = self._conn.execute(self._select() + " ORDER BY id").fetchall()
+        return [row_to_record(row[1:]) for row in rows]
+
+    def read_page(self, offset, limit, total=None):
+        # COUNT(*) is cheap here - the exact figure beats a caller's estimate
+        with self._lock:
+            rows = self._conn.execute(
+                self._select() + " ORDER BY id LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+            total = self._conn.execute("SELECT COUNT(*) FROM fee_records").fetchone()[0]
+        return [row_to_record(row[1:]) for row in rows], total
+
+    def get_row(self, row_number):
+        with self._lock:
+            if row_number < 2:
+                return None
+            row = self._conn.execute(
+                self._select() + " ORDER BY id LIMIT 1 OFFSET ?", (row_number - 2,)
+            ).fetchone()
+        return row_to_record(row[1:]) if row else None
+
+    def update_row(self, row_number, record):
+        assignments = ', '.join(f'{col} = ?' for col in self.COLUMNS)
+        with self._lock, self._conn:
+            row_id = self._row_id(row_number)
+            self._conn.execute(f"UPDATE fee_records SET {assignments} WHERE id = ?",
+                               record_to_row(record) + [row_id])
+
+    def update_rows(self, updates):
+        assignments = ', '.join(f'{col} = ?' for col in self.COLUMNS)
+        with self._lock, self._conn:
+            params = [record_to_row(record) + [self._row_id(row_number)]
+                      for row_number, record in updates.items()]
+            self._conn.executemany(f"UPDATE fee_records SET {assignments} WHERE id = ?", params)
+
+    def update_fields(self, row_numbers, fields):
+        values = normalize_record(fields)
+        assignments = ', '.join(f'{self.HEADER_TO_COLUMN[h]} = ?' for h in fields)
+        with self._lock, self._conn:
+            params = [[values[h] for h in fields] + [self._row_id(row_number)] for row_number in row_numbers]
+            self._conn.executemany(f"UPDATE fee_records SET {assignments} WHERE id = ?", params)
+
+    def append_rows(self, records):
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO fee_records ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [record_to_row(r) for r in records]
+            )
+
+    def delete_row(self, row_number):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fee_records WHERE id = ?", (self._row_id(row_number),))
+
+    def save_all(self, records):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fee_records")
+            placeholders = ', '.join('?' for _ in self.COLUMNS)
+            self._conn.executemany(
+                f"INSERT INTO fee_records ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [record_to_row(r) for r in records]
+            )
+
+    def query(self, filters):
+        clauses = []
+        params = []
+        for field, value in filters.items():
+            column = self.HEADER_TO_COLUMN[field]
+            collate = ' COLLATE NOCASE' if field in CASE_INSENSITIVE_FIELDS else ''
+            clauses.append(f'{column} = ?{collate}')
+            params.append(str(value).strip())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self._conn.execute(self._select() + where + " ORDER BY id", params).fetchall()
+            return [(self._row_number(row[0]), row_to_record(row[1:])) for row in rows]
+
+    def receipts_in_use(self, receipts):
+        wanted = sorted({str(r).strip().lower() for r in receipts})
+        if not wanted:
+            return set()
+        placeholders = ', '.join('?' for _ in wanted)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT LOWER(receipt_number) FROM fee_records WHERE receipt_number COLLATE NOCASE IN ({placeholders})",
+                wanted
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def reserve_sequence(self, name, count=1, seed=None):
+        """Counter row updated inside one transaction - atomic across processes too"""
+        start = 0
+        if seed is not None:
+            with self._lock:
+                exists = self._conn.execute("SELECT 1 FROM sequences WHERE name = ?", (name,)).fetchone()
+            if not exists:
+                # Before the transaction: seed() reads through the DataStore, which may
+                # flush queued writes and commit on this same connection
+                start = seed()
+        with self._lock, self._conn:
+            if not self._conn.in_transaction:
+                # Take the write lock up front so concurrent processes queue here
+                self._conn.execute("BEGIN IMMEDIATE")
+            # Another process may have created the counter since - its value wins
+            self._conn.execute("INSERT OR IGNORE INTO sequences (name, value) VALUES (?, ?)", (name, start))
+            self._conn.execute("UPDATE sequences SET value = value + ? WHERE name = ?", (count, name))
+            value = self._conn.execute("SELECT value FROM sequences WHERE name = ?", (name,)).fetchone()[0]
+            return value - count + 1
+
+
+def create_backend(kind, get_worksheet=None, excel_file=None, sqlite_file=None, quota=None):
+    """Build the storage backend named by configuration (sheets, excel or sqlite)"""
+    kind = (kind or 'sheets').strip().lower()
+    if kind in ('sheets', 'google', 'gsheets'):
+        return GoogleSheetsBackend(get_worksheet, quota=quota)
+    if kind == 'excel':
+        return ExcelBackend(excel_file)
+    if kind == 'sqlite':
+        return SQLiteBackend(sqlite_file)
+    raise ValueError(f"Unknown storage backend: {kind}")
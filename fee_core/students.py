@@ -0,0 +1,144 @@
+"""
+Student Fee Management System - Student Table
+One entry per student (Student ID, name, father, mobile) with the sheet rows
+holding that student's monthly fees, kept in step with the record cache.
+
+The sheet stays one row per student-month, so this is a normalised view over
+it: each student gets an integer number on first sight and keeps it until the
+cache is rebuilt. Profile lookups read only the student's own rows.
+
+A student's ID and mobile are those of their bottom-most row in the sheet
+(normally the latest month added), however the table got there - a rebuild
+and a run of incremental updates always agree.
+"""
+
+import bisect
+import threading
+
+
+def identity(student_name, father_name):
+    """Lookup key for a student - name + father, as matched everywhere else"""
+    return (str(student_name or '').strip(), str(father_name or '').strip())
+
+
+class StudentTable:
+    """Students keyed by number, with a per-student index of fee rows"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # number -> {'name', 'father', 'rows': [row_number], 'details': {row_number: (student_id, mobile)}}
+        self._students = {}
+        self._by_identity = {}  # (name, father) -> number
+        self._next = 1
+
+    def _insert(self, row_number, record):
+        key = identity(record.student_name, record.father_name)
+        number = self._by_identity.get(key)
+        if number is None:
+            number = self._by_identity[key] = self._next
+            self._next += 1
+            self._students[number] = {
+                'name': record.student_name,
+                'father': record.father_name,
+                'rows': [],
+                'details': {}
+            }
+        student = self._students[number]
+        bisect.insort(student['rows'], row_number)
+        student['details'][row_number] = (record.student_id, record.mobile)
+
+    def _remove(self, row_number, record):
+        key = identity(record.student_name, record.father_name)
+        number = self._by_identity.get(key)
+        if number is None:
+            return
+        student = self._students[number]
+        rows = student['rows']
+        if row_number in rows:
+            rows.remove(row_number)
+            del student['details'][row_number]
+        if not rows:
+            del self._students[number]
+            del self._by_identity[key]
+
+    @staticmethod
+    def _info(number, student):
+        student_id, mobile = student['details'][student['rows'][-1]]
+        return {
+            'number': number,
+            'student_id': student_id,
+            'name': student['name'],
+            'father': student['father'],
+            'mobile': mobile
+        }
+
+    # ----- lookups -----
+
+    def find(self, student_name, father_name):
+        """Student number for a name + father, or None"""
+        with self._lock:
+            return self._by_identity.get(identity(student_name, father_name))
+
+    def resolve(self, student_key):
+        """(name, father) for a legacy 'name_father' key, or None.
+
+        Names may themselves contain '_', so every split point is tried
+        against the table instead of trusting the first underscore.
+        """
+        with self._lock:
+            parts = student_key.split('_')
+            for i in range(1, len(parts) + 1):
+                key = identity('_'.join(parts[:i]), '_'.join(parts[i:]))
+                if key in self._by_identity:
+                    return key
+            return None
+
+    def rows(self, number):
+        """Sheet rows (ascending) holding this student's fee records"""
+        with self._lock:
+            student = self._students.get(number)
+            return list(student['rows']) if student else []
+
+    def info(self, number):
+        """Student ID, name, father and mobile for a student number, or None"""
+        with self._lock:
+            student = self._students.get(number)
+            return self._info(number, student) if student else None
+
+    def all(self):
+        """Every student, in the order first seen in the sheet"""
+        with self._lock:
+            return [self._info(number, student) for number, student in self._students.items()]
+
+    def __len__(self):
+        return len(self._students)
+
+    # ----- maintenance (called by RecordCache) -----
+
+    def rebuild(self, records):
+        with self._lock:
+            self._reset()
+            for idx, record in enumerate(records):
+                self._insert(idx + 2, record)
+
+    def on_update(self, row_number, old_record, new_record):
+        with self._lock:
+            self._remove(row_number, old_record)
+            self._insert(row_number, new_record)
+
+    def on_append(self, start_row, records):
+        with self._lock:
+            for offset, record in enumerate(records):
+                self._insert(start_row + offset, record)
+
+    def on_delete(self, row_number, old_record):
+        with self._lock:
+            self._remove(row_number, old_record)
+            # Rows below the deleted one move up
+            for student in self._students.values():
+                student['rows'] = [r - 1 if r > row_number else r for r in student['rows']]
+                student['details'] = {r - 1 if r > row_number else r: details
+                                      for r, details in student['details'].items()}
@@ -0,0 +1,262 @@
+"""
+Student Fee Management System - Request Timing
+Where each request spends its time, and how many Sheets API calls it makes.
+
+Code marks its work with `phase(name)`:
+
+- fetch      reading storage (Sheets API, SQLite, Excel)
+- parse      turning fetched rows into records and rebuilding the cache
+- serialize  JSON responses and Excel exports
+- write      writing storage, including queued writes flushed by the request
+- throttle   waiting on the Sheets quota limiter or backing off after a 429
+
+Phases nest and are exclusive - time in an inner phase is not also counted
+in the outer one - and whatever is left over is `compute` (filtering,
+sorting, aggregation, routing). Outside a request `phase()` does nothing, so
+background flushes and import jobs are not attributed to anybody.
+
+Each request's breakdown goes out as a Server-Timing header and into the
+RequestMetrics histograms served in Prometheus text format.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds - covers cache hits (sub-ms) through cold Sheets reads and big exports
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_local = threading.local()
+
+
+class RequestTimer:
+    """Exclusive time per phase and API calls per kind for one request"""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.total = None
+        self.phases = {}
+        self.calls = {}
+        self.rows = {}    # 'fetched', 'written', 'parsed', 'exported' -> row count
+        self._stack = []  # [phase, resumed_at] - only the top one is running
+
+    def enter(self, name):
+        now = self._clock()
+        if self._stack:
+            self._pause(now)
+        self._stack.append([name, now])
+
+    def exit(self):
+        now = self._clock()
+        self._pause(now)
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def _pause(self, now):
+        name, resumed = self._stack[-1]
+        self.phases[name] = self.phases.get(name, 0.0) + (now - resumed)
+
+    def count(self, kind, amount=1):
+        self.calls[kind] = self.calls.get(kind, 0) + amount
+
+    def count_rows(self, kind, amount):
+        self.rows[kind] = self.rows.get(kind, 0) + amount
+
+    def finish(self):
+        """Stop the clock; unattributed time becomes `compute`. Returns the total seconds."""
+        if self.total is None:
+            while self._stack:
+                self.exit()
+            self.total = self._clock() - self.started
+            timed = sum(self.phases.values())
+            self.phases['compute'] = self.phases.get('compute', 0.0) + max(self.total - timed, 0.0)
+        return self.total
+
+    def server_timing(self):
+        """Server-Timing header value: one entry per phase, the total, and Sheets calls"""
+        total = self.finish()
+        entries = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.phases.items() if seconds > 0]
+        entries.append(f'total;dur={total * 1000:.2f}')
+        entries.extend(f'sheets-{kind};desc="{count}"' for kind, count in sorted(self.calls.items()))
+        return ', '.join(entries)
+
+
+def start_request(clock=time.perf_counter):
+    """Begin timing the current thread's request"""
+    _local.timer = RequestTimer(clock)
+    return _local.timer
+
+
+def end_request():
+    """Stop timing the current thread's request; returns its timer (or None)"""
+    timer = getattr(_local, 'timer', None)
+    _local.timer = None
+    if timer is not None:
+        timer.finish()
+    return timer
+
+
+def current():
+    """Timer of the request running on this thread, or None"""
+    return getattr(_local, 'timer', None)
+
+
+@contextmanager
+def phase(name):
+    """Attribute the enclosed work to a phase of the current request"""
+    timer = current()
+    if timer is None:
+        yield
+        return
+    timer.enter(name)
+    try:
+        yield
+    finally:
+        timer.exit()
+
+
+def count_call(kind):
+    """Count one Sheets API call ('read', 'write', 'drive') against the current request"""
+    timer = current()
+    if timer is not None:
+        timer.count(kind)
+
+
+def count_rows(kind, amount):
+    """Count rows fetched, written, parsed or exported by the current request"""
+    timer = current()
+    if timer is not None:
+        timer.count_rows(kind, amount)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """Per-route request counts, latency and phase histograms, and Sheets calls.
+
+    Routes are URL rules ('/api/student-profile/<path:student_key>'), not
+    paths, so the number of series stays fixed.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._requests = {}   # (route, method, status) -> count
+        self._durations = {}  # (route, method) -> Histogram
+        self._phases = {}     # (route, phase) -> Histogram
+        self._calls = {}      # (route, kind) -> count
+
+    def observe(self, route, method, status, timer):
+        total = timer.finish()
+        with self._lock:
+            key = (route, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._histogram(self._durations, (route, method)).observe(total)
+            for name, seconds in timer.phases.items():
+                self._histogram(self._phases, (route, name)).observe(seconds)
+            for kind, count in timer.calls.items():
+                self._calls[(route, kind)] = self._calls.get((route, kind), 0) + count
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(self.buckets)
+        return histogram
+
+    def render(self):
+        """Everything in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            lines.append('# HELP fee_requests_total HTTP requests handled.')
+            lines.append('# TYPE fee_requests_total counter')
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(f'fee_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+            lines.append('# HELP fee_request_duration_seconds Time to handle a request.')
+            lines.append('# TYPE fee_request_duration_seconds histogram')
+            for (route, method), histogram in sorted(self._durations.items()):
+                self._render_histogram(lines, 'fee_request_duration_seconds', histogram,
+                                       route=route, method=method)
+
+            lines.append('# HELP fee_request_phase_seconds Time a request spent in each phase.')
+            lines.append('# TYPE fee_request_phase_seconds histogram')
+            for (route, name), histogram in sorted(self._phases.items()):
+                self._render_histogram(lines, 'fee_request_phase_seconds', histogram, route=route, phase=name)
+
+            lines.append('# HELP fee_sheets_api_calls_total Google Sheets API calls made while handling requests.')
+            lines.append('# TYPE fee_sheets_api_calls_total counter')
+            for (route, kind), count in sorted(self._calls.items()):
+                lines.append(f'fee_sheets_api_calls_total{_labels(route=route, kind=kind)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histogram(lines, name, histogram, **labels):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{_labels(**labels, le=repr(float(bound)))} {count}')
+        lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+
+
+def instrument(app, metrics):
+    """Time every request of a Flask app: Server-Timing header plus `metrics`.
+
+    JSON responses are serialised inside the view, so the app's JSON provider
+    is wrapped to put that time in the `serialize` phase.
+    """
+    from flask import request
+    from flask.json.provider import DefaultJSONProvider
+
+    base = type(app.json) if isinstance(app.json, DefaultJSONProvider) else DefaultJSONProvider
+
+    class TimedJSONProvider(base):
+        def dumps(self, obj, **kwargs):
+            with phase('serialize'):
+                return super().dumps(obj, **kwargs)
+
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_timer():
+        start_request()
+
+    @app.after_request
+    def record_timing(response):
+        timer = end_request()
+        if timer is not None:
+            response.headers['Server-Timing'] = timer.server_timing()
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            metrics.observe(route, request.method, response.status_code, timer)
+        return response
+
+    @app.teardown_request
+    def drop_timer(error=None):
+        # Never leave a timer behind for the next request on this thread
+        end_request()
+
+    return app
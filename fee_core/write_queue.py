@@ -0,0 +1,425 @@
+"""
+Student Fee Management System - Write-Behind Queue
+Collects row updates and appends for a short window and sends them to storage
+together: every queued update in one batch request, then one append.
+
+Repeated edits to the same row are merged so only the last version is sent.
+Pending operations are journaled to a local file before the request returns,
+so a crash or restart replays them instead of losing them:
+
+- every process writes its own journal (pending_writes.<pid>.jsonl), so one
+  process emptying its queue never deletes what another still owes; journals
+  left by processes that are gone are claimed and replayed on startup
+- replayed updates are matched to rows by student + father + month, not by
+  the row number they had before the restart - rows may have moved since
+
+A batch that keeps failing is retried `max_attempts` times with growing
+delays, then set aside in pending_writes.failed.jsonl and reported by stats()
+instead of being retried forever.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from fee_core.row_index import record_key
+
+
+def _key_of(record):
+    return record_key(record.get('Student Name'), record.get('Father Name'), record.get('Month'))
+
+
+def _pid_alive(pid):
+    """Whether a process with this ID is still running"""
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        import ctypes
+        # PROCESS_QUERY_LIMITED_INFORMATION - signal 0 would be CTRL_C_EVENT on Windows
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class WriteBehindQueue:
+    """Buffers writes for `window` seconds, then flushes them in one batch"""
+
+    def __init__(self, backend, window=2.0, journal_path=None, max_attempts=5, max_retry_delay=60.0):
+        self.backend = backend
+        self.window = window
+        # Base name - the journal itself is per process, see journal_path
+        self.journal_base = journal_path
+        self.max_attempts = max_attempts
+        self.max_retry_delay = max_retry_delay
+        # Called after a batch is given up on, e.g. to drop cached values that never reached storage
+        self.on_drop = None
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._updates = {}        # row_number -> record
+        self._keys = {}           # row_number -> (student, father, month) of the row being overwritten
+        self._replay = {}         # (student, father, month) -> record, recovered from a journal
+        self._appends = []        # records waiting to be appended
+        self._append_row = None   # sheet row of _appends[0], when known
+        self._first_queued_at = None
+        self._recovered = False
+        self._attempts = 0        # consecutive failed flushes of the pending batch
+        self._failed = deque(maxlen=50)
+        # Metrics
+        self.enqueued = 0
+        self.merged = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped_ops = 0
+        self.ops_flushed = 0
+        self.last_flush_ms = None
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.last_error = None
+        self._load_journals()
+
+    # ----- journal -----
+
+    @property
+    def journal_path(self):
+        """This process's journal (looked up per call, so forked workers get their own)"""
+        if not self.journal_base:
+            return None
+        root, ext = os.path.splitext(self.journal_base)
+        return f'{root}.{os.getpid()}{ext}'
+
+    @property
+    def failed_path(self):
+        if not self.journal_base:
+            return None
+        root, ext = os.path.splitext(self.journal_base)
+        return f'{root}.failed{ext}'
+
+    def _orphaned_journals(self):
+        """Journals of processes that are no longer running (plus the old shared file)"""
+        directory = os.path.dirname(self.journal_base) or '.'
+        root, ext = os.path.splitext(os.path.basename(self.journal_base))
+        orphans = []
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        for name in names:
+            if name == root + ext:
+                orphans.append(name)
+                continue
+            if name.startswith(root + '.') and name.endswith('.claimed'):
+                # Claimed by a process that died before replaying it
+                pid = name.rsplit('.', 2)[-2]
+                if pid.isdigit() and not _pid_alive(int(pid)):
+                    orphans.append(name)
+                continue
+            if not (name.startswith(root + '.') and name.endswith(ext)):
+                continue
+            pid = name[len(root) + 1:-len(ext) if ext else None]
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                orphans.append(name)
+        return [os.path.join(directory, name) for name in sorted(orphans)]
+
+    def _load_journals(self):
+        """Re-queue operations left over by processes that have exited"""
+        if not self.journal_base:
+            return
+        recovered = 0
+        for path in self._orphaned_journals():
+            # Renaming claims the file - when two workers start together only one replays it
+            claimed = f'{path}.{os.getpid()}.claimed'
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed, encoding='utf-8') as f:
+                    entries = [json.loads(line) for line in f if line.strip()]
+            except (OSError, ValueError) as e:
+                print(f"Error reading write journal {path}: {e}")
+                continue
+            for entry in entries:
+                if entry.get('op') == 'update':
+                    self._queue_replay(entry)
+                elif entry.get('op') == 'append':
+                    # Rows may have moved since - don't trust the old start row
+                    self._queue_append(entry['records'], None)
+            recovered += len(entries)
+            # Owned by this process now; removed once it is in our own journal
+            self._rewrite_journal()
+            os.remove(claimed)
+        if recovered:
+            self._recovered = True
+            print(f"Recovered {recovered} pending write(s) from earlier journals")
+
+    def _journal(self, entry):
+        if not self.journal_base:
+            return
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_journal(self):
+        """Replace this process's journal with what is still pending (called with _lock held)"""
+        if not self.journal_base:
+            return
+        path = self.journal_path
+        entries = [{'op': 'update', 'row': row, 'key': list(self._keys.get(row) or _key_of(record)), 'record': record}
+                   for row, record in sorted(self._updates.items())]
+        entries.extend({'op': 'update', 'key': list(key), 'record': record} for key, record in self._replay.items())
+        if self._appends:
+            entries.append({'op': 'append', 'row': self._append_row, 'records': self._appends})
+        if not entries:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry) + '\n' for entry in entries)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # ----- queueing -----
+
+    def _pending_append_index(self, row_number):
+        if self._append_row is None:
+            return None
+        index = row_number - self._append_row
+        return index if 0 <= index < len(self._appends) else None
+
+    def _queue_update(self, row_number, record, key=None):
+        index = self._pending_append_index(row_number)
+        if index is not None:
+            # Row not written yet - edit the queued append instead
+            self._appends[index] = dict(record)
+            self.merged += 1
+        else:
+            if row_number in self._updates:
+                self.merged += 1
+            else:
+                self._keys[row_number] = tuple(key) if key else _key_of(record)
+            self._updates[row_number] = dict(record)
+
+    def _queue_replay(self, entry):
+        """A journaled update, located by the identity of the row it overwrites"""
+        record = entry['record']
+        key = tuple(entry['key']) if entry.get('key') else _key_of(record)
+        for i, pending in enumerate(self._appends):
+            if _key_of(pending) == key:
+                # Edit of a row that was still waiting to be appended
+                self._appends[i] = dict(record)
+                return
+        self._replay[key] = dict(record)
+
+    def _queue_append(self, records, start_row=None):
+        if not self._appends:
+            self._append_row = start_row
+        elif self._append_row is not None and start_row != self._append_row + len(self._appends):
+            self._append_row = None  # Row numbers unknown - later edits go through _updates
+        self._appends.extend(dict(r) for r in records)
+
+    def _schedule(self, delay=None):
+        if self._first_queued_at is None:
+            self._first_queued_at = time.monotonic()
+        if self._timer is None:
+            self._timer = threading.Timer(self.window if delay is None else delay, self._timer_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def update(self, row_number, record, key=None):
+        """Queue a full-row overwrite; `key` is (student, father, month) of the row's current record"""
+        with self._lock:
+            key = tuple(key) if key else _key_of(record)
+            self._journal({'op': 'update', 'row': row_number, 'key': list(key), 'record': record})
+            self._queue_update(row_number, record, key)
+            self.enqueued += 1
+            self._schedule()
+
+    def append(self, records, start_row=None):
+        """Queue records to append; `start_row` is the sheet row the first will land on"""
+        records = [dict(r) for r in records]
+        if not records:
+            return
+        with self._lock:
+            self._journal({'op': 'append', 'row': start_row, 'records': records})
+            self._queue_append(records, start_row)
+            self.enqueued += len(records)
+            self._schedule()
+
+    def pending(self):
+        with self._lock:
+            return len(self._updates) + len(self._replay) + len(self._appends)
+
+    # ----- flushing -----
+
+    def _timer_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _resolve_replay(self, replay, appends):
+        """Row numbers for replayed updates, looked up in storage by student + father + month.
+
+        Also drops appends that reached storage before the crash. Returns
+        (updates, keys, appends, lost) - lost are updates whose row no longer exists.
+        """
+        rows = {}
+        for idx, record in enumerate(self.backend.read_all()):
+            rows.setdefault(_key_of(record), idx + 2)
+        updates, keys, lost = {}, {}, []
+        for key, record in replay.items():
+            row_number = rows.get(key)
+            if row_number is None:
+                lost.append(record)
+            else:
+                updates[row_number], keys[row_number] = record, key
+        appends = [r for r in appends if _key_of(r) not in rows]
+        return updates, keys, appends, lost
+
+    def flush(self):
+        """Send everything pending to storage; True when nothing is left pending"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                updates, keys, appends, append_row = self._updates, self._keys, self._appends, self._append_row
+                replay, queued_at, recovered = self._replay, self._first_queued_at, self._recovered
+                self._updates, self._keys, self._appends, self._append_row = {}, {}, [], None
+                self._replay, self._first_queued_at = {}, None
+            if not updates and not appends and not replay:
+                return True
+
+            started = time.perf_counter()
+            try:
+                if replay or (recovered and appends):
+                    replayed, replayed_keys, appends, lost = self._resolve_replay(replay, appends)
+                    # Edits made since the restart win over replayed ones
+                    updates, keys = {**replayed, **updates}, {**replayed_keys, **keys}
+                    replay = {}
+                    if lost:
+                        with self._lock:
+                            self._set_aside([{'op': 'update', 'record': r} for r in lost],
+                                            'row no longer exists in storage')
+                if updates:
+                    self.backend.update_rows(updates)
+                    # Written - don't resend them if the append below fails
+                    ops, updates, keys = len(updates), {}, {}
+                else:
+                    ops = 0
+                if appends:
+                    self.backend.append_rows(appends)
+                    ops += len(appends)
+            except Exception as e:
+                print(f"Error flushing queued writes to {self.backend.name}: {e}")
+                with self._lock:
+                    self.failed_flushes += 1
+                    self.last_error = str(e)
+                    self._attempts += 1
+                    gave_up = self._attempts >= self.max_attempts
+                    if gave_up:
+                        self._give_up(updates, replay, appends, str(e))
+                    else:
+                        self._requeue(updates, keys, replay, appends, append_row, queued_at)
+                        # Back off: window, 2x window, 4x window ... up to max_retry_delay
+                        self._schedule(min(self.window * 2 ** self._attempts, self.max_retry_delay))
+                    self._rewrite_journal()
+                if gave_up and self.on_drop is not None:
+                    self.on_drop()
+                return False
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._recovered = False
+                self._attempts = 0
+                self.flushes += 1
+                self.ops_flushed += ops
+                self.last_flush_ms = round(elapsed_ms, 1)
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self.total_flush_ms += elapsed_ms
+                self.last_error = None
+                self._rewrite_journal()
+            return True
+
+    def _give_up(self, updates, replay, appends, error):
+        """Stop retrying a batch (called with _lock held)"""
+        ops = [{'op': 'update', 'row': row, 'record': record} for row, record in sorted(updates.items())]
+        ops.extend({'op': 'update', 'key': list(key), 'record': record} for key, record in replay.items())
+        if appends:
+            ops.append({'op': 'append', 'records': appends})
+        self._set_aside(ops, f'gave up after {self._attempts} attempts: {error}')
+        self._attempts = 0
+        print(f"Gave up on {len(ops)} queued write(s) after {self.max_attempts} failed flushes")
+
+    def _set_aside(self, ops, reason):
+        """Record writes that will not be sent - kept in stats() and the failed-writes file"""
+        at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        for op in ops:
+            entry = dict(op, error=reason, at=at)
+            self._failed.append(entry)
+            self.dropped_ops += len(op['records']) if op['op'] == 'append' else 1
+            if self.failed_path:
+                try:
+                    with open(self.failed_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(entry) + '\n')
+                except OSError as e:
+                    print(f"Error recording failed write: {e}")
+
+    def _requeue(self, updates, keys, replay, appends, append_row, queued_at):
+        """Put a failed batch back in front of anything queued since (called with _lock held)"""
+        newer_updates, newer_keys, newer_appends, newer_row = self._updates, self._keys, self._appends, self._append_row
+        newer_replay = self._replay
+        self._updates, self._keys = dict(updates), dict(keys)
+        self._replay = dict(replay)
+        self._replay.update(newer_replay)
+        self._appends = list(appends)
+        self._append_row = append_row if appends else None
+        for row_number, record in newer_updates.items():
+            self._queue_update(row_number, record, newer_keys.get(row_number))
+        if newer_appends:
+            self._queue_append(newer_appends, newer_row)
+        if queued_at is not None:
+            self._first_queued_at = min(queued_at, self._first_queued_at or queued_at)
+
+    def failed_writes(self):
+        """Writes given up on (newest last), with the reason"""
+        with self._lock:
+            return list(self._failed)
+
+    def stats(self):
+        """Queue depth, flush latency and writes that could not be sent"""
+        with self._lock:
+            age = time.monotonic() - self._first_queued_at if self._first_queued_at is not None else None
+            return {
+                'window_seconds': self.window,
+                'pending_ops': len(self._updates) + len(self._replay) + len(self._appends),
+                'oldest_pending_seconds': round(age, 2) if age is not None else None,
+                'enqueued': self.enqueued,
+                'merged': self.merged,
+                'flushes': self.flushes,
+                'failed_flushes': self.failed_flushes,
+                'retry_attempt': self._attempts,
+                'dropped_ops': self.dropped_ops,
+                'failed_writes': list(self._failed)[-10:],
+                'ops_flushed': self.ops_flushed,
+                'last_flush_ms': self.last_flush_ms,
+                'avg_flush_ms': round(self.total_flush_ms / self.flushes, 1) if self.flushes else None,
+                'max_flush_ms': round(self.max_flush_ms, 1),
+                'last_error': self.last_error
+            }
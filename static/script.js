@@ -12,6 +12,14 @@ let perPage = 50;
 let totalPages = 1;
 let totalRecords = 0;
 
+// Read endpoints send ETags: always revalidate, so an unchanged reload is a bodyless 304
+const REVALIDATE = { cache: 'no-cache' };
+
+// Import progress is polled once a second: give up after 30 minutes, or 5 failed checks in a row
+const UPLOAD_POLL_MS = 1000;
+const UPLOAD_POLL_LIMIT = 1800;
+const UPLOAD_POLL_ERRORS = 5;
+
 // ===================================
 // Initialization
 // ===================================
@@ -93,7 +101,7 @@ function populateMonthDropdowns() {
 async function loadStudents(page = 1) {
     try {
         currentPage = page;
-        const response = await fetch(`/api/students?page=${page}&per_page=${perPage}`);
+        const response = await fetch(`/api/students?page=${page}&per_page=${perPage}`, REVALIDATE);
         const data = await response.json();
         
         if (data.success) {
@@ -141,7 +149,7 @@ function changePerPage() {
 
 async function loadSummary() {
     try {
-        const response = await fetch('/api/summary');
+        const response = await fetch('/api/summary', REVALIDATE);
         const data = await response.json();
         
         if (data.success) {
@@ -199,8 +207,8 @@ function renderTable(students) {
             ? `<span class="receipt-number clickable" onclick="searchByReceiptNumber('${escapeHtml(student['Receipt Number'] || '')}')">${student['Receipt Number']}</span>`
             : `<span class="no-receipt">-</span>`;
         
-        // Create a unique key from name and father name
-        const studentKey = `${student['Student Name'] || ''}_${student['Father Name'] || ''}`;
+        const studentName = escapeHtml(student['Student Name'] || '');
+        const fatherName = escapeHtml(student['Father Name'] || '');
         
         // Quick action button - only show for unpaid
         const quickActionBtn = !isPaid 
@@ -215,7 +223,7 @@ function renderTable(students) {
             <tr class="${rowClass}">
                 <td>${escapeHtml(student['Student ID'] || '-')}</td>
                 <td>
-                    <strong class="student-name clickable" onclick="openStudentProfile('${escapeHtml(studentKey)}')">${escapeHtml(student['Student Name'] || '')}</strong>
+                    <strong class="student-name clickable" onclick="openStudentProfile('${studentName}', '${fatherName}')">${escapeHtml(student['Student Name'] || '')}</strong>
                 </td>
                 <td>${escapeHtml(student['Father Name'] || '')}</td>
                 <td>${escapeHtml(student['Mobile Number'] || '-')}</td>
@@ -230,7 +238,7 @@ function renderTable(students) {
                     <div class="action-buttons">
                         ${quickActionBtn}
                         <button class="btn btn-primary btn-small" 
-                                onclick="openEditModal('${escapeHtml(studentKey)}', '${escapeHtml(student['Month'] || '')}', '${escapeHtml(student['Student Name'] || '')}', '${escapeHtml(student['Fee Status'] || '')}', '${escapeHtml(student['Receipt Number'] || '')}')">
+                                onclick="openEditModal('${studentName}', '${fatherName}', '${escapeHtml(student['Month'] || '')}', '${escapeHtml(student['Fee Status'] || '')}', '${escapeHtml(student['Receipt Number'] || '')}')">
                             ✏️ Edit
                         </button>
                         <button class="btn btn-success btn-small" 
@@ -238,7 +246,7 @@ function renderTable(students) {
                             📅 Add Month
                         </button>
                         <button class="btn btn-danger btn-small" 
-                                onclick="deleteRecord('${escapeHtml(studentKey)}', '${escapeHtml(student['Month'] || '')}')">
+                                onclick="deleteRecord('${studentName}', '${fatherName}', '${escapeHtml(student['Month'] || '')}')">
                             🗑️
                         </button>
                     </div>
@@ -310,7 +318,7 @@ async function performSearch(page = 1) {
         params.append('page', page);
         params.append('per_page', perPage);
         
-        const response = await fetch(`/api/search?${params.toString()}`);
+        const response = await fetch(`/api/search?${params.toString()}`, REVALIDATE);
         const data = await response.json();
         
         if (data.success) {
@@ -372,9 +380,10 @@ function searchByReceiptNumber(receiptNumber) {
     searchByReceipt();
 }
 
-async function openStudentProfile(studentKey) {
+async function openStudentProfile(studentName, fatherName) {
     try {
-        const response = await fetch(`/api/student-profile/${encodeURIComponent(studentKey)}`);
+        const params = new URLSearchParams({ name: studentName, father: fatherName || '' });
+        const response = await fetch(`/api/student-profile?${params}`);
         const data = await response.json();
         
         if (data.success) {
@@ -632,9 +641,9 @@ async function addMonthRecord(event) {
     }
 }
 
-function openEditModal(studentKey, month, studentName, feeStatus, receiptNumber) {
-    document.getElementById('editStudentName').value = studentKey.split('_')[0] || studentName;
-    document.getElementById('editFatherName').value = studentKey.split('_')[1] || '';
+function openEditModal(studentName, fatherName, month, feeStatus, receiptNumber) {
+    document.getElementById('editStudentName').value = studentName;
+    document.getElementById('editFatherName').value = fatherName || '';
     document.getElementById('editMonth').value = month;
     document.getElementById('editStudentName').textContent = studentName;
     document.getElementById('editMonthDisplay').textContent = month;
@@ -718,11 +727,7 @@ async function updateRecord(event) {
     }
 }
 
-async function deleteRecord(studentKey, month) {
-    const parts = studentKey.split('_');
-    const studentName = parts[0] || '';
-    const fatherName = parts[1] || '';
-    
+async function deleteRecord(studentName, fatherName, month) {
     if (!confirm(`Are you sure you want to delete this record?\n\nStudent: ${studentName}\nFather: ${fatherName}\nMonth: ${month}`)) {
         return;
     }
@@ -796,7 +801,7 @@ async function loadDefaulters() {
     const minMonths = document.getElementById('defaulterMinMonths')?.value || 2;
     
     try {
-        const response = await fetch(`/api/defaulters?min_months=${minMonths}`);
+        const response = await fetch(`/api/defaulters?min_months=${minMonths}`, REVALIDATE);
         const data = await response.json();
         
         if (data.success) {
@@ -899,6 +904,11 @@ function handleFileSelect(event) {
 async function uploadFile(file) {
     const formData = new FormData();
     formData.append('file', file);
+    // Replacing is the default; appending imports in the background and skips records that already exist
+    const mode = document.querySelector('input[name="uploadMode"]:checked');
+    if (mode && mode.value === 'append') {
+        formData.append('mode', 'stream');
+    }
     
     try {
         showToast('Uploading file...', 'info');
@@ -910,7 +920,10 @@ async function uploadFile(file) {
         
         const result = await response.json();
         
-        if (result.success) {
+        if (result.success && result.job_id) {
+            hideModal('uploadModal');
+            await pollUploadJob(result.job_id);
+        } else if (result.success) {
             showToast(result.message, 'success');
             hideModal('uploadModal');
             loadStudents();
@@ -927,6 +940,67 @@ async function uploadFile(file) {
     document.getElementById('fileInput').value = '';
 }
 
+async function pollUploadJob(jobId) {
+    let lastProgress = null;
+    let failures = 0;
+    
+    for (let attempt = 0; attempt < UPLOAD_POLL_LIMIT; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, UPLOAD_POLL_MS));
+        
+        let job;
+        try {
+            const response = await fetch(`/api/upload/${jobId}`);
+            if (!response.ok) {
+                // e.g. 404 once the job is forgotten or another server answers
+                const result = await response.json().catch(() => ({}));
+                showToast(result.error || `Import status unavailable (HTTP ${response.status})`, 'error');
+                loadStudents();
+                loadSummary();
+                return;
+            }
+            const result = await response.json();
+            if (!result.success) {
+                showToast(result.error || 'Import status unavailable', 'error');
+                return;
+            }
+            job = result.job;
+            failures = 0;
+        } catch (error) {
+            console.error('Error checking import progress:', error);
+            if (++failures >= UPLOAD_POLL_ERRORS) {
+                showToast('Lost contact with the server while importing - refresh to see what was added', 'error');
+                return;
+            }
+            continue;
+        }
+        
+        if (job.status === 'done') {
+            let message = `Imported ${job.added} records`;
+            if (job.skipped > 0) {
+                message += ` (${job.skipped} skipped as duplicates or incomplete)`;
+            }
+            showToast(message, 'success');
+            loadStudents();
+            loadSummary();
+            return;
+        }
+        
+        if (job.status === 'failed') {
+            showToast(`Import failed after ${job.added} records: ${job.error}`, 'error');
+            loadStudents();
+            loadSummary();
+            return;
+        }
+        
+        if (job.progress !== null && job.progress !== lastProgress) {
+            lastProgress = job.progress;
+            showToast(`Importing... ${job.progress}% (${job.processed_rows} rows)`, 'info');
+        }
+    }
+    
+    showToast('Import is still running - refresh later to see the new records', 'error');
+}
+
 // ===================================
 // Download Functions
 // ===================================
@@ -1004,10 +1078,15 @@ function escapeHtml(text) {
 let allUniqueStudents = [];
 let selectedStudentsSet = new Set();
 
+// Names may contain any character, so the pair is JSON-encoded rather than joined with '_'
+function studentSelectionKey(name, father) {
+    return JSON.stringify([name, father]);
+}
+
 // Load unique students from API
 async function loadUniqueStudents() {
     try {
-        const response = await fetch('/api/unique-students');
+        const response = await fetch('/api/unique-students', REVALIDATE);
         const data = await response.json();
         if (data.success) {
             allUniqueStudents = data.students;
@@ -1227,7 +1306,7 @@ function showSuggestions(query) {
     
     // Build suggestions HTML
     suggestions.innerHTML = filtered.slice(0, 15).map(student => {
-        const key = `${student.name}_${student.father}`;
+        const key = studentSelectionKey(student.name, student.father);
         const isSelected = selectedStudentsSet.has(key);
         const initials = student.name.split(' ').map(n => n[0]).join('').substring(0, 2).toUpperCase();
         
@@ -1249,7 +1328,7 @@ function showSuggestions(query) {
 
 // Toggle student selection
 function toggleStudent(name, father) {
-    const key = `${name}_${father}`;
+    const key = studentSelectionKey(name, father);
     
     if (selectedStudentsSet.has(key)) {
         selectedStudentsSet.delete(key);
@@ -1275,7 +1354,7 @@ function updateSelectedChips() {
     }
     
     container.innerHTML = Array.from(selectedStudentsSet).map(key => {
-        const [name, father] = key.split('_');
+        const [name, father] = JSON.parse(key);
         return `
             <div class="student-chip">
                 <span class="chip-name">${escapeHtml(name)}</span>
@@ -1288,7 +1367,7 @@ function updateSelectedChips() {
 
 // Remove a student from selection
 function removeStudent(name, father) {
-    const key = `${name}_${father}`;
+    const key = studentSelectionKey(name, father);
     selectedStudentsSet.delete(key);
     updateSelectedChips();
     updateSelectedCount();
@@ -1312,7 +1391,7 @@ function updateSelectedCount() {
 // Select all students
 function selectAllStudents() {
     allUniqueStudents.forEach(student => {
-        const key = `${student.name}_${student.father}`;
+        const key = studentSelectionKey(student.name, student.father);
         selectedStudentsSet.add(key);
     });
     updateSelectedChips();
@@ -1359,7 +1438,7 @@ async function submitBulkSelection() {
     // Build records - for each student x each month combination
     const records = [];
     Array.from(selectedStudentsSet).forEach(key => {
-        const [name, father] = key.split('_');
+        const [name, father] = JSON.parse(key);
         
         // Find full student info from loaded list
         const studentInfo = allUniqueStudents.find(s => 
@@ -0,0 +1,143 @@
+"""
+Shared fixtures - the tests import fee_core and create_sample_data from the
+repository root, whichever directory pytest is started from.
+
+Views maintained by the record cache are tested the same way: run a mutation
+through the cache, then compare the view with one rebuilt from scratch from
+the records the cache ended up with.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from create_sample_data import iter_records  # noqa: E402
+from fee_core.cache import RecordCache  # noqa: E402
+
+
+@pytest.fixture
+def records():
+    """A small synthetic school: 30 students x 4 months, always the same"""
+    return list(iter_records(30, 4))
+
+
+def make_cache(records, *views):
+    cache = RecordCache(ttl=600, views=views)
+    cache.set(records)
+    return cache
+
+
+def rebuilt(cache, view):
+    """A new view of the same kind, built from the cache's current records"""
+    fresh = type(view)()
+    make_cache(cache.get_stale(), fresh)
+    return fresh
+
+
+def edited(record, **changes):
+    """Copy of a record with fields changed - Fee_Status='Paid' sets 'Fee Status'"""
+    record = dict(record)
+    for field, value in changes.items():
+        record[field.replace('_', ' ')] = value
+    return record
+
+
+def student_rows(cache, record):
+    """Sheet rows of the student a record belongs to"""
+    identity = (record['Student Name'], record['Father Name'])
+    return [i + 2 for i, r in enumerate(cache.get_stale()) if (r['Student Name'], r['Father Name']) == identity]
+
+
+# ----- mutations every view must survive -----
+
+def update_status(cache):
+    for row_number in (2, 17, cache.count() + 1):
+        record = cache.get_row(row_number)
+        paid = record['Fee Status'] == 'Paid'
+        cache.apply_update(row_number, edited(record, Fee_Status='Not Paid' if paid else 'Paid',
+                                              Receipt_Number='' if paid else f'RCP-TEST-{row_number}'))
+
+
+def move_to_other_student(cache):
+    # The only row of a new student, then back onto an existing one
+    cache.apply_update(5, edited(cache.get_row(5), Student_Name='Zoya New', Father_Name='Imran New'))
+    target = cache.get_row(30)
+    cache.apply_update(5, edited(cache.get_row(5), Student_Name=target['Student Name'],
+                                 Father_Name=target['Father Name'], Month='April 2027'))
+
+
+def change_details(cache):
+    top, *_, bottom = student_rows(cache, cache.get_row(2))
+    cache.apply_update(top, edited(cache.get_row(top), Mobile_Number='9111111111'))
+    cache.apply_update(bottom, edited(cache.get_row(bottom), Mobile_Number='9222222222', Student_ID='VK-NEW'))
+    cache.apply_delete(bottom)
+
+
+def append(cache):
+    existing = cache.get_row(5)
+    cache.apply_append([
+        edited(existing, Month='April 2026', Fee_Status='Not Paid', Receipt_Number=''),
+        edited(existing, Student_Name='Aarav Late', Father_Name='Mohan Late', Mobile_Number='9000000001')
+    ])
+
+
+def delete_first(cache):
+    cache.apply_delete(2)
+
+
+def delete_middle(cache):
+    cache.apply_delete(40)
+
+
+def delete_last(cache):
+    cache.apply_delete(cache.count() + 1)
+
+
+def delete_student(cache):
+    # Bottom first, so the row numbers still point at the right records
+    for row_number in reversed(student_rows(cache, cache.get_row(2))):
+        cache.apply_delete(row_number)
+
+
+def mixed(cache):
+    count = cache.count()
+    cache.apply_append([edited(cache.get_row(2), Month='April 2026', Receipt_Number='RCP-0426-001')])
+    cache.apply_delete(10)
+    cache.apply_update(10, edited(cache.get_row(10), Fee_Status='Paid', Receipt_Number='RCP-0426-002'))
+    cache.apply_delete(count + 1)
+    cache.apply_update(2, edited(cache.get_row(2), Student_Name='Renamed'))
+
+
+# ----- fresh reads merged into the cache (DataStore._refresh after the sheet changed) -----
+
+def merge_changes(cache):
+    fresh = cache.get_stale()
+    fresh[4] = edited(fresh[4], Fee_Status='Paid', Receipt_Number='RCP-MERGE-1')
+    fresh[60] = edited(fresh[60], Student_Name='Merged Name')
+    fresh.append(edited(fresh[1], Month='April 2026'))
+    cache.merge(fresh)
+
+
+def merge_truncated(cache):
+    cache.merge(cache.get_stale()[:-7])
+
+
+def merge_shift(cache):
+    # A row inserted at the top moves every record below it - rebuilt instead of merged
+    fresh = cache.get_stale()
+    cache.merge([edited(fresh[0], Student_Name='First Row')] + fresh)
+
+
+MUTATIONS = [update_status, move_to_other_student, change_details, append, delete_first, delete_middle,
+             delete_last, delete_student, mixed, merge_changes, merge_truncated, merge_shift]
+
+
+@pytest.fixture(params=MUTATIONS, ids=lambda mutation: mutation.__name__)
+def mutation(request):
+    """Each way the cache is changed in place, one per test run"""
+    return request.param
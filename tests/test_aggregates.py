@@ -0,0 +1,77 @@
+"""
+FeeAggregates: dashboard totals and the defaulters list, kept in step with
+the cache instead of rescanning every record.
+"""
+
+from conftest import edited, make_cache, rebuilt
+from fee_core.aggregates import FeeAggregates
+from fee_core.datastore import DataStore
+from fee_core.storage import SQLiteBackend
+
+
+def aggregate_state(aggregates):
+    summary = aggregates.summary()
+    summary['months'] = sorted(summary['months'])
+    return {'summary': summary, 'defaulters': aggregates.defaulters(1)}
+
+
+def test_summary_counts(records):
+    aggregates = FeeAggregates()
+    make_cache(records, aggregates)
+    summary = aggregates.summary()
+    paid = sum(r['Fee Status'] == 'Paid' for r in records)
+    assert (summary['total'], summary['paid'], summary['unpaid']) == (len(records), paid, len(records) - paid)
+    assert summary['total_students'] == len({(r['Student Name'], r['Father Name']) for r in records})
+    assert sum(c['paid'] + c['unpaid'] for c in summary['by_month'].values()) == len(records)
+
+
+def test_defaulters_order(records):
+    aggregates = FeeAggregates()
+    make_cache(records, aggregates)
+    defaulters = aggregates.defaulters(1)
+    # Most unpaid months first, ties by name then father
+    order = [(-d['unpaid_count'], d['student_name'], d['father_name']) for d in defaulters]
+    assert order == sorted(order)
+    assert all(len(d['unpaid_months']) == d['unpaid_count'] for d in defaulters)
+    assert aggregates.defaulters(99) == []
+
+
+def test_paying_moves_student_down_a_bucket(records):
+    aggregates = FeeAggregates()
+    cache = make_cache(records, aggregates)
+    row_number, record = next((i + 2, r) for i, r in enumerate(records) if r['Fee Status'] != 'Paid')
+    identity = (record['Student Name'], record['Father Name'])
+
+    def unpaid_count():
+        return next((d['unpaid_count'] for d in aggregates.defaulters(1)
+                     if (d['student_name'], d['father_name']) == identity), 0)
+
+    before = unpaid_count()
+    cache.apply_update(row_number, edited(record, Fee_Status='Paid', Receipt_Number='RCP-TEST-1'))
+    assert unpaid_count() == before - 1
+
+
+def test_matches_rebuild(records, mutation):
+    aggregates = FeeAggregates()
+    cache = make_cache(records, aggregates)
+    mutation(cache)
+    assert aggregate_state(aggregates) == aggregate_state(rebuilt(cache, aggregates))
+
+
+def test_store_defaulters_use_student_profile(tmp_path, records):
+    target = records[0]
+    identity = (target['Student Name'], target['Father Name'])
+    rows = [i for i, r in enumerate(records) if (r['Student Name'], r['Father Name']) == identity]
+    changed = [dict(r) for r in records]
+    for i in rows:
+        changed[i] = edited(changed[i], Fee_Status='Not Paid', Receipt_Number='')
+    # An old mobile on the top row - the profile takes the bottom row's details
+    changed[rows[0]] = edited(changed[rows[0]], Mobile_Number='9111111111', Student_ID='VK-OLD')
+    backend = SQLiteBackend(str(tmp_path / 'fees.db'))
+    backend.save_all(changed)
+
+    store = DataStore(backend, ttl=600)
+    entry = next(d for d in store.defaulters(1) if (d['student_name'], d['father_name']) == identity)
+    assert entry['unpaid_count'] == len(rows)
+    assert entry['mobile_number'] == changed[rows[-1]]['Mobile Number']
+    assert entry['student_id'] == changed[rows[-1]]['Student ID']
@@ -0,0 +1,54 @@
+"""
+RecordCache: copies out, TTL expiry, versions, and write-through of single
+row changes.
+"""
+
+from conftest import edited, make_cache
+
+
+def test_get_hands_out_copies(records):
+    cache = make_cache(records)
+    first = cache.get()
+    first[0]['Fee Status'] = 'Changed'
+    assert cache.get() == records
+    assert cache.get_row(2) == records[0]
+
+
+def test_expired_cache_still_has_stale_records(records):
+    cache = make_cache(records)
+    cache.ttl = 0
+    assert cache.get() is None
+    assert cache.get_row(2) is None
+    assert cache.fresh_version() is None
+    assert cache.get_stale() == records
+    assert cache.count() == len(records)
+
+
+def test_write_through(records):
+    cache = make_cache(records)
+    version = cache.version
+    cache.apply_update(3, edited(records[1], Fee_Status='Paid', Receipt_Number='RCP-1'))
+    cache.apply_append([edited(records[0], Month='April 2026')])
+    cache.apply_delete(2)
+    expected = [edited(records[1], Fee_Status='Paid', Receipt_Number='RCP-1')] + records[2:]
+    expected.append(edited(records[0], Month='April 2026'))
+    assert cache.get() == expected
+    assert cache.version == version + 3
+
+
+def test_write_outside_cache_invalidates(records):
+    cache = make_cache(records)
+    cache.apply_update(len(records) + 5, records[0])
+    assert cache.get_stale() is None
+    assert not cache.is_fresh()
+
+    cache = make_cache(records)
+    cache.apply_delete(1)  # the header row
+    assert cache.get_stale() is None
+
+
+def test_append_to_empty_cache_is_ignored(records):
+    cache = make_cache(records)
+    cache.invalidate()
+    cache.apply_append(records[:1])
+    assert cache.count() is None
@@ -0,0 +1,75 @@
+"""
+Conditional GET: read endpoints carry an ETag, an unchanged reload is a
+bodyless 304, and any write or different query gets a new tag.
+"""
+
+import pytest
+from flask import Flask, jsonify, request
+
+from conftest import edited
+from fee_core.datastore import DataStore
+from fee_core.storage import SQLiteBackend
+
+
+@pytest.fixture
+def store(tmp_path, records):
+    backend = SQLiteBackend(str(tmp_path / 'fees.db'))
+    backend.save_all(records)
+    return DataStore(backend, ttl=600)
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    built = []
+
+    @app.route('/api/students')
+    @store.conditional_get
+    def students():
+        built.append(request.args.get('page'))
+        return jsonify({'success': True, 'data': store.read_all()})
+
+    @app.route('/api/missing')
+    @store.conditional_get
+    def missing():
+        return jsonify({'success': False}), 404
+
+    client = app.test_client()
+    client.built = built
+    return client
+
+
+def test_unchanged_reload_is_304(client, store):
+    store.ensure_loaded()
+    first = client.get('/api/students')
+    assert first.status_code == 200 and first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get('/api/students', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+    # The view was not run for the 304
+    assert client.built == [None]
+
+
+def test_write_or_other_query_changes_the_tag(client, store, records):
+    store.ensure_loaded()
+    etag = client.get('/api/students').headers['ETag']
+    assert client.get('/api/students?page=2').headers['ETag'] != etag
+
+    assert store.update_row(2, edited(records[0], Fee_Status='Paid', Receipt_Number='RCP-ETAG'))
+    response = client.get('/api/students', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_cold_cache_and_errors_go_out_untagged(client, store):
+    store.ensure_loaded()
+    missing = client.get('/api/missing')
+    assert missing.status_code == 404 and 'ETag' not in missing.headers
+
+    store.cache.invalidate()
+    # Built from a cold cache: no version to tag yet
+    assert 'ETag' not in client.get('/api/students').headers
+    assert 'ETag' in client.get('/api/students').headers
@@ -0,0 +1,76 @@
+"""
+Streaming uploads: files are read in chunks, and rows already stored or
+repeated anywhere in the file - in the same chunk or an earlier one - are
+skipped.
+"""
+
+import csv
+
+import pytest
+from openpyxl import Workbook
+
+from fee_core.datastore import DataStore
+from fee_core.importer import iter_record_chunks
+from fee_core.jobs import ImportJob, ingest_file
+from fee_core.records import HEADERS
+from fee_core.storage import SQLiteBackend
+
+
+@pytest.fixture
+def store(tmp_path, records):
+    backend = SQLiteBackend(str(tmp_path / 'fees.db'))
+    backend.save_all(records[:8])
+    return DataStore(backend, ttl=600)
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def row(name, month, status='Not Paid', receipt=''):
+    return ['', name, 'Father', '9000000000', month, status, receipt]
+
+
+def test_chunks_of_a_horizontal_workbook(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Student Name', 'Father Name', 'Jan-26', 'Feb-26'])
+    for n in range(5):
+        sheet.append([f'Student {n}', f'Father {n}', 'Paid (RCP-0126-%03d)' % n, None])
+    sheet.append([None, None, None, None])  # blank rows are dropped before chunking
+    path = str(tmp_path / 'fees.xlsx')
+    workbook.save(path)
+
+    chunks = list(iter_record_chunks(path, chunk_rows=2))
+    assert [rows_read for rows_read, _ in chunks] == [2, 2, 1]
+    records = [r for _, chunk in chunks for r in chunk]
+    assert len(records) == 10
+    assert records[0]['Receipt Number'] == 'RCP-0126-000'
+    assert records[1]['Month'] == 'February 2026' and records[1]['Fee Status'] == 'Not Paid'
+
+
+def test_duplicates_within_and_across_chunks(tmp_path, store, records):
+    existing = records[0]
+    path = write_csv(tmp_path / 'upload.csv', [
+        HEADERS,
+        row('Aarav New', 'January 2026', 'Paid', 'RCP-0126-900'),
+        row('Aarav New', 'january 2026'),                           # same chunk, month case differs
+        row('Diya New', 'January 2026', 'Paid', 'RCP-0126-900'),    # receipt used in the same chunk
+        row('Kabir New', 'January 2026'),
+        row(' Aarav New ', 'January 2026'),                         # an earlier chunk, padded
+        row('Meera New', 'March 2026', 'Paid', 'rcp-0126-900'),     # receipt from an earlier chunk
+        [existing[h] for h in HEADERS],                             # already stored
+        row('', 'January 2026'),                                    # no name
+        row('Ishaan New', 'February 2026')
+    ])
+    job = ImportJob('upload.csv')
+    ingest_file(job, store, path, chunk_rows=4)
+
+    assert (job.added, job.skipped, job.chunks, job.processed_rows) == (3, 6, 3, 9)
+    added = store.read_all()[8:]
+    assert [(r['Student Name'], r['Month']) for r in added] == [
+        ('Aarav New', 'January 2026'), ('Kabir New', 'January 2026'), ('Ishaan New', 'February 2026')
+    ]
+    assert job.to_dict()['errors'][0] == 'Aarav New already has record for january 2026'
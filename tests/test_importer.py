@@ -0,0 +1,73 @@
+"""
+Upload parsing: vertical sheets (one row per month) and horizontal ones
+(months as columns, "Paid (RCP-...)" cells) both become fee records.
+"""
+
+import io
+from datetime import datetime
+
+import pandas as pd
+
+from fee_core.importer import dataframe_to_records, month_from_header, read_upload
+from fee_core.records import HEADERS
+
+
+def test_month_headers():
+    assert month_from_header('Jan-26') == 'January 2026'
+    assert month_from_header('mar/2027') == 'March 2027'
+    assert month_from_header(' April 2026 ') == 'April 2026'
+
+
+def test_vertical_sheet_with_other_column_spellings():
+    df = pd.DataFrame({
+        'Roll No': [101.0, None],
+        'Name': ['Aarav Sharma', 'Diya Patel'],
+        "Father's Name": ['Rajesh Sharma', 'Mehul Patel'],
+        'Phone': [9876543210.0, 9123456789.0],
+        'Month': [datetime(2026, 1, 1), 'February 2026'],
+        'Status': ['Paid', 'Not Paid'],
+        'Receipt': ['RCP-0126-001', None],
+        'Remarks': ['ignored', 'ignored']
+    })
+    records = dataframe_to_records(df)
+    assert list(records[0]) == HEADERS
+    assert records == [
+        {'Student ID': '101', 'Student Name': 'Aarav Sharma', 'Father Name': 'Rajesh Sharma',
+         'Mobile Number': '9876543210', 'Month': 'January 2026', 'Fee Status': 'Paid',
+         'Receipt Number': 'RCP-0126-001'},
+        {'Student ID': '', 'Student Name': 'Diya Patel', 'Father Name': 'Mehul Patel',
+         'Mobile Number': '9123456789', 'Month': 'February 2026', 'Fee Status': 'Not Paid',
+         'Receipt Number': ''}
+    ]
+
+
+def test_horizontal_sheet_is_melted_student_by_student():
+    df = pd.DataFrame({
+        'Student ID': ['VK-1', 'VK-2'],
+        'Student Name': ['Aarav Sharma', 'Diya Patel'],
+        'Father Name': ['Rajesh Sharma', 'Mehul Patel'],
+        'Mobile Number': ['9876543210', '9123456789'],
+        'Jan-26': ['Paid (RCP-0126-001)', 'Not Paid'],
+        'Feb-26': ['', 'paid'],
+        datetime(2026, 3, 1): [None, 'Paid (RCP-0326-004)']
+    })
+    records = dataframe_to_records(df)
+    assert [(r['Student Name'], r['Month'], r['Fee Status'], r['Receipt Number']) for r in records] == [
+        ('Aarav Sharma', 'January 2026', 'Paid', 'RCP-0126-001'),
+        ('Aarav Sharma', 'February 2026', 'Not Paid', ''),
+        ('Aarav Sharma', 'March 2026', 'Not Paid', ''),
+        ('Diya Patel', 'January 2026', 'Not Paid', ''),
+        ('Diya Patel', 'February 2026', 'Paid', ''),
+        ('Diya Patel', 'March 2026', 'Paid', 'RCP-0326-004')
+    ]
+    assert {r['Student ID'] for r in records} == {'VK-1', 'VK-2'}
+    assert records[3]['Mobile Number'] == '9123456789'
+
+
+def test_csv_upload_keeps_leading_zeros():
+    upload = io.BytesIO(b'Student ID,Student Name,Father Name,Mobile Number,Month,Fee Status,Receipt Number\n'
+                        b'007,Aarav Sharma,Rajesh Sharma,09876543210,January 2026,Paid,RCP-0126-001\n')
+    upload.filename = 'fees.csv'
+    records = read_upload(upload)
+    assert records[0]['Student ID'] == '007'
+    assert records[0]['Mobile Number'] == '09876543210'
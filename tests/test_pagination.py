@@ -0,0 +1,117 @@
+"""
+Keyset pagination: the sorted view against a rebuild, cursor walks, and
+cursors that were not handed out by us. Also page totals on a cold cache.
+"""
+
+import base64
+import json
+
+import pytest
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from conftest import make_cache, rebuilt
+from fee_core.datastore import DataStore
+from fee_core.pagination import InvalidCursor, SortedRecords, decode_cursor, encode_cursor
+from fee_core.quota import SheetsQuota
+from fee_core.records import HEADERS, record_to_row
+from fee_core.storage import GoogleSheetsBackend, SQLiteBackend
+
+
+def sorted_state(view):
+    return [record.to_dict() for record in view.snapshot()]
+
+
+def walk(view, limit, predicate=None):
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = view.page(cursor, limit, predicate)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+def test_snapshot_order(records):
+    view = SortedRecords()
+    make_cache(records, view)
+    names = [(r['Student Name'].lower(), r['Father Name'].lower()) for r in sorted_state(view)]
+    assert names == sorted(names)
+    assert len(names) == len(records)
+
+
+@pytest.mark.parametrize('limit', [1, 7, 40, 500])
+def test_cursor_walk_visits_every_record_once(records, limit):
+    view = SortedRecords()
+    make_cache(records, view)
+    pages = walk(view, limit)
+    assert [r for page in pages for r in page] == sorted_state(view)
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_cursor_walk_with_predicate(records):
+    view = SortedRecords()
+    make_cache(records, view)
+    paid = lambda record: record.status_label == 'Paid'
+    pages = walk(view, 5, paid)
+    assert [r for page in pages for r in page] == [r for r in sorted_state(view) if r['Fee Status'] == 'Paid']
+
+
+def test_matches_rebuild(records, mutation):
+    view = SortedRecords()
+    cache = make_cache(records, view)
+    mutation(cache)
+    assert sorted_state(view) == sorted_state(rebuilt(cache, view))
+
+
+def token(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!', token('text'), token([1, 2]), token([[1, 2], 0]), token([['a', 'b', 2026, 1], 0]),
+    token([['a', 'b', '2026', 1, 'january 2026'], 0]), token([['a', 'b', 2026, 1, 'january 2026'], 'x']),
+    token([['a', 'b', 2026, True, 'january 2026'], 0]), token([{'a': 1}, 0])
+])
+def test_malformed_cursor(records, cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+    view = SortedRecords()
+    make_cache(records, view)
+    with pytest.raises(InvalidCursor):
+        view.page(cursor, 10)
+
+
+def test_store_turns_bad_cursor_into_none(tmp_path, records):
+    backend = SQLiteBackend(str(tmp_path / 'fees.db'))
+    backend.save_all(records)
+    store = DataStore(backend, ttl=600)
+    assert store.page_sorted(token([[1, 2], 0]), 10) is None
+    page, cursor = store.page_sorted(None, 10)
+    assert encode_cursor(decode_cursor(cursor)) == cursor
+    assert store.page_sorted(cursor, 10)[0][0] not in page
+
+
+# ----- totals of pages read straight from Google Sheets -----
+
+@pytest.fixture
+def hand_made_sheet(records):
+    """A sheet made in the UI: the data, then the blank rows of the default 1000-row grid"""
+    rows = [HEADERS] + [record_to_row(r) for r in records]
+    return FakeSpreadsheet(rows + [[] for _ in range(1000 - len(rows))])
+
+
+def cold_store(spreadsheet):
+    backend = GoogleSheetsBackend(lambda: spreadsheet.sheet1,
+                                  quota=SheetsQuota(reads_per_minute=6000, writes_per_minute=6000))
+    store = DataStore(backend, ttl=600)
+    store.warm_on_page = False
+    return store
+
+
+@pytest.mark.parametrize('offset', [0, 50, 115, 120, 500])
+def test_cold_page_total_counts_records_not_grid_rows(hand_made_sheet, records, offset):
+    page, total = cold_store(hand_made_sheet).read_page(offset, 10)
+    assert total == len(records)
+    assert page == records[offset:offset + 10]
+    # The count came in the same request as the page
+    assert hand_made_sheet.stats()['calls'].get('batch_get') == 1
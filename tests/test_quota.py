@@ -0,0 +1,125 @@
+"""
+SheetsQuota: the token bucket, retries of 429 / 5xx responses (honouring
+Retry-After) and de-duplication of identical reads in flight.
+"""
+
+import threading
+
+import pytest
+
+from benchmarks.fake_sheets import FakeAPIError, FakeSpreadsheet
+from fee_core.quota import SheetsQuota, TokenBucket
+from fee_core.records import HEADERS, record_to_row
+from fee_core.storage import GoogleSheetsBackend
+
+
+class Clock:
+    """Stands in for both time.monotonic (the fake's quota window) and time.sleep (our backoff)"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def failing(*statuses, result='ok'):
+    """A call that fails with each status in turn, then succeeds"""
+    errors = [FakeAPIError(status, f'HTTP {status}') for status in statuses]
+    calls = []
+
+    def call():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    call.calls = calls
+    return call
+
+
+def test_token_bucket_bursts_then_waits():
+    bucket = TokenBucket(6000, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() > 0
+
+
+def test_sheet_429_is_retried_after_retry_after(records):
+    clock = Clock()
+    spreadsheet = FakeSpreadsheet([HEADERS] + [record_to_row(r) for r in records], reads_per_minute=2, clock=clock)
+    quota = SheetsQuota(reads_per_minute=6000, sleep=clock.sleep)
+    backend = GoogleSheetsBackend(lambda: spreadsheet.sheet1, quota=quota)
+
+    for _ in range(3):
+        assert backend.read_all() == records
+    # The third read was refused until the fake's minute window moved on
+    assert spreadsheet.stats()['rejected'] == 1
+    assert len(clock.slept) == 1 and clock.slept[0] >= 60
+    stats = quota.stats()
+    assert (stats['throttled'], stats['retries'], stats['reads'], stats['failures']) == (1, 1, 4, 0)
+
+
+def test_server_errors_back_off_and_give_up():
+    clock = Clock()
+    quota = SheetsQuota(max_retries=2, base_delay=1.0, max_delay=4.0, sleep=clock.sleep)
+    call = failing(503, 500)
+    assert quota.call('read', call) == 'ok'
+    assert all(0 <= delay <= 2 ** n for n, delay in enumerate(clock.slept))
+
+    with pytest.raises(FakeAPIError):
+        quota.call('read', failing(503, 503, 503))
+    assert quota.stats()['failures'] == 1
+    # Not worth repeating
+    with pytest.raises(FakeAPIError):
+        quota.call('read', failing(400))
+    assert quota.stats()['server_errors'] == 4
+
+
+def test_non_idempotent_write_is_only_retried_on_429():
+    quota = SheetsQuota(sleep=lambda seconds: None)
+    # A 5xx may hide an append that went through
+    append = failing(503)
+    with pytest.raises(FakeAPIError):
+        quota.call('write', append, idempotent=False)
+    assert len(append.calls) == 1
+    # A 429 means it was never applied
+    append = failing(429)
+    assert quota.call('write', append, idempotent=False) == 'ok'
+    assert len(append.calls) == 2
+
+
+def test_identical_reads_in_flight_share_one_call():
+    quota = SheetsQuota(reads_per_minute=6000)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_read():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ['row']
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(quota.call('read', slow_read, dedup_key='values')))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(quota.call('read', slow_read, dedup_key='values')))
+                 for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while quota.stats()['deduplicated'] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == [['row']] * 4
+    assert len(calls) == 1
+    # Once finished, the same key is read again
+    assert quota.call('read', lambda: ['new'], dedup_key='values') == ['new']
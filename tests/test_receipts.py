@@ -0,0 +1,95 @@
+"""
+ReceiptSequence: numbers stay unique when two servers share one spreadsheet,
+and numbers already saved by someone else are skipped.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from conftest import edited
+from fee_core.datastore import DataStore
+from fee_core.quota import SheetsQuota
+from fee_core.receipts import ReceiptSequence
+from fee_core.records import HEADERS, record_to_row
+from fee_core.storage import ExcelBackend, GoogleSheetsBackend, SQLiteBackend
+
+WHEN = datetime(2030, 1, 15)  # RCP-0130- - a prefix no sample record uses
+
+
+@pytest.fixture
+def spreadsheet(records):
+    return FakeSpreadsheet([HEADERS] + [record_to_row(r) for r in records])
+
+
+def server(spreadsheet):
+    """One app process: its own backend, cache and counter lock"""
+    backend = GoogleSheetsBackend(lambda: spreadsheet.sheet1,
+                                  quota=SheetsQuota(reads_per_minute=6000, writes_per_minute=6000))
+    store = DataStore(backend, ttl=600)
+    store.ensure_loaded()
+    return ReceiptSequence(store)
+
+
+def in_step(worksheet, method, calls=2):
+    """The first `calls` calls of a worksheet method wait for each other - after running"""
+    original = getattr(worksheet, method)
+    barrier = threading.Barrier(calls, timeout=5)
+    seen = []
+
+    def call(*args, **kwargs):
+        result = original(*args, **kwargs)
+        seen.append(method)
+        if len(seen) <= calls:
+            barrier.wait()
+        return result
+
+    setattr(worksheet, method, call)
+
+
+def test_two_servers_reading_the_counter_together(spreadsheet):
+    counters = spreadsheet.add_worksheet('Sequences', rows=100, cols=3)
+    # Both read the counter before either writes, and both write before either reads back
+    in_step(counters, 'get_all_values')
+    in_step(counters, 'update')
+    servers = [server(spreadsheet), server(spreadsheet)]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        blocks = list(pool.map(lambda sequence: sequence.reserve(3, WHEN), servers))
+
+    issued = blocks[0] + blocks[1]
+    assert len(set(issued)) == 6
+    assert sorted(issued) == [f'RCP-0130-00{n}' for n in range(1, 7)]
+    assert counters.get_all_values()[0][:2] == ['RCP-0130-', '6']
+
+
+def test_numbers_saved_after_the_cache_loaded_are_skipped(spreadsheet, records):
+    sequence = server(spreadsheet)
+    # Another server saved a payment the cache has not seen yet
+    with spreadsheet.lock:
+        spreadsheet.sheet1._rows[3] = record_to_row(edited(records[2], Fee_Status='Paid',
+                                                           Receipt_Number='RCP-0130-001'))
+    assert sequence.store.find_receipt_row('RCP-0130-001') is None
+    assert sequence.reserve(2, WHEN) == ['RCP-0130-002', 'RCP-0130-003']
+
+
+def test_old_two_column_counter_tab_is_widened(spreadsheet):
+    counters = spreadsheet.add_worksheet('Sequences', rows=100, cols=2)
+    counters._rows = [['RCP-0130-', '7']]
+    assert server(spreadsheet).next(WHEN) == 'RCP-0130-008'
+    assert counters.col_count == 3
+
+
+@pytest.mark.parametrize('make_backend', [
+    lambda tmp_path: SQLiteBackend(str(tmp_path / 'fees.db')),
+    lambda tmp_path: ExcelBackend(str(tmp_path / 'fees.xlsx'))
+], ids=['sqlite', 'excel'])
+def test_receipts_in_use(tmp_path, records, make_backend):
+    backend = make_backend(tmp_path)
+    backend.save_all(records)
+    used = next(r['Receipt Number'] for r in records if r['Receipt Number'])
+    assert backend.receipts_in_use([used.upper(), ' RCP-0130-001 ']) == {used.lower()}
+    assert backend.receipts_in_use([]) == set()
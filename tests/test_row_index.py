@@ -0,0 +1,133 @@
+"""
+RowIndex lookups, and DataStore row writes landing on the right row when the
+sheet was edited by hand after the cache was loaded.
+"""
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from conftest import edited, make_cache, rebuilt
+from fee_core.datastore import DataStore
+from fee_core.quota import SheetsQuota
+from fee_core.records import HEADERS, record_to_row
+from fee_core.row_index import RowIndex
+from fee_core.storage import GoogleSheetsBackend
+
+
+def index_state(index, cache):
+    records = cache.get_stale()
+    return {
+        'rows': [index.find(r['Student Name'], r['Father Name'], r['Month']) for r in records],
+        'receipts': {receipt: index.find_receipt(receipt) for receipt in sorted(index.receipts())},
+        'size': len(index)
+    }
+
+
+def test_lookups(records):
+    index = RowIndex()
+    make_cache(records, index)
+    record = records[6]
+    assert index.find(record['Student Name'], record['Father Name'], record['Month']) == 8
+    # Month matching ignores case, names ignore surrounding spaces
+    assert index.find(f" {record['Student Name']} ", record['Father Name'], record['Month'].upper()) == 8
+    assert index.find(record['Student Name'], 'Someone Else', record['Month']) is None
+    receipt = next(r for r in records if r['Receipt Number'])
+    assert index.find_receipt(receipt['Receipt Number'].lower()) == records.index(receipt) + 2
+
+
+def test_duplicates_resolve_to_first_row(records):
+    index = RowIndex()
+    cache = make_cache(records + [records[3]], index)
+    assert index.find(records[3]['Student Name'], records[3]['Father Name'], records[3]['Month']) == 5
+    cache.apply_delete(5)
+    assert index.find(records[3]['Student Name'], records[3]['Father Name'], records[3]['Month']) == len(records) + 1
+
+
+def test_matches_rebuild(records, mutation):
+    index = RowIndex()
+    cache = make_cache(records, index)
+    mutation(cache)
+    assert index_state(index, cache) == index_state(rebuilt(cache, index), cache)
+
+
+# ----- writes after the sheet was edited in the Sheets UI -----
+
+def sheets_store(records):
+    spreadsheet = FakeSpreadsheet([HEADERS] + [record_to_row(r) for r in records])
+    backend = GoogleSheetsBackend(lambda: spreadsheet.sheet1,
+                                  quota=SheetsQuota(reads_per_minute=6000, writes_per_minute=6000))
+    store = DataStore(backend, ttl=600)
+    store.ensure_loaded()
+    return spreadsheet, store
+
+
+def sheet_records(spreadsheet):
+    return [dict(zip(HEADERS, row + [''] * (len(HEADERS) - len(row)))) for row in spreadsheet.sheet1._rows[1:]]
+
+
+def edit_by_hand(spreadsheet, change):
+    """Someone edits the sheet directly - the Drive modified time moves"""
+    with spreadsheet.lock:
+        change(spreadsheet.sheet1._rows)
+        spreadsheet.touch()
+
+
+def test_update_follows_row_moved_by_hand(records):
+    spreadsheet, store = sheets_store(records)
+    target = records[9]
+    row_number = store.find_row(target['Student Name'], target['Father Name'], target['Month'])
+    # A row is inserted above it after the cache was loaded
+    edit_by_hand(spreadsheet, lambda rows: rows.insert(1, record_to_row(edited(records[0], Student_Name='Inserted'))))
+
+    assert store.update_row(row_number, edited(target, Fee_Status='Paid', Receipt_Number='RCP-MOVED'))
+    on_sheet = sheet_records(spreadsheet)
+    assert on_sheet[10] == edited(target, Fee_Status='Paid', Receipt_Number='RCP-MOVED')
+    assert on_sheet[9] == records[8]  # the row it used to be on is untouched
+    assert store.read_all() == on_sheet
+
+
+def test_delete_follows_rows_sorted_by_hand(records):
+    spreadsheet, store = sheets_store(records)
+    target = records[0]
+    row_number = store.find_row(target['Student Name'], target['Father Name'], target['Month'])
+
+    def sort_descending(rows):
+        rows[1:] = rows[:0:-1]
+
+    edit_by_hand(spreadsheet, sort_descending)
+
+    assert store.delete_row(row_number)
+    on_sheet = sheet_records(spreadsheet)
+    assert target not in on_sheet
+    assert len(on_sheet) == len(records) - 1
+    assert store.read_all() == on_sheet
+
+
+def test_write_to_row_deleted_by_hand_is_refused(records):
+    for write in (lambda store: store.update_row(5, edited(records[3], Fee_Status='Paid')),
+                  lambda store: store.delete_row(5)):
+        spreadsheet, store = sheets_store(records)
+        edit_by_hand(spreadsheet, lambda rows: rows.pop(4))  # records[3]
+        assert not write(store)
+        assert sheet_records(spreadsheet) == records[:3] + records[4:]
+
+
+def test_student_update_follows_moved_rows(records):
+    spreadsheet, store = sheets_store(records)
+    target = records[0]
+    number = store.find_student(target['Student Name'], target['Father Name'])
+    edit_by_hand(spreadsheet, lambda rows: rows.insert(1, record_to_row(edited(records[5], Month='April 2026'))))
+
+    assert store.update_student(number, {'Mobile Number': '9333333333'})
+    for record in sheet_records(spreadsheet):
+        ours = (record['Student Name'], record['Father Name']) == (target['Student Name'], target['Father Name'])
+        assert (record['Mobile Number'] == '9333333333') == ours
+
+
+def test_unchanged_sheet_is_not_reread_before_writes(records):
+    spreadsheet, store = sheets_store(records)
+    calls = dict(spreadsheet.stats()['calls'])
+    store.update_row(2, edited(records[0], Fee_Status='Paid'))
+    store.update_row(3, edited(records[1], Fee_Status='Paid'))
+    made = {name: n - calls.get(name, 0) for name, n in spreadsheet.stats()['calls'].items()
+            if n != calls.get(name, 0)}
+    # Each write: check the modified time, write, take the new modified time - no re-read
+    assert made == {'get_lastUpdateTime': 4, 'update': 2}
@@ -0,0 +1,59 @@
+"""
+SearchIndex: ranking, and results that match a rebuilt index after the
+cache was changed in place.
+"""
+
+from conftest import edited, make_cache, rebuilt
+from fee_core.search import SearchIndex
+
+
+def queries(records):
+    return ['', 'sharma', 'rcp-', 'ra', records[0]['Mobile Number'][-4:], records[-1]['Student ID']]
+
+
+def search_state(index, cache):
+    return [index.search(query) for query in queries(cache.get_stale())]
+
+
+def test_exact_id_then_prefix_then_substring(records):
+    index = SearchIndex()
+    make_cache(records, index)
+    target = records[0]
+    results = index.search(target['Student ID'].lower())
+    assert results[0]['Student ID'] == target['Student ID']
+
+    name = target['Student Name']
+    results = index.search(name[1:4])
+    starts = [r['Student Name'].lower().startswith(name[1:4].lower()) or
+              r['Father Name'].lower().startswith(name[1:4].lower()) for r in results]
+    # Prefix matches come before the other substring matches
+    assert starts == sorted(starts, reverse=True)
+    assert target in results
+
+
+def test_field_filter_and_short_queries(records):
+    index = SearchIndex()
+    make_cache(records, index)
+    receipt = next(r['Receipt Number'] for r in records if r['Receipt Number'])
+    assert index.search(receipt, ['Student Name']) == []
+    assert index.search(receipt, ['Receipt Number'])[0]['Receipt Number'] == receipt
+    # Under three characters the distinct values are scanned instead of the trigrams
+    expected = [r for r in records if any('ra' in r[f].lower() for f in index.fields)]
+    results = index.search('ra')
+    assert len(results) == len(expected) and all(r in results for r in expected)
+    assert index.search('   ') == records
+
+
+def test_updated_value_is_found_under_its_new_text(records):
+    index = SearchIndex()
+    cache = make_cache(records, index)
+    cache.apply_update(2, edited(records[0], Student_Name='Qwertyuiop'))
+    assert [r['Student Name'] for r in index.search('ertyu')] == ['Qwertyuiop']
+    assert edited(records[0], Student_Name='Qwertyuiop') not in index.search(records[0]['Student Name'])
+
+
+def test_matches_rebuild(records, mutation):
+    index = SearchIndex()
+    cache = make_cache(records, index)
+    mutation(cache)
+    assert search_state(index, cache) == search_state(rebuilt(cache, index), cache)
@@ -0,0 +1,64 @@
+"""
+GoogleSheetsBackend.save_all: one atomic batchUpdate that rewrites the values
+and the Paid/Not Paid conditional formatting, whatever rules the sheet had.
+"""
+
+import pytest
+
+from benchmarks.fake_sheets import FakeAPIError, FakeSpreadsheet
+from fee_core.quota import SheetsQuota
+from fee_core.records import HEADERS, record_to_row
+from fee_core.storage import GoogleSheetsBackend
+
+
+@pytest.fixture
+def spreadsheet(records):
+    return FakeSpreadsheet([HEADERS] + [record_to_row(r) for r in records[:5]])
+
+
+@pytest.fixture
+def backend(spreadsheet):
+    return GoogleSheetsBackend(lambda: spreadsheet.sheet1, quota=SheetsQuota(max_retries=0))
+
+
+def rules(spreadsheet):
+    return spreadsheet.fetch_sheet_metadata()['sheets'][0]['conditionalFormats']
+
+
+def test_save_replaces_values_in_one_request(spreadsheet, backend, records):
+    backend.save_all(records)
+    assert backend.read_all() == records
+    assert spreadsheet.stats()['calls']['spreadsheet_batch_update'] == 1
+    assert len(rules(spreadsheet)) == 4
+
+    backend.save_all([])
+    assert backend.read_all() == []
+    assert spreadsheet.sheet1.get_all_values() == [HEADERS]
+
+
+def test_rules_changed_by_hand_between_saves(spreadsheet, backend, records):
+    backend.save_all(records)
+    # Someone deletes two rules in the Sheets UI ...
+    del spreadsheet._conditional_formats[0][:2]
+    backend.save_all(records[:10])
+    assert len(rules(spreadsheet)) == 4
+    # ... or adds one of their own
+    spreadsheet._conditional_formats[0].append({'ranges': [{'sheetId': 0}], 'booleanRule': {}})
+    backend.save_all(records)
+    assert len(rules(spreadsheet)) == 4
+    assert backend.read_all() == records
+
+
+def test_failed_save_leaves_the_sheet_alone(spreadsheet, backend, records):
+    before = spreadsheet.sheet1.get_all_values()
+    original = spreadsheet.batch_update
+
+    def reject_formatting(body):
+        body['requests'].append({'deleteConditionalFormatRule': {'sheetId': 0, 'index': 99}})
+        return original(body)
+
+    spreadsheet.batch_update = reject_formatting
+    with pytest.raises(FakeAPIError):
+        backend.save_all(records)
+    assert spreadsheet.sheet1.get_all_values() == before
+    assert rules(spreadsheet) == []
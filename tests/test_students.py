@@ -0,0 +1,67 @@
+"""
+StudentTable: one entry per student with their sheet rows; details come
+from the bottom-most row however the table was kept up to date.
+"""
+
+from conftest import edited, make_cache, rebuilt
+from fee_core.students import StudentTable
+
+
+def student_state(students):
+    """Students by name, without their numbers (those depend on the order first seen)"""
+    people = []
+    for info in students.all():
+        number = info.pop('number')
+        people.append((info, students.rows(number)))
+    return sorted(people, key=lambda person: (person[0]['name'], person[0]['father']))
+
+
+def test_lookups(records):
+    students = StudentTable()
+    make_cache(records, students)
+    record = records[0]
+    number = students.find(f" {record['Student Name']} ", record['Father Name'])
+    rows = students.rows(number)
+    assert [records[row - 2]['Student Name'] for row in rows] == [record['Student Name']] * len(rows)
+    assert students.info(number)['name'] == record['Student Name']
+    assert students.find(record['Student Name'], 'Someone Else') is None
+    assert students.info(999) is None and students.rows(999) == []
+
+
+def test_legacy_key_with_underscores_in_names(records):
+    students = StudentTable()
+    make_cache([edited(records[0], Student_Name='Ravi_Kumar', Father_Name='Om_Prakash_Singh')], students)
+    assert students.resolve('Ravi_Kumar_Om_Prakash_Singh') == ('Ravi_Kumar', 'Om_Prakash_Singh')
+    assert students.resolve('Ravi_Kumar') is None
+
+
+def test_details_come_from_bottom_row(records):
+    students = StudentTable()
+    cache = make_cache(records, students)
+    number = students.find(records[0]['Student Name'], records[0]['Father Name'])
+    top, *_, bottom = students.rows(number)
+    previous = students.info(number)['mobile']
+
+    cache.apply_update(top, edited(cache.get_row(top), Mobile_Number='9111111111'))
+    assert students.info(number)['mobile'] == previous
+    cache.apply_update(bottom, edited(cache.get_row(bottom), Mobile_Number='9222222222', Student_ID='VK-NEW'))
+    assert (students.info(number)['mobile'], students.info(number)['student_id']) == ('9222222222', 'VK-NEW')
+    cache.apply_delete(bottom)
+    assert students.info(number)['mobile'] != '9222222222'
+
+
+def test_last_row_deleted_drops_student(records):
+    students = StudentTable()
+    cache = make_cache(records, students)
+    name, father = records[0]['Student Name'], records[0]['Father Name']
+    for row_number in reversed(students.rows(students.find(name, father))):
+        cache.apply_delete(row_number)
+    assert students.find(name, father) is None
+    assert len(students) == len(rebuilt(cache, students))
+
+
+def test_matches_rebuild(records, mutation):
+    students = StudentTable()
+    cache = make_cache(records, students)
+    mutation(cache)
+    assert student_state(students) == student_state(rebuilt(cache, students))
@@ -0,0 +1,77 @@
+"""
+Delta sync: an unchanged change token costs one metadata call, a changed one
+re-reads the sheet and merges only the rows that differ into the cache.
+"""
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from conftest import edited, make_cache
+from fee_core.datastore import DataStore
+from fee_core.quota import SheetsQuota
+from fee_core.records import HEADERS, record_to_row
+from fee_core.storage import GoogleSheetsBackend
+
+
+def sheets_store(records):
+    spreadsheet = FakeSpreadsheet([HEADERS] + [record_to_row(r) for r in records])
+    backend = GoogleSheetsBackend(lambda: spreadsheet.sheet1,
+                                  quota=SheetsQuota(reads_per_minute=6000, writes_per_minute=6000))
+    store = DataStore(backend, ttl=600)
+    store.ensure_loaded()
+    # Every read from here on goes back to the sheet
+    store.cache.ttl = 0
+    return spreadsheet, store
+
+
+def calls(spreadsheet):
+    return dict(spreadsheet.stats()['calls'])
+
+
+def test_unchanged_sheet_is_not_reread(records):
+    spreadsheet, store = sheets_store(records)
+    before = calls(spreadsheet)
+    version = store.cache.version
+    assert store.read_all() == records
+    after = calls(spreadsheet)
+    assert after['get_all_values'] == before['get_all_values']
+    assert after['get_lastUpdateTime'] == before['get_lastUpdateTime'] + 1
+    assert store.cache.version == version
+    assert store.sync_stats['unchanged'] == 1
+
+
+def test_edit_by_hand_is_merged(records):
+    spreadsheet, store = sheets_store(records)
+    version = store.cache.version
+    with spreadsheet.lock:
+        spreadsheet.sheet1._rows[5] = record_to_row(edited(records[4], Fee_Status='Paid', Receipt_Number='RCP-HAND'))
+        spreadsheet.sheet1._rows.append(record_to_row(edited(records[0], Month='April 2026')))
+        spreadsheet.touch()
+
+    expected = records[:4] + [edited(records[4], Fee_Status='Paid', Receipt_Number='RCP-HAND')] + records[5:]
+    expected.append(edited(records[0], Month='April 2026'))
+    assert store.read_all() == expected
+    assert (store.sync_stats['merges'], store.sync_stats['rows_changed']) == (1, 2)
+    assert store.cache.version == version + 1
+    assert store.find_receipt_row('rcp-hand') == 6
+
+
+def test_token_failure_rereads(records):
+    spreadsheet, store = sheets_store(records)
+    before = calls(spreadsheet)['get_all_values']
+
+    def unavailable():
+        raise ConnectionError('Drive is down')
+
+    spreadsheet.get_lastUpdateTime = unavailable
+    assert store.read_all() == records
+    assert calls(spreadsheet)['get_all_values'] == before + 1
+
+
+def test_merge_counts_and_versions(records):
+    cache = make_cache(records)
+    version = cache.version
+    assert cache.merge([dict(r) for r in records]) == 0
+    assert cache.version == version
+
+    assert cache.merge(records[:-7]) == 7
+    assert cache.get_stale() == records[:-7]
+    assert cache.version == version + 1
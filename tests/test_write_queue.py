@@ -0,0 +1,158 @@
+"""
+WriteBehindQueue journals: each process keeps its own, journals of exited
+processes are replayed by record identity, and failing batches are retried a
+bounded number of times.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from fee_core.row_index import record_key
+from fee_core.storage import SQLiteBackend
+from fee_core.write_queue import WriteBehindQueue
+
+
+def dead_pid():
+    """ID of a process that has already exited"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def key_of(record):
+    return list(record_key(record['Student Name'], record['Father Name'], record['Month']))
+
+
+def write_journal(path, *entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(entry) + '\n' for entry in entries)
+
+
+@pytest.fixture
+def backend(tmp_path, records):
+    backend = SQLiteBackend(str(tmp_path / 'students.db'))
+    backend.save_all(records)
+    return backend
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / 'pending_writes.jsonl')
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(backend, journal_path, **options):
+        # A long window - the tests flush by hand
+        queue = WriteBehindQueue(backend, window=60, journal_path=journal_path, **options)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        if queue._timer is not None:
+            queue._timer.cancel()
+
+
+def test_journal_is_per_process_and_emptied_by_flush(backend, journal, records, make_queue):
+    queue = make_queue(backend, journal)
+    assert queue.journal_path.endswith(f'pending_writes.{os.getpid()}.jsonl')
+    queue.update(3, dict(records[1], **{'Fee Status': 'Paid'}), key=key_of(records[1]))
+    with open(queue.journal_path, encoding='utf-8') as f:
+        assert [json.loads(line)['op'] for line in f] == ['update']
+    assert queue.flush()
+    assert not os.path.exists(queue.journal_path)
+    assert backend.read_all()[1]['Fee Status'] == 'Paid'
+
+
+def test_dead_process_journal_replays_onto_moved_row(backend, journal, records, make_queue, tmp_path):
+    target = records[5]  # row 7 when the journal was written
+    orphan = tmp_path / f'pending_writes.{dead_pid()}.jsonl'
+    write_journal(orphan, {'op': 'update', 'row': 7, 'key': key_of(target),
+                           'record': dict(target, **{'Fee Status': 'Paid', 'Receipt Number': 'RCP-REPLAY'})})
+    backend.delete_row(2)  # everything below moves up one row
+
+    queue = make_queue(backend, journal)
+    assert queue.pending() == 1
+    assert not orphan.exists()
+    assert queue.flush()
+
+    rows = backend.read_all()
+    assert rows[4]['Receipt Number'] == 'RCP-REPLAY'  # row 6
+    assert key_of(rows[4]) == key_of(target)
+    assert [r['Receipt Number'] for r in rows].count('RCP-REPLAY') == 1
+    assert os.listdir(tmp_path) == ['students.db']
+
+
+def test_live_process_journal_is_left_alone(backend, journal, make_queue, tmp_path):
+    # The test runner's parent is alive and may still be flushing its own queue
+    live = tmp_path / f'pending_writes.{os.getppid()}.jsonl'
+    write_journal(live, {'op': 'update', 'row': 2, 'record': {}})
+    queue = make_queue(backend, journal)
+    assert queue.pending() == 0
+    assert live.exists()
+
+
+def test_legacy_shared_journal_and_appends_are_recovered(backend, journal, records, make_queue):
+    new = dict(records[0], **{'Month': 'April 2026', 'Fee Status': 'Not Paid', 'Receipt Number': ''})
+    already_written = records[-1]
+    write_journal(journal,
+                  {'op': 'append', 'row': 2, 'records': [already_written, new]},
+                  {'op': 'update', 'row': 99, 'key': key_of(new), 'record': dict(new, **{'Fee Status': 'Paid'})})
+    queue = make_queue(backend, journal)
+    assert not os.path.exists(journal)
+    assert queue.flush()
+
+    rows = backend.read_all()
+    assert len(rows) == len(records) + 1  # the append that reached storage is not repeated
+    assert key_of(rows[-1]) == key_of(new)
+    assert rows[-1]['Fee Status'] == 'Paid'  # the edit was folded into the pending append
+
+
+def test_replay_of_missing_row_is_set_aside(backend, journal, records, make_queue, tmp_path):
+    gone = dict(records[0], **{'Student Name': 'Nobody Here'})
+    write_journal(tmp_path / f'pending_writes.{dead_pid()}.jsonl',
+                  {'op': 'update', 'row': 2, 'key': key_of(gone), 'record': gone})
+    queue = make_queue(backend, journal)
+    assert queue.flush()
+    assert queue.stats()['dropped_ops'] == 1
+    assert queue.failed_writes()[0]['error'] == 'row no longer exists in storage'
+    assert backend.read_all() == records
+
+
+class BrokenBackend(SQLiteBackend):
+    def update_rows(self, updates):
+        raise ConnectionError('storage is down')
+
+
+def test_failing_batch_gives_up_after_max_attempts(tmp_path, journal, records, make_queue):
+    backend = BrokenBackend(str(tmp_path / 'students.db'))
+    backend.save_all(records)
+    queue = make_queue(backend, journal, max_attempts=3)
+    dropped = []
+    queue.on_drop = lambda: dropped.append(True)
+    queue.update(2, dict(records[0], **{'Fee Status': 'Paid'}))
+
+    for attempt in (1, 2):
+        assert not queue.flush()
+        assert queue.stats()['retry_attempt'] == attempt
+        assert queue.pending() == 1
+        assert os.path.exists(queue.journal_path)
+    assert not dropped
+
+    assert not queue.flush()
+    stats = queue.stats()
+    assert stats['pending_ops'] == 0
+    assert stats['retry_attempt'] == 0
+    assert stats['dropped_ops'] == 1
+    assert 'storage is down' in stats['failed_writes'][0]['error']
+    assert dropped == [True]
+    assert not os.path.exists(queue.journal_path)
+    with open(queue.failed_path, encoding='utf-8') as f:
+        assert json.loads(f.readline())['record']['Fee Status'] == 'Paid'